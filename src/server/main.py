@@ -13,6 +13,7 @@ from .config import ServerConfig
 from .tools import get_all_tools
 from .resources import ResourceManager
 from .prompts import get_all_prompts
+from .utils import git_status_cache
 from src.shared import logger, ToolResultStatus
 
 
@@ -23,7 +24,7 @@ class CodingAgentServer:
         self.server = Server(self.config.name)
         self.tools = get_all_tools(self.config.project_root, self.config.allow_external_paths)
         self.resource_manager = ResourceManager(self.config.project_root)
-        self.prompts = get_all_prompts()
+        self.prompts = get_all_prompts(self.config.project_root, self.config.allow_external_paths)
         self._tool_map = {tool.name: tool for tool in self.tools}
         self._prompt_map = {prompt.name: prompt for prompt in self.prompts}
         self._register_handlers()
@@ -41,6 +42,8 @@ class CodingAgentServer:
             
             tool = self._tool_map[name]
             result = await tool.execute(**arguments)
+            if not tool.read_only:
+                git_status_cache.invalidate()
             
             return [TextContent(type="text", text=result.content)]
         
@@ -55,7 +58,7 @@ class CodingAgentServer:
             
             if uri.startswith("file://"):
                 mime_type = "text/plain"
-            elif uri.endswith(".json") or "summary" in uri or "files" in uri:
+            elif uri.endswith(".json") or "summary" in uri or "files" in uri or uri.startswith("server://"):
                 mime_type = "application/json"
             else:
                 mime_type = "text/plain"
@@ -1,3 +1,4 @@
+from pathlib import Path
 from .base import BasePrompt
 from .code_review import CodeReviewPrompt, QuickReviewPrompt
 from .debug import DebugErrorPrompt, ExplainCodePrompt, FixBugPrompt
@@ -9,7 +10,7 @@ from .documentation import (
 )
 
 
-def get_all_prompts() -> list[BasePrompt]:
+def get_all_prompts(project_root: Path = None, allow_external: bool = True) -> list[BasePrompt]:
     return [
         CodeReviewPrompt(),
         QuickReviewPrompt(),
@@ -21,8 +22,8 @@ def get_all_prompts() -> list[BasePrompt]:
         FixBugPrompt(),
         GenerateDocstringPrompt(),
         GenerateReadmePrompt(),
-        GenerateTestsPrompt(),
-        GenerateAPIDocsPrompt(),
+        GenerateTestsPrompt(project_root, allow_external),
+        GenerateAPIDocsPrompt(project_root, allow_external),
     ]
 
 
@@ -1,7 +1,14 @@
+from pathlib import Path
 from mcp.types import PromptArgument, PromptMessage
+from src.server.utils import PathValidator, ast_cache
 from .base import BasePrompt
 
 
+def load_module_context(validator: PathValidator, filepath: str) -> tuple[str, str]:
+    module = ast_cache.get(validator.validate(filepath))
+    return module.source, module.outline()
+
+
 class GenerateDocstringPrompt(BasePrompt):
     
     name = "generate_docstring"
@@ -91,12 +98,20 @@ class GenerateTestsPrompt(BasePrompt):
     name = "generate_tests"
     description = "Generate unit tests for code"
     
+    def __init__(self, project_root: Path = None, allow_external: bool = True):
+        self.validator = PathValidator(project_root or Path.cwd(), allow_external)
+    
     def get_arguments(self) -> list[PromptArgument]:
         return [
             PromptArgument(
                 name="code",
-                description="Code to test",
-                required=True
+                description="Code to test (optional if filepath is given)",
+                required=False
+            ),
+            PromptArgument(
+                name="filepath",
+                description="Python file to test; its source and outline are included",
+                required=False
             ),
             PromptArgument(
                 name="framework",
@@ -105,9 +120,15 @@ class GenerateTestsPrompt(BasePrompt):
             )
         ]
     
-    async def generate(self, code: str, framework: str = "pytest") -> list[PromptMessage]:
+    async def generate(self, code: str = "", filepath: str = "", framework: str = "pytest") -> list[PromptMessage]:
+        outline = ""
+        if filepath:
+            source, module_outline = load_module_context(self.validator, filepath)
+            code = code or source
+            outline = f"\n\nModule outline ({filepath}):\n{module_outline}"
+        
         prompt = f"""Generate comprehensive unit tests using {framework}:
-{code}
+{code}{outline}
 Include:
 1. Tests for normal behavior
 2. Edge cases
@@ -125,12 +146,20 @@ class GenerateAPIDocsPrompt(BasePrompt):
     name = "generate_api_docs"
     description = "Generate API documentation"
     
+    def __init__(self, project_root: Path = None, allow_external: bool = True):
+        self.validator = PathValidator(project_root or Path.cwd(), allow_external)
+    
     def get_arguments(self) -> list[PromptArgument]:
         return [
             PromptArgument(
                 name="code",
-                description="API code (endpoints, functions)",
-                required=True
+                description="API code (endpoints, functions) (optional if filepath is given)",
+                required=False
+            ),
+            PromptArgument(
+                name="filepath",
+                description="Python file to document; its source and outline are included",
+                required=False
             ),
             PromptArgument(
                 name="format",
@@ -139,9 +168,15 @@ class GenerateAPIDocsPrompt(BasePrompt):
             )
         ]
     
-    async def generate(self, code: str, format: str = "markdown") -> list[PromptMessage]:
+    async def generate(self, code: str = "", filepath: str = "", format: str = "markdown") -> list[PromptMessage]:
+        outline = ""
+        if filepath:
+            source, module_outline = load_module_context(self.validator, filepath)
+            code = code or source
+            outline = f"\n\nModule outline ({filepath}):\n{module_outline}"
+        
         prompt = f"""Generate {format} API documentation for:
-{code}
+{code}{outline}
 
 Include:
 1. Endpoint/function descriptions
@@ -12,6 +12,7 @@ from .config_resources import (
     ConfigResourceProvider,
     EnvironmentResource,
 )
+from .server_resources import CacheStatsResource
 
 
 class ResourceManager:
@@ -29,6 +30,7 @@ class ResourceManager:
         resources.append(ProjectFilesListResource(self.project_root))
         resources.append(DirectoryContentsResource(self.project_root))
         resources.append(EnvironmentResource(self.project_root))
+        resources.append(CacheStatsResource())
         
         resources.extend(self.config_provider.list_available())
         resources.extend(self.file_provider.list_all())
@@ -59,6 +61,10 @@ class ResourceManager:
             resource = ProjectFilesListResource(self.project_root)
             return await resource.read()
         
+        if uri == "server://cache-stats":
+            resource = CacheStatsResource()
+            return await resource.read()
+        
         if uri.startswith("project://dir"):
             directory = uri.replace("project://dir/", "").replace("project://dir", "")
             resource = DirectoryContentsResource(self.project_root, directory)
@@ -0,0 +1,28 @@
+import json
+from src.server.utils import ast_cache, format_cache, lint_cache, process_monitor, job_manager, shell_sessions, python_pool, pytest_pool, git_objects, commit_indexes, git_status_cache
+from .base import BaseResource
+
+
+class CacheStatsResource(BaseResource):
+    
+    name = "Cache Statistics"
+    description = "Cache hit/miss statistics, subprocess timings and background job usage for the server"
+    mime_type = "application/json"
+    
+    def get_uri(self) -> str:
+        return "server://cache-stats"
+    
+    async def read(self) -> str:
+        return json.dumps({
+            "ast_cache": ast_cache.stats(),
+            "format_cache": format_cache.stats(),
+            "lint_cache": lint_cache.stats(),
+            "processes": process_monitor.stats(),
+            "jobs": job_manager.stats(),
+            "shell_sessions": shell_sessions.stats(),
+            "python_pool": python_pool.stats(),
+            "pytest_pool": pytest_pool.stats(),
+            "git_objects": git_objects.stats(),
+            "commit_indexes": commit_indexes.stats(),
+            "git_status": git_status_cache.stats(),
+        }, indent=2)
@@ -7,6 +7,8 @@ from .file_tools import (
     DeleteFileTool,
     MoveFileTool,
     CopyFileTool,
+    ViewFileTool,
+    TailFileTool,
 )
 from .directory_tools import (
     CreateDirectoryTool,
@@ -22,18 +24,42 @@ from .search_tools import (
 from .command_tools import (
     RunCommandTool,
     RunPythonTool,
+    ShellSessionTool,
+    ReadOutputTool,
+)
+from .job_tools import (
+    StartJobTool,
+    JobStatusTool,
+    JobOutputTool,
+    CancelJobTool,
 )
 from .git_tools import (
     GitTool,
     GitStatusTool,
     GitDiffTool,
     GitLogTool,
+    BisectTool,
+    ReadFileAtRevTool,
+    ListTreeAtRevTool,
+)
+from .profiling_tools import (
+    ProfilePythonTool,
+    MemoryProfileTool,
+    ImportProfileTool,
+    BenchmarkTool,
+)
+from .test_tools import (
+    RunTestsTool,
+    AffectedTestsTool,
 )
 from .code_tools import (
     AnalyzeCodeTool,
     GetFunctionsTool,
+    ReadSymbolTool,
     FormatCodeTool,
     LintCodeTool,
+    LintProjectTool,
+    ProjectOutlineTool,
 )
 
 
@@ -56,6 +82,8 @@ def get_all_tools(project_root: Path, allow_external: bool = True) -> list[BaseT
         DeleteFileTool(project_root, allow_external),
         MoveFileTool(project_root, allow_external),
         CopyFileTool(project_root, allow_external),
+        ViewFileTool(project_root, allow_external),
+        TailFileTool(project_root, allow_external),
         CreateDirectoryTool(project_root, allow_external),
         ListDirectoryTool(project_root, allow_external),
         DeleteDirectoryTool(project_root, allow_external),
@@ -65,14 +93,32 @@ def get_all_tools(project_root: Path, allow_external: bool = True) -> list[BaseT
         FindReplaceAllTool(project_root, allow_external),
         RunCommandTool(project_root, allow_external),
         RunPythonTool(project_root, allow_external),
+        ShellSessionTool(project_root, allow_external),
+        ReadOutputTool(project_root, allow_external),
+        StartJobTool(project_root, allow_external),
+        JobStatusTool(project_root, allow_external),
+        JobOutputTool(project_root, allow_external),
+        CancelJobTool(project_root, allow_external),
         GitTool(project_root, allow_external),
         GitStatusTool(project_root, allow_external),
         GitDiffTool(project_root, allow_external),
         GitLogTool(project_root, allow_external),
+        BisectTool(project_root, allow_external),
+        ReadFileAtRevTool(project_root, allow_external),
+        ListTreeAtRevTool(project_root, allow_external),
+        ProfilePythonTool(project_root, allow_external),
+        MemoryProfileTool(project_root, allow_external),
+        ImportProfileTool(project_root, allow_external),
+        BenchmarkTool(project_root, allow_external),
+        RunTestsTool(project_root, allow_external),
+        AffectedTestsTool(project_root, allow_external),
         AnalyzeCodeTool(project_root, allow_external),
         GetFunctionsTool(project_root, allow_external),
+        ReadSymbolTool(project_root, allow_external),
         FormatCodeTool(project_root, allow_external),
         LintCodeTool(project_root, allow_external),
+        LintProjectTool(project_root, allow_external),
+        ProjectOutlineTool(project_root, allow_external),
         DockerTool(project_root, allow_external),
         DockerBuildTool(project_root, allow_external),
         DockerComposeTool(project_root, allow_external),
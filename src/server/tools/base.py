@@ -8,6 +8,8 @@ class BaseTool(ABC):
 
     name: str
     description: str
+    # Tools that never touch the working tree; any other tool call invalidates cached git status
+    read_only: bool = False
 
     @abstractmethod
     def get_input_schema(self) -> dict:
@@ -1,14 +1,30 @@
 import json
 from pathlib import Path
-from src.shared import ToolResult
-from src.server.utils import PathValidator, read_file
+from src.shared import PathSecurityError, ToolResult
+from src.server.utils import (
+    PathValidator,
+    ProjectOutliner,
+    read_file,
+    ast_cache,
+    format_files,
+    lint_files,
+    run_process,
+    changed_paths,
+    collect_project_files,
+    should_include_file,
+    SEVERITIES,
+)
 from .base import BaseTool
 
 
+LINT_TIMEOUT = 120
+
+
 class AnalyzeCodeTool(BaseTool):
     
     name: str = "analyze_code"
     description: str = "Analyze code file and provide statistics"
+    read_only: bool = True
     
     def __init__(self, project_root: Path, allow_external: bool = True):
         self.validator = PathValidator(project_root, allow_external=allow_external)
@@ -28,11 +44,24 @@ class AnalyzeCodeTool(BaseTool):
     async def execute(self, filepath: str) -> ToolResult:
         try:
             full_path = self.validator.validate(filepath)
-            content = read_file(full_path)
-            lines = content.splitlines()
             
-            total_lines = len(lines)
-            blank_lines = sum(1 for line in lines if not line.strip())
+            if full_path.suffix == ".py":
+                try:
+                    module = ast_cache.get(full_path)
+                except SyntaxError:
+                    module = None
+            else:
+                module = None
+            
+            if module:
+                content = module.source
+                total_lines = module.total_lines
+                blank_lines = module.blank_lines
+            else:
+                content = read_file(full_path)
+                lines = content.splitlines()
+                total_lines = len(lines)
+                blank_lines = sum(1 for line in lines if not line.strip())
             code_lines = total_lines - blank_lines
             
             analysis = {
@@ -44,6 +73,11 @@ class AnalyzeCodeTool(BaseTool):
                 "extension": full_path.suffix
             }
             
+            if module:
+                analysis["functions"] = len(module.functions)
+                analysis["classes"] = len(module.classes)
+                analysis["imports"] = module.imports
+            
             return self.success(json.dumps(analysis, indent=2))
         except Exception as e:
             return self.error(str(e))
@@ -52,7 +86,11 @@ class AnalyzeCodeTool(BaseTool):
 class GetFunctionsTool(BaseTool):
     
     name: str = "get_functions"
-    description: str = "Extract function and class definitions from a Python file"
+    description: str = (
+        "Extract a hierarchical outline of function (including async) and class definitions "
+        "from a Python file, with line spans, signatures, decorators and docstring summaries"
+    )
+    read_only: bool = True
     
     def __init__(self, project_root: Path, allow_external: bool = True):
         self.validator = PathValidator(project_root, allow_external=allow_external)
@@ -71,34 +109,41 @@ class GetFunctionsTool(BaseTool):
     
     async def execute(self, filepath: str) -> ToolResult:
         try:
-            import ast
-            
             full_path = self.validator.validate(filepath)
-            content = read_file(full_path)
-            
-            tree = ast.parse(content)
+            module = ast_cache.get(full_path)
             
+            # Redefinitions share a qualname; children belong to the latest one seen
+            nodes = {}
+            all_nodes = []
             functions = []
             classes = []
             
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    args = [arg.arg for arg in node.args.args]
-                    functions.append({
-                        "name": node.name,
-                        "line": node.lineno,
-                        "args": args
-                    })
-                elif isinstance(node, ast.ClassDef):
-                    methods = []
-                    for item in node.body:
-                        if isinstance(item, ast.FunctionDef):
-                            methods.append(item.name)
-                    classes.append({
-                        "name": node.name,
-                        "line": node.lineno,
-                        "methods": methods
-                    })
+            for definition in module.definitions:
+                node = {
+                    "name": definition.name,
+                    "kind": definition.kind,
+                    "line": definition.lineno,
+                    "end_line": definition.end_lineno,
+                    "signature": definition.signature,
+                }
+                if definition.decorators:
+                    node["decorators"] = definition.decorators
+                if definition.docstring:
+                    node["docstring"] = definition.docstring
+                node["children"] = []
+                nodes[definition.qualname] = node
+                all_nodes.append(node)
+                
+                if definition.parent:
+                    nodes[definition.parent]["children"].append(node)
+                elif definition.kind == "class":
+                    classes.append(node)
+                else:
+                    functions.append(node)
+            
+            for node in all_nodes:
+                if not node["children"]:
+                    del node["children"]
             
             result = {
                 "filepath": filepath,
@@ -113,12 +158,72 @@ class GetFunctionsTool(BaseTool):
             return self.error(str(e))
 
 
+class ReadSymbolTool(BaseTool):
+    
+    name: str = "read_symbol"
+    description: str = (
+        "Return the source of a single function, method or class from a Python file "
+        "(e.g. 'MyClass.method'), without reading the whole file"
+    )
+    read_only: bool = True
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.validator = PathValidator(project_root, allow_external=allow_external)
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the Python file"
+                },
+                "symbol": {
+                    "type": "string",
+                    "description": "Qualified name (e.g. 'MyClass.method') or bare name of the definition"
+                },
+                "line": {
+                    "type": "integer",
+                    "description": "A line inside the definition, to pick one of several with the same name (e.g. a property setter)"
+                }
+            },
+            "required": ["filepath", "symbol"]
+        }
+    
+    async def execute(self, filepath: str, symbol: str, line: int = None) -> ToolResult:
+        try:
+            full_path = self.validator.validate(filepath)
+            module = ast_cache.get(full_path)
+            
+            matches = module.find(symbol, line)
+            if not matches:
+                where = f" at line {line}" if line is not None else ""
+                return self.error(f"Symbol '{symbol}' not found{where} in {filepath}")
+            if len(matches) > 1:
+                candidates = "\n".join(f"  {d.qualname} (line {d.lineno})" for d in matches)
+                hint = "pass the line of the one you want" if len({d.qualname for d in matches}) == 1 else "use a qualified name or line"
+                return self.error(f"Symbol '{symbol}' is ambiguous in {filepath}; {hint}:\n{candidates}")
+            
+            definition = matches[0]
+            source = module.lines(definition.start_lineno, definition.end_lineno)
+            header = f"{filepath}:{definition.start_lineno}-{definition.end_lineno} ({definition.qualname})"
+            return self.success(f"{header}\n\n{source}")
+        except SyntaxError as e:
+            return self.error(f"Syntax error: {e}")
+        except Exception as e:
+            return self.error(str(e))
+
+
 class FormatCodeTool(BaseTool):
     
     name: str = "format_code"
-    description: str = "Format a Python file using black"
+    description: str = (
+        "Format Python files using black (in-process, cached by content hash). "
+        "Accepts a single file, a list of files or a glob pattern"
+    )
     
     def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
         self.validator = PathValidator(project_root, allow_external=allow_external)
     
     def get_input_schema(self) -> dict:
@@ -128,29 +233,70 @@ class FormatCodeTool(BaseTool):
                 "filepath": {
                     "type": "string",
                     "description": "Path to the file to format"
+                },
+                "filepaths": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Paths of several files to format in one call"
+                },
+                "pattern": {
+                    "type": "string",
+                    "description": "Glob pattern relative to the project root (e.g. 'src/**/*.py')"
+                },
+                "check": {
+                    "type": "boolean",
+                    "description": "Only report files that would be reformatted, don't write them"
                 }
-            },
-            "required": ["filepath"]
+            }
         }
     
-    async def execute(self, filepath: str) -> ToolResult:
+    def _resolve_targets(self, filepath: str, filepaths: list[str], pattern: str) -> list[Path]:
+        targets = []
+        for path in ([filepath] if filepath else []) + (filepaths or []):
+            targets.append(self.validator.validate(path))
+        if pattern:
+            for path in sorted(self.project_root.glob(pattern)):
+                if path.is_file() and path.suffix in (".py", ".pyi") and should_include_file(path.relative_to(self.project_root)):
+                    targets.append(self.validator.validate(path))
+        return list(dict.fromkeys(targets))
+    
+    async def execute(
+        self,
+        filepath: str = None,
+        filepaths: list[str] = None,
+        pattern: str = None,
+        check: bool = False
+    ) -> ToolResult:
         try:
-            import subprocess
+            targets = self._resolve_targets(filepath, filepaths, pattern)
+            if not targets:
+                return self.error("Provide filepath, filepaths or a pattern matching at least one Python file")
             
-            full_path = self.validator.validate(filepath)
+            results = await format_files(targets, self.project_root, check=check)
             
-            result = subprocess.run(
-                ["black", str(full_path)],
-                capture_output=True,
-                text=True
-            )
+            if len(results) == 1 and not (filepaths or pattern):
+                result = results[0]
+                if result.status == "failed":
+                    return self.error(result.error)
+                if result.status == "formatted":
+                    return self.success(f"{'Would reformat' if check else 'Formatted'}: {filepath}")
+                return self.success(f"Already formatted: {filepath}")
             
-            if result.returncode == 0:
-                return self.success(f"Formatted: {filepath}")
-            else:
-                return self.error(result.stderr)
-        except FileNotFoundError:
-            return self.error("black is not installed. Run: pip install black")
+            changed = [r for r in results if r.status == "formatted"]
+            failed = [r for r in results if r.status == "failed"]
+            unchanged = len(results) - len(changed) - len(failed)
+            
+            lines = [
+                f"{'Would reformat' if check else 'Formatted'}: {len(changed)}, "
+                f"unchanged: {unchanged}, failed: {len(failed)}"
+            ]
+            lines.extend(f"  {'would reformat' if check else 'formatted'} {self.validator.get_relative(Path(r.path))}" for r in changed)
+            lines.extend(f"  failed {self.validator.get_relative(Path(r.path))}: {r.error}" for r in failed)
+            
+            output = "\n".join(lines)
+            if failed and len(failed) == len(results):
+                return self.error(output)
+            return self.success(output)
         except Exception as e:
             return self.error(str(e))
 
@@ -159,6 +305,7 @@ class LintCodeTool(BaseTool):
     
     name: str = "lint_code"
     description: str = "Lint a Python file using ruff or flake8"
+    read_only: bool = True
     
     def __init__(self, project_root: Path, allow_external: bool = True):
         self.validator = PathValidator(project_root, allow_external=allow_external)
@@ -177,23 +324,13 @@ class LintCodeTool(BaseTool):
     
     async def execute(self, filepath: str) -> ToolResult:
         try:
-            import subprocess
-            
             full_path = self.validator.validate(filepath)
             
             try:
-                result = subprocess.run(
-                    ["ruff", "check", str(full_path)],
-                    capture_output=True,
-                    text=True
-                )
+                result = await run_process(["ruff", "check", str(full_path)], timeout=LINT_TIMEOUT)
                 linter = "ruff"
             except FileNotFoundError:
-                result = subprocess.run(
-                    ["flake8", str(full_path)],
-                    capture_output=True,
-                    text=True
-                )
+                result = await run_process(["flake8", str(full_path)], timeout=LINT_TIMEOUT)
                 linter = "flake8"
             
             output = result.stdout or result.stderr
@@ -205,4 +342,217 @@ class LintCodeTool(BaseTool):
         except FileNotFoundError:
             return self.error("No linter found. Install ruff or flake8")
         except Exception as e:
-            return self.error(str(e))
\ No newline at end of file
+            return self.error(str(e))
+
+
+class LintProjectTool(BaseTool):
+    
+    name: str = "lint_project"
+    description: str = (
+        "Lint many Python files with a single ruff run and return structured diagnostics. "
+        "Results are cached per file content and ruff config, so unchanged files are not re-linted"
+    )
+    read_only: bool = True
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+        self.validator = PathValidator(project_root, allow_external=allow_external)
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "filepaths": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Files to lint (default: all Python files in the project)"
+                },
+                "changed_only": {
+                    "type": "boolean",
+                    "description": "Only lint files that are modified or untracked according to git"
+                },
+                "rules": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Only report these rule codes or prefixes (e.g. ['F', 'E501'])"
+                },
+                "severity": {
+                    "type": "string",
+                    "enum": list(SEVERITIES),
+                    "description": "Minimum severity to report (default: info, i.e. everything)"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of diagnostics to return (default: 200)"
+                }
+            }
+        }
+    
+    async def _changed_files(self) -> list[Path]:
+        # changed_paths is relative to the project root even when it is a subdirectory of the repo
+        files = []
+        for path in await changed_paths(self.project_root):
+            try:
+                files.append(self.validator.validate(path))
+            except PathSecurityError:
+                continue
+        return files
+    
+    async def execute(
+        self,
+        filepaths: list[str] = None,
+        changed_only: bool = False,
+        rules: list[str] = None,
+        severity: str = "info",
+        max_results: int = 200
+    ) -> ToolResult:
+        try:
+            if severity not in SEVERITIES:
+                return self.error(f"Unknown severity: {severity}")
+            
+            if filepaths:
+                targets = [self.validator.validate(path) for path in filepaths]
+            elif changed_only:
+                targets = await self._changed_files()
+            else:
+                targets = collect_project_files(self.project_root)
+            targets = [path for path in dict.fromkeys(targets) if path.suffix in (".py", ".pyi") and path.is_file()]
+            
+            if not targets:
+                return self.success("No Python files to lint")
+            
+            results, linted = await lint_files(targets, self.project_root)
+            
+            max_level = SEVERITIES.index(severity)
+            prefixes = tuple(rules or [])
+            diagnostics = []
+            for path, found in results.items():
+                rel_path = self.validator.get_relative(Path(path))
+                for diagnostic in found:
+                    if SEVERITIES.index(diagnostic.severity) > max_level:
+                        continue
+                    if prefixes and not diagnostic.code.startswith(prefixes):
+                        continue
+                    diagnostics.append((rel_path, diagnostic))
+            
+            diagnostics.sort(key=lambda item: (item[0], item[1].row, item[1].column))
+            header = (
+                f"{len(diagnostics)} issue(s) in {len(targets)} file(s) "
+                f"({linted} linted, {len(targets) - linted} from cache)"
+            )
+            if not diagnostics:
+                return self.success(header)
+            
+            counts = {}
+            for _, diagnostic in diagnostics:
+                counts[diagnostic.code] = counts.get(diagnostic.code, 0) + 1
+            summary = ", ".join(f"{code}: {n}" for code, n in sorted(counts.items(), key=lambda item: -item[1]))
+            
+            lines = [
+                f"{path}:{d.row}:{d.column}: {d.code} [{d.severity}] {d.message}{' (fixable)' if d.fixable else ''}"
+                for path, d in diagnostics[:max_results]
+            ]
+            if len(diagnostics) > max_results:
+                lines.append(f"... {len(diagnostics) - max_results} more")
+            
+            data = [{"file": path, **vars(d)} for path, d in diagnostics[:max_results]]
+            return self.success(f"{header}\nBy rule: {summary}\n\n" + "\n".join(lines), data=data)
+        except FileNotFoundError:
+            return self.error("ruff is not installed. Run: pip install ruff")
+        except Exception as e:
+            return self.error(str(e))
+
+
+class ProjectOutlineTool(BaseTool):
+    
+    name: str = "project_outline"
+    description: str = (
+        "Compact outline of classes, functions and signatures for every Python file in the "
+        "project (or a directory), grouped by module. Only changed files are re-parsed"
+    )
+    read_only: bool = True
+    
+    CHARS_PER_TOKEN = 4
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+        self.validator = PathValidator(project_root, allow_external=allow_external)
+        self.outliner = ProjectOutliner(project_root)
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "directory": {
+                    "type": "string",
+                    "description": "Only outline files under this directory (optional, defaults to project root)"
+                },
+                "max_tokens": {
+                    "type": "integer",
+                    "description": "Approximate token budget for the outline (default: 4000)"
+                },
+                "include_private": {
+                    "type": "boolean",
+                    "description": "Include _private functions and classes (default: false)"
+                }
+            }
+        }
+    
+    async def execute(
+        self,
+        directory: str = None,
+        max_tokens: int = 4000,
+        include_private: bool = False
+    ) -> ToolResult:
+        try:
+            root = self.validator.validate(directory) if directory else self.project_root.resolve()
+            if not root.is_dir():
+                return self.error(f"Directory not found: {directory}")
+            
+            modules = await self.outliner.refresh(root)
+            if not modules:
+                return self.success("No Python files found")
+            
+            budget = max_tokens * self.CHARS_PER_TOKEN
+            sections = []
+            used = 0
+            for module in modules:
+                section = self._render(module, include_private)
+                if not section:
+                    continue
+                if used + len(section) > budget:
+                    break
+                sections.append(section)
+                used += len(section) + 1
+            
+            omitted = len(modules) - len(sections)
+            output = "\n".join(sections)
+            if omitted:
+                output += f"\n... {omitted} more module(s) omitted (token budget reached); narrow with 'directory'"
+            return self.success(output)
+        except Exception as e:
+            return self.error(str(e))
+    
+    def _render(self, module, include_private: bool) -> str:
+        rel_path = self.validator.get_relative(Path(module.path))
+        if module.error:
+            return f"{rel_path}  [{module.error}]"
+        
+        lines = []
+        hidden = set()
+        for definition in module.definitions:
+            if definition.parent in hidden or (not include_private and definition.name.startswith("_") and not definition.name.startswith("__")):
+                hidden.add(definition.qualname)
+                continue
+            if definition.kind == "class":
+                keyword = "class"
+            elif definition.kind == "async_function":
+                keyword = "async def"
+            else:
+                keyword = "def"
+            indent = "  " * (definition.qualname.count(".") + 1)
+            lines.append(f"{indent}{keyword} {definition.name}{definition.signature}  :{definition.lineno}")
+        
+        if not lines:
+            return ""
+        return rel_path + "\n" + "\n".join(lines)
@@ -1,7 +1,9 @@
-import subprocess
 import asyncio
+import os
+import re
 from pathlib import Path
-from src.shared import ToolResult
+from src.shared import ToolResult, MAX_LINE_LENGTH
+from src.server.utils import FileViewer, output_store, python_pool, run_process, shell_sessions
 from .base import BaseTool
 
 
@@ -42,37 +44,20 @@ class RunCommandTool(BaseTool):
             if not work_dir.exists():
                 return self.error(f"Working directory does not exist: {work_dir}")
             
-            process = await asyncio.create_subprocess_shell(
-                command,
-                cwd=str(work_dir),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                stdin=asyncio.subprocess.DEVNULL  # Prevent hanging on input
-            )
-            
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=timeout
-                )
-            except asyncio.TimeoutError:
-                process.kill()
-                await process.wait()  # Ensure cleanup
-                return self.error(f"Command timed out after {timeout}s")
+            result = await run_process(command, cwd=work_dir, timeout=timeout, spill=True)
+            
+            if result.timed_out:
+                return self.error(f"Command timed out after {timeout}s\n\n{result.output}".rstrip())
             
             output_parts = []
             
-            if stdout:
-                stdout_text = stdout.decode('utf-8', errors='replace')
-                if stdout_text.strip():
-                    output_parts.append(f"STDOUT:\n{stdout_text}")
+            if result.stdout.strip():
+                output_parts.append(f"STDOUT:\n{result.stdout}")
             
-            if stderr:
-                stderr_text = stderr.decode('utf-8', errors='replace')
-                if stderr_text.strip():
-                    output_parts.append(f"STDERR:\n{stderr_text}")
+            if result.stderr.strip():
+                output_parts.append(f"STDERR:\n{result.stderr}")
             
-            exit_code = process.returncode
+            exit_code = result.returncode
             status = "Success" if exit_code == 0 else f"Failed (exit code: {exit_code})"
             
             output = "\n\n".join(output_parts) if output_parts else "(no output)"
@@ -104,6 +89,10 @@ class RunPythonTool(BaseTool):
                 "timeout": {
                     "type": "integer",
                     "description": "Timeout in seconds"
+                },
+                "memory_limit_mb": {
+                    "type": "integer",
+                    "description": "Address-space limit for the run in MB (optional)"
                 }
             }
         }
@@ -112,45 +101,224 @@ class RunPythonTool(BaseTool):
         self,
         code: str = None,
         filepath: str = None,
-        timeout: int = 30
+        timeout: int = 30,
+        memory_limit_mb: int = None
     ) -> ToolResult:
         try:
-            if code:
-                cmd = ["python", "-c", code]
-            elif filepath:
-                cmd = ["python", filepath]
-            else:
+            if not code and not filepath:
                 return self.error("Provide either code or filepath")
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                cwd=self.project_root,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=timeout
+            if hasattr(os, "fork"):
+                # Forked from a warm interpreter: no startup or import cost per call
+                result = await python_pool.run(
+                    self.project_root,
+                    code=code or None,
+                    path=None if code else filepath,
+                    timeout=timeout,
+                    memory_limit=memory_limit_mb * 1024 * 1024 if memory_limit_mb else None,
                 )
-            except asyncio.TimeoutError:
-                process.kill()
+            else:
+                cmd = ["python", "-c", code] if code else ["python", filepath]
+                result = await run_process(cmd, cwd=self.project_root, timeout=timeout, spill=True)
+            
+            if result.timed_out:
                 return self.error(f"Execution timed out after {timeout}s")
             
             output_parts = []
             
-            if stdout:
-                output_parts.append(f"Output:\n{stdout.decode()}")
+            if result.stdout:
+                output_parts.append(f"Output:\n{result.stdout}")
             
-            if stderr:
-                output_parts.append(f"Errors:\n{stderr.decode()}")
+            if result.stderr:
+                output_parts.append(f"Errors:\n{result.stderr}")
             
             output = "\n\n".join(output_parts) if output_parts else "(no output)"
             
-            if process.returncode == 0:
+            if result.returncode == 0:
                 return self.success(output)
             else:
                 return self.error(output)
         except Exception as e:
-            return self.error(str(e))
\ No newline at end of file
+            return self.error(str(e))
+
+
+class ShellSessionTool(BaseTool):
+    
+    name: str = "shell_session"
+    description: str = (
+        "Run a command in a persistent bash session that keeps its working directory, exported "
+        "variables and activated virtualenv between calls"
+    )
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "command": {
+                    "type": "string",
+                    "description": "Command to run (omit to list open sessions)"
+                },
+                "session": {
+                    "type": "string",
+                    "description": "Session name (default: default)"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Interrupt the command after this many seconds (default: 60)"
+                },
+                "close": {
+                    "type": "boolean",
+                    "description": "Close the session instead of running a command"
+                }
+            }
+        }
+    
+    async def execute(
+        self,
+        command: str = None,
+        session: str = "default",
+        timeout: int = 60,
+        close: bool = False
+    ) -> ToolResult:
+        try:
+            if close:
+                if await shell_sessions.close(session):
+                    return self.success(f"Closed session '{session}'")
+                return self.error(f"No session named '{session}'")
+            
+            if not command:
+                sessions = shell_sessions.list()
+                if not sessions:
+                    return self.success("No open sessions")
+                return self.success("\n".join(
+                    f"{s['session']}: {'alive' if s['alive'] else 'exited'}, cwd={s['cwd']}, "
+                    f"{s['commands_run']} command(s), idle {s['idle_seconds']}s"
+                    for s in sessions
+                ))
+            
+            shell = await shell_sessions.get(session, self.project_root)
+            result = await shell.run(command, timeout=timeout)
+            
+            notes = []
+            if result.restarted:
+                notes.append(f"(session '{session}' had exited and was restarted; earlier state is lost)")
+            if result.timed_out:
+                if result.exit_code is None:
+                    notes.append(f"Timed out after {timeout}s and did not stop on interrupt; session '{session}' was killed")
+                else:
+                    notes.append(f"Timed out after {timeout}s; command interrupted")
+            
+            if result.exit_code is None:
+                status = f"Session '{session}' ended"
+            elif result.timed_out:
+                status = f"Interrupted (exit code: {result.exit_code})"
+            elif result.exit_code == 0:
+                status = "Success"
+            else:
+                status = f"Failed (exit code: {result.exit_code})"
+            if result.cwd:
+                status += f" [cwd: {result.cwd}]"
+            
+            output = result.output if result.output.strip() else "(no output)"
+            content = "\n".join(notes + [status]) + f"\n\n{output}"
+            
+            if result.exit_code == 0 and not result.timed_out:
+                return self.success(content)
+            return self.error(content)
+        except Exception as e:
+            return self.error(str(e))
+
+
+class ReadOutputTool(BaseTool):
+    
+    name: str = "read_output"
+    description: str = (
+        "Page through or grep the full output of a run_command/run_python call whose output "
+        "was too large and was truncated (identified by its output_id)"
+    )
+    read_only: bool = True
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "output_id": {
+                    "type": "string",
+                    "description": "The output_id reported in the truncated output (omit to list saved outputs)"
+                },
+                "stream": {
+                    "type": "string",
+                    "enum": ["stdout", "stderr", "collapsed"],
+                    "description": "Which stream to read; profile_python saves stacks as collapsed (default: stdout)"
+                },
+                "start_line": {
+                    "type": "integer",
+                    "description": "First line to return, 1-based (default: 1)"
+                },
+                "end_line": {
+                    "type": "integer",
+                    "description": "Last line to return, inclusive (default: start_line + 99)"
+                },
+                "pattern": {
+                    "type": "string",
+                    "description": "Only return lines matching this regex within the line range"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of matching lines when grepping (default: 100)"
+                }
+            }
+        }
+    
+    async def execute(
+        self,
+        output_id: str = None,
+        stream: str = "stdout",
+        start_line: int = 1,
+        end_line: int = None,
+        pattern: str = None,
+        max_results: int = 100
+    ) -> ToolResult:
+        try:
+            if not output_id:
+                saved = output_store.list()
+                if not saved:
+                    return self.success("No saved outputs")
+                return self.success("\n".join(
+                    f"{entry['output_id']}: {', '.join(entry['streams'])}" for entry in saved
+                ))
+            
+            path = output_store.get(output_id, stream)
+            start_line = max(1, start_line)
+            regex = re.compile(pattern) if pattern else None
+            
+            def view() -> tuple[str, list[tuple[int, str]]]:
+                with FileViewer(path, MAX_LINE_LENGTH, persist_index=False) as viewer:
+                    total = viewer.index.total_lines
+                    if regex:
+                        end = end_line or total
+                        lines = viewer.grep(regex, start_line, end, max_results)
+                        return f"{output_id} {stream}: {len(lines)} match(es) in lines {start_line}-{min(end, total)} of {total}", lines
+                    end = end_line or start_line + 99
+                    lines = viewer.lines(start_line, end)
+                    return f"{output_id} {stream}: lines {start_line}-{min(end, total)} of {total}", lines
+            
+            # The first view indexes the whole spilled file
+            header, lines = await asyncio.to_thread(view)
+            
+            if not lines:
+                return self.success(f"{header}\n\n(no lines)")
+            
+            width = len(str(lines[-1][0]))
+            body = "\n".join(f"{num:>{width}}| {text}" for num, text in lines)
+            return self.success(f"{header}\n\n{body}")
+        except re.error as e:
+            return self.error(f"Invalid regex pattern: {e}")
+        except Exception as e:
+            return self.error(str(e))
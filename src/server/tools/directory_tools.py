@@ -37,6 +37,7 @@ class ListDirectoryTool(BaseTool):
     
     name: str = "list_directory"
     description: str = "Lists files and directories at the specified path within the project."
+    read_only: bool = True
 
     def __init__(self, project_root: Path, allow_external: bool = True):
         self.path_validator = PathValidator(project_root, allow_external=allow_external)
@@ -134,6 +135,7 @@ class GetTreeTool(BaseTool):
 
     name: str = "get_directory_tree"
     description: str = "Gets the directory tree structure starting from the specified path within the project."
+    read_only: bool = True
 
     def __init__(self, project_root: Path, allow_external: bool = True):
         self.path_validator = PathValidator(project_root, allow_external=allow_external)
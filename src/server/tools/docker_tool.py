@@ -1,8 +1,11 @@
-import asyncio
 from pathlib import Path
 from .base import BaseTool
 from src.shared import ToolResult
-from src.server.utils import PathValidator
+from src.server.utils import PathValidator, run_process
+
+
+DOCKER_TIMEOUT = 600
+DOCKER_BUILD_TIMEOUT = 1800
 
 
 class DockerTool(BaseTool):
@@ -29,17 +32,12 @@ class DockerTool(BaseTool):
     
     async def execute(self, command: str) -> ToolResult:
         try: 
-            process = await asyncio.create_subprocess_shell(
-                f"docker {command}",
-                cwd=self.project_root,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-
-            stdout, stderr = await process.communicate()
-            output = stdout.decode().strip()
+            result = await run_process(f"docker {command}", cwd=self.project_root, timeout=DOCKER_TIMEOUT)
+            if result.timed_out:
+                return self.error(f"Docker command timed out after {DOCKER_TIMEOUT}s")
+            output = result.stdout.strip()
 
-            if process.returncode == 0:
+            if result.ok:
                 return self.success(output)
             else:
                 return self.error(output)
@@ -86,17 +84,12 @@ class DockerBuildTool(BaseTool):
         try: 
             cmd = f"docker build -t {tag} -f {dockerfile} {context}"
 
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                cwd=self.project_root,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            result = await run_process(cmd, cwd=self.project_root, timeout=DOCKER_BUILD_TIMEOUT)
+            if result.timed_out:
+                return self.error(f"Docker build timed out after {DOCKER_BUILD_TIMEOUT}s")
+            output = result.stdout + result.stderr
 
-            stdout, stderr = await process.communicate()
-            output = stdout.decode() + stderr.decode()
-
-            if process.returncode == 0:
+            if result.ok:
                 return self.success(f"Built image: {tag}\n{output}")
             else:
                 return self.error(output)
@@ -150,16 +143,11 @@ class DockerComposeTool(BaseTool):
             if service:
                 cmd += f" {service}"
 
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                cwd=self.project_root,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-
-            stdout, stderr = await process.communicate()
-            output = stdout.decode() + stderr.decode()
-            if process.returncode == 0:
+            result = await run_process(cmd, cwd=self.project_root, timeout=DOCKER_TIMEOUT)
+            if result.timed_out:
+                return self.error(f"docker-compose command timed out after {DOCKER_TIMEOUT}s")
+            output = result.stdout + result.stderr
+            if result.ok:
                 return self.success(output)
             else:
                 return self.error(output)
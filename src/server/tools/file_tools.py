@@ -1,6 +1,16 @@
+import asyncio
+import re
 from pathlib import Path
-from src.shared import ToolResult
-from src.server.utils import PathValidator, read_file, write_file
+from src.shared import ToolResult, MAX_LINE_LENGTH
+from src.server.utils import (
+    PathValidator,
+    FileViewer,
+    TailCursor,
+    read_file,
+    write_file,
+    tail_lines,
+    read_since,
+)
 from .base import BaseTool
 
 
@@ -8,6 +18,7 @@ class ReadFileTool(BaseTool):
 
     name: str = "read_file"
     description: str = "Reads the content of a text file at the specified path"
+    read_only: bool = True
 
     def __init__(self, project_root: Path, allow_external: bool = True):
         self.path_validator = PathValidator(project_root, allow_external=allow_external)
@@ -241,4 +252,184 @@ class CopyFileTool(BaseTool):
 
             return self.success(f"File copied from '{source_path}' to '{destination_path}' successfully.")
         except Exception as e:
-            return self.error(str(e))
\ No newline at end of file
+            return self.error(str(e))
+
+
+class ViewFileTool(BaseTool):
+
+    name: str = "view_file"
+    description: str = (
+        "View a window of a file of any size (e.g. multi-GB logs) without loading it: "
+        "a line range, the last N lines, or regex matches within a line range"
+    )
+    read_only: bool = True
+
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.validator = PathValidator(project_root, allow_external=allow_external)
+
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the file to view"
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": ["range", "tail", "grep"],
+                    "description": "range: lines start_line..end_line, tail: last 'count' lines, grep: lines matching 'pattern' within start_line..end_line (default: range)"
+                },
+                "start_line": {
+                    "type": "integer",
+                    "description": "First line to return, 1-based (default: 1)"
+                },
+                "end_line": {
+                    "type": "integer",
+                    "description": "Last line to return, inclusive (default: start_line + 99 for range, end of file for grep)"
+                },
+                "count": {
+                    "type": "integer",
+                    "description": "Number of lines for tail mode (default: 100)"
+                },
+                "pattern": {
+                    "type": "string",
+                    "description": "Regex pattern for grep mode"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of matching lines in grep mode (default: 100)"
+                }
+            },
+            "required": ["filepath"]
+        }
+
+    def _view(
+        self,
+        full_path: Path,
+        filepath: str,
+        mode: str,
+        start_line: int,
+        end_line: int | None,
+        count: int,
+        regex: re.Pattern | None,
+        max_results: int
+    ) -> tuple[str, list[tuple[int, str]]]:
+        with FileViewer(full_path, MAX_LINE_LENGTH) as viewer:
+            if mode == "tail":
+                lines = viewer.tail(max(1, count))
+                return f"{filepath}: last {len(lines)} line(s)", lines
+            total = viewer.index.total_lines
+            if mode == "grep":
+                end = end_line or total
+                lines = viewer.grep(regex, start_line, end, max_results)
+                return f"{filepath}: {len(lines)} match(es) in lines {start_line}-{min(end, total)} of {total}", lines
+            end = end_line or start_line + 99
+            lines = viewer.lines(start_line, end)
+            return f"{filepath}: lines {start_line}-{min(end, total)} of {total}", lines
+
+    async def execute(
+        self,
+        filepath: str,
+        mode: str = "range",
+        start_line: int = 1,
+        end_line: int = None,
+        count: int = 100,
+        pattern: str = None,
+        max_results: int = 100
+    ) -> ToolResult:
+        try:
+            full_path = self.validator.validate(filepath)
+            start_line = max(1, start_line)
+            if mode not in ("range", "tail", "grep"):
+                return self.error(f"Unknown mode: {mode}")
+            if mode == "grep" and not pattern:
+                return self.error("The 'pattern' parameter is required for grep mode.")
+            regex = re.compile(pattern) if mode == "grep" else None
+
+            # Indexing a large file the first time scans all of it, so keep it off the event loop
+            header, lines = await asyncio.to_thread(
+                self._view, full_path, filepath, mode, start_line, end_line, count, regex, max_results
+            )
+
+            if not lines:
+                return self.success(f"{header}\n\n(no lines)")
+
+            width = len(str(lines[-1][0]))
+            body = "\n".join(
+                f"{num:>{width}}| {text}" if num else text
+                for num, text in lines
+            )
+            return self.success(f"{header}\n\n{body}")
+        except re.error as e:
+            return self.error(f"Invalid regex pattern: {e}")
+        except Exception as e:
+            return self.error(str(e))
+
+
+class TailFileTool(BaseTool):
+
+    name: str = "tail_file"
+    description: str = (
+        "Return the last N lines of a growing file (e.g. a service log) and a cursor. "
+        "Pass the cursor back to get only the bytes appended since; log rotation is detected"
+    )
+    read_only: bool = True
+
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.validator = PathValidator(project_root, allow_external=allow_external)
+
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the file to tail"
+                },
+                "lines": {
+                    "type": "integer",
+                    "description": "Number of lines to return when no cursor is given (default: 50)"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "Cursor returned by a previous call; only newly appended content is returned"
+                },
+                "max_bytes": {
+                    "type": "integer",
+                    "description": "Maximum bytes of new content to return per call (default: 65536)"
+                }
+            },
+            "required": ["filepath"]
+        }
+
+    async def execute(
+        self,
+        filepath: str,
+        lines: int = 50,
+        cursor: str = None,
+        max_bytes: int = 65536
+    ) -> ToolResult:
+        try:
+            full_path = self.validator.validate(filepath)
+
+            if cursor:
+                chunk = read_since(full_path, TailCursor.parse(cursor), max_bytes)
+            else:
+                chunk = tail_lines(full_path, max(0, lines))
+
+            notes = []
+            if chunk.rotated:
+                notes.append("File was rotated (inode changed); reading the new file from the start.")
+            if chunk.truncated:
+                notes.append("File was truncated; reading from the start.")
+            if chunk.remaining:
+                notes.append(f"{chunk.remaining} more byte(s) available; call again with the new cursor.")
+
+            parts = [f"Cursor: {chunk.cursor}"]
+            parts.extend(notes)
+            parts.append(chunk.text if chunk.text else "(no new content)")
+
+            return self.success("\n".join(parts[:-1]) + "\n\n" + parts[-1], data={"cursor": str(chunk.cursor)})
+        except Exception as e:
+            return self.error(str(e))
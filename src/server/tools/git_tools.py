@@ -1,9 +1,30 @@
-import asyncio
+from datetime import datetime
 from pathlib import Path
-from src.shared import ToolResult
+from src.shared import GIT_BLOB_INLINE_BYTES, GIT_DIFF_FILE_MAX_BYTES, GIT_DIFF_INLINE_BYTES, ToolResult
+from src.server.utils import (
+    bisect,
+    commit_indexes,
+    FileDiff,
+    PathValidator,
+    configure_fast_status,
+    diff_file,
+    diff_range,
+    diff_stats,
+    diff_text,
+    git,
+    git_objects,
+    git_status_cache,
+    rename_source,
+    repo_prefix,
+    run_process,
+    tree_path,
+)
 from .base import BaseTool
 
 
+GIT_TIMEOUT = 120
+
+
 class GitTool(BaseTool):
     
     name: str = "git"
@@ -32,25 +53,19 @@ class GitTool(BaseTool):
         try:
             work_dir = Path(cwd) if cwd else self.project_root
             
-            process = await asyncio.create_subprocess_shell(
-                f"git {command}",
-                cwd=str(work_dir),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                stdin=asyncio.subprocess.DEVNULL  # Prevent hanging on input
-            )
-            
-            stdout, stderr = await process.communicate()
+            result = await run_process(f"git {command}", cwd=work_dir, timeout=GIT_TIMEOUT)
+            if result.timed_out:
+                return self.error(f"Git command timed out after {GIT_TIMEOUT}s")
             
             output_parts = []
-            if stdout:
-                output_parts.append(stdout.decode())
-            if stderr:
-                output_parts.append(stderr.decode())
+            if result.stdout:
+                output_parts.append(result.stdout)
+            if result.stderr:
+                output_parts.append(result.stderr)
             
             output = "\n".join(output_parts) if output_parts else "(no output)"
             
-            if process.returncode == 0:
+            if result.ok:
                 return self.success(output)
             else:
                 return self.error(output)
@@ -61,7 +76,11 @@ class GitTool(BaseTool):
 class GitStatusTool(BaseTool):
     
     name: str = "git_status"
-    description: str = "Get git status of the project"
+    description: str = (
+        "Get git status of the project: branch, staged, unstaged, untracked, conflicted and renamed files "
+        "(cached until the index, HEAD or the working tree changes)"
+    )
+    read_only: bool = True
     
     def __init__(self, project_root: Path, allow_external: bool = True):
         self.project_root = project_root
@@ -70,6 +89,23 @@ class GitStatusTool(BaseTool):
         return {
             "type": "object",
             "properties": {
+                "untracked": {
+                    "type": "string",
+                    "enum": ["normal", "all", "no"],
+                    "description": "Untracked files: 'normal' lists directories, 'all' every file, 'no' skips the scan (fastest) (default: normal)"
+                },
+                "ignored": {
+                    "type": "boolean",
+                    "description": "Also list ignored files (default: false)"
+                },
+                "refresh": {
+                    "type": "boolean",
+                    "description": "Bypass the cached status (default: false)"
+                },
+                "enable_fast_status": {
+                    "type": "boolean",
+                    "description": "Turn on core.untrackedCache and, where git supports it, the builtin fsmonitor daemon for this repository"
+                },
                 "cwd": {
                     "type": "string",
                     "description": "Working directory (optional, defaults to project root)"
@@ -77,28 +113,54 @@ class GitStatusTool(BaseTool):
             }
         }
     
-    async def execute(self, cwd: str = None) -> ToolResult:
+    async def execute(
+        self,
+        untracked: str = "normal",
+        ignored: bool = False,
+        refresh: bool = False,
+        enable_fast_status: bool = False,
+        cwd: str = None
+    ) -> ToolResult:
         try:
             work_dir = Path(cwd) if cwd else self.project_root
             
-            process = await asyncio.create_subprocess_exec(
-                "git", "status", "--porcelain",
-                cwd=str(work_dir),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                stdin=asyncio.subprocess.DEVNULL
-            )
+            notes = []
+            if enable_fast_status:
+                notes = await configure_fast_status(work_dir)
+                refresh = True
             
-            stdout, stderr = await process.communicate()
+            status, cached = await git_status_cache.get(work_dir, untracked, ignored, refresh)
             
-            if process.returncode != 0:
-                return self.error(stderr.decode() if stderr else "Git command failed")
+            branch = status.branch or f"detached at {(status.oid or '')[:12]}"
+            header = f"On branch {branch}" if status.branch else branch.capitalize()
+            if status.upstream:
+                header += f", tracking {status.upstream} (ahead {status.ahead}, behind {status.behind})"
+            parts = [header]
             
-            output = stdout.decode().strip()
-            if not output:
-                return self.success("Working directory clean")
+            sections = [
+                ("Conflicted", status.conflicted, lambda e: f"{e.index}{e.worktree} {e.path}"),
+                ("Staged", status.staged, lambda e: f"{e.index} {e.original_path} -> {e.path}" if e.kind == "renamed" else f"{e.index} {e.path}"),
+                ("Unstaged", status.unstaged, lambda e: f"{e.worktree} {e.path}"),
+                ("Untracked", status.untracked, lambda e: e.path),
+                ("Ignored", [e for e in status.entries if e.kind == "ignored"], lambda e: e.path),
+            ]
+            for title, entries, describe in sections:
+                if entries:
+                    parts.append(f"{title} ({len(entries)}):\n" + "\n".join(f"  {describe(e)}" for e in entries))
+            if status.clean:
+                parts.append("Working directory clean")
+            parts.extend(notes)
             
-            return self.success(output)
+            data = {
+                "branch": status.branch,
+                "oid": status.oid,
+                "upstream": status.upstream,
+                "ahead": status.ahead,
+                "behind": status.behind,
+                "entries": [vars(e) for e in status.entries],
+                "cached": cached,
+            }
+            return self.success("\n\n".join(parts), data=data)
         except Exception as e:
             return self.error(str(e))
 
@@ -106,7 +168,11 @@ class GitStatusTool(BaseTool):
 class GitDiffTool(BaseTool):
     
     name: str = "git_diff"
-    description: str = "Show git diff"
+    description: str = (
+        "Show git diff. Large diffs return a per-file summary (lines added/removed) first; "
+        "pass filepath to page through that file's hunks"
+    )
+    read_only: bool = True
     
     def __init__(self, project_root: Path, allow_external: bool = True):
         self.project_root = project_root
@@ -117,12 +183,36 @@ class GitDiffTool(BaseTool):
             "properties": {
                 "filepath": {
                     "type": "string",
-                    "description": "Specific file to diff (optional)"
+                    "description": "Specific file to diff (optional); its hunks are paginated"
                 },
                 "staged": {
                     "type": "boolean",
                     "description": "Show staged changes"
                 },
+                "base": {
+                    "type": "string",
+                    "description": "Revision to diff against (default: the index, or HEAD when staged)"
+                },
+                "target": {
+                    "type": "string",
+                    "description": "Second revision, to diff base..target instead of the working tree"
+                },
+                "summary": {
+                    "type": "boolean",
+                    "description": "Only return the per-file summary (default: automatic for large diffs)"
+                },
+                "context": {
+                    "type": "integer",
+                    "description": "Lines of context around each change (default: 3)"
+                },
+                "hunk_offset": {
+                    "type": "integer",
+                    "description": "First hunk to return when diffing one file, 0-based (default: 0)"
+                },
+                "max_hunks": {
+                    "type": "integer",
+                    "description": "Maximum hunks to return when diffing one file (default: 20)"
+                },
                 "cwd": {
                     "type": "string",
                     "description": "Working directory (optional, defaults to project root)"
@@ -130,45 +220,102 @@ class GitDiffTool(BaseTool):
             }
         }
     
-    async def execute(self, filepath: str = None, staged: bool = False, cwd: str = None) -> ToolResult:
+    async def execute(
+        self,
+        filepath: str = None,
+        staged: bool = False,
+        base: str = None,
+        target: str = None,
+        summary: bool = False,
+        context: int = 3,
+        hunk_offset: int = 0,
+        max_hunks: int = 20,
+        cwd: str = None
+    ) -> ToolResult:
         try:
             work_dir = Path(cwd) if cwd else self.project_root
+            range_args = diff_range(base, target, staged)
             
-            cmd = ["git", "diff"]
+            if filepath and not summary:
+                return await self._file_hunks(work_dir, range_args, filepath, context, hunk_offset, max_hunks)
             
-            if staged:
-                cmd.append("--staged")
+            if not summary:
+                output = await diff_text(work_dir, range_args, [filepath] if filepath else None, context, GIT_DIFF_INLINE_BYTES)
+                if output is not None:
+                    return self.success(output.strip() or "No changes")
             
-            if filepath:
-                cmd.append("--")
-                cmd.append(filepath)
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                cwd=str(work_dir),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                stdin=asyncio.subprocess.DEVNULL
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                return self.error(stderr.decode() if stderr else "Git diff failed")
-            
-            output = stdout.decode().strip()
-            if not output:
+            stats = await diff_stats(work_dir, range_args, [filepath] if filepath else None)
+            if not stats:
                 return self.success("No changes")
             
-            return self.success(output)
+            added = sum(stat.added or 0 for stat in stats)
+            deleted = sum(stat.deleted or 0 for stat in stats)
+            width = max(len(str(stat.added)) + len(str(stat.deleted)) for stat in stats) + 4
+            lines = [f"{len(stats)} file(s) changed, {added} insertion(s)(+), {deleted} deletion(s)(-)"]
+            for stat in stats:
+                counts = "binary" if stat.binary else f"+{stat.added} -{stat.deleted}"
+                name = f"{stat.original_path} -> {stat.path}" if stat.original_path else stat.path
+                lines.append(f"  {counts:<{width}} {name}")
+            if not summary:
+                lines.append("\nThe full diff is too large to return at once; pass filepath to page through one file's hunks.")
+            
+            return self.success("\n".join(lines), data={"files": [vars(stat) for stat in stats]})
         except Exception as e:
             return self.error(str(e))
+    
+    async def _file_hunks(
+        self,
+        work_dir: Path,
+        range_args: list[str],
+        filepath: str,
+        context: int,
+        hunk_offset: int,
+        max_hunks: int
+    ) -> ToolResult:
+        # git names files from the top level; filepath is relative to work_dir
+        original = await rename_source(work_dir, range_args, tree_path(await repo_prefix(work_dir), filepath))
+        # Back to a pathspec relative to work_dir
+        original = f":(top){original}" if original else None
+        diff = await diff_file(work_dir, range_args, filepath, context, original, GIT_DIFF_FILE_MAX_BYTES)
+        if diff is None:
+            return self.success(f"No changes in {filepath}")
+        
+        start = max(0, hunk_offset)
+        hunks = diff.hunks[start:start + max(1, max_hunks)]
+        parts = ["\n".join(diff.header)]
+        if diff.hunks:
+            total = f"{len(diff.hunks)}+" if diff.truncated else len(diff.hunks)
+            parts.append(f"Hunks {start + 1}-{start + len(hunks)} of {total}")
+        parts.extend("\n".join(hunk) for hunk in hunks)
+        if start + len(hunks) < len(diff.hunks):
+            parts.append(f"(more hunks: hunk_offset={start + len(hunks)})")
+        elif diff.truncated:
+            parts.append(
+                f"(diff truncated after {len(diff.hunks)} hunks at {GIT_DIFF_FILE_MAX_BYTES} bytes; "
+                "use context=0 or a narrower base/target to see the rest)"
+            )
+        
+        data = {
+            "path": diff.path,
+            "total_hunks": len(diff.hunks),
+            "truncated": diff.truncated,
+            "hunks": [
+                {"index": start + i, "header": hunk[0], "added": a, "deleted": d}
+                for i, hunk in enumerate(hunks)
+                for a, d in [FileDiff.hunk_counts(hunk)]
+            ],
+        }
+        return self.success("\n\n".join(parts), data=data)
 
 
 class GitLogTool(BaseTool):
     
     name: str = "git_log"
-    description: str = "Show git commit history"
+    description: str = (
+        "Show git commit history from an incrementally updated commit index, filtered by path, author, "
+        "date range or message text, with cursor-based paging"
+    )
+    read_only: bool = True
     
     def __init__(self, project_root: Path, allow_external: bool = True):
         self.project_root = project_root
@@ -185,6 +332,30 @@ class GitLogTool(BaseTool):
                     "type": "boolean",
                     "description": "One line per commit"
                 },
+                "path": {
+                    "type": "string",
+                    "description": "Only commits that changed this file or directory (relative to the working directory)"
+                },
+                "author": {
+                    "type": "string",
+                    "description": "Only commits whose author name or email contains this text"
+                },
+                "since": {
+                    "type": "string",
+                    "description": "Only commits made on or after this date (ISO 8601 or Unix timestamp)"
+                },
+                "until": {
+                    "type": "string",
+                    "description": "Only commits made on or before this date (ISO 8601 or Unix timestamp)"
+                },
+                "grep": {
+                    "type": "string",
+                    "description": "Only commits whose message contains this text (case-insensitive)"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "Continue after this commit (the next_cursor of a previous call)"
+                },
                 "cwd": {
                     "type": "string",
                     "description": "Working directory (optional, defaults to project root)"
@@ -192,28 +363,250 @@ class GitLogTool(BaseTool):
             }
         }
     
-    async def execute(self, count: int = 10, oneline: bool = True, cwd: str = None) -> ToolResult:
+    async def execute(
+        self,
+        count: int = 10,
+        oneline: bool = True,
+        path: str = None,
+        author: str = None,
+        since: str = None,
+        until: str = None,
+        grep: str = None,
+        cursor: str = None,
+        cwd: str = None
+    ) -> ToolResult:
         try:
             work_dir = Path(cwd) if cwd else self.project_root
             
-            cmd = ["git", "log", f"-{count}"]
+            index = commit_indexes.get(work_dir)
+            await index.refresh()
+            commits, next_cursor = index.query(path, author, since, until, grep, limit=max(1, count), cursor=cursor)
             
-            if oneline:
-                cmd.append("--oneline")
+            entries = []
+            for commit in commits:
+                date = datetime.fromtimestamp(commit.commit_time).strftime("%Y-%m-%d %H:%M")
+                if oneline:
+                    entries.append(f"{commit.hash[:7]} {date} {commit.author}: {commit.subject}")
+                    continue
+                entry = f"commit {commit.hash}\nAuthor: {commit.author} <{commit.email}>\nDate:   {date}\n\n    {commit.subject}"
+                if commit.body:
+                    entry += "\n\n" + "\n".join(f"    {line}" for line in commit.body.splitlines())
+                if commit.files:
+                    entry += "\n\n" + "\n".join(commit.files)
+                entries.append(entry)
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                cwd=str(work_dir),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                stdin=asyncio.subprocess.DEVNULL
+            output = ("\n" if oneline else "\n\n").join(entries) or "No matching commits"
+            if next_cursor:
+                output += f"\n\n(more commits: cursor={next_cursor})"
+            
+            data = {"commits": [vars(commit) for commit in commits], "next_cursor": next_cursor}
+            return self.success(output, data=data)
+        except Exception as e:
+            return self.error(str(e))
+
+
+class BisectTool(BaseTool):
+    
+    name: str = "bisect"
+    description: str = (
+        "Find the first commit where a command fails or gets slower than a threshold, testing several "
+        "commits per round in parallel worktrees (exit code 125 skips a commit, as with git bisect run)"
+    )
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "good": {
+                    "type": "string",
+                    "description": "A revision where the command passes (or is fast)"
+                },
+                "bad": {
+                    "type": "string",
+                    "description": "A later revision where it fails (or is slow) (default: HEAD)"
+                },
+                "command": {
+                    "type": "string",
+                    "description": "Shell command run in each worktree's root, e.g. a test or benchmark"
+                },
+                "workers": {
+                    "type": "integer",
+                    "description": "Commits tested concurrently per round, each in its own worktree (default: 3)"
+                },
+                "max_seconds": {
+                    "type": "number",
+                    "description": "Bisect a slowdown: a commit is bad when the command takes longer than this"
+                },
+                "slowdown": {
+                    "type": "number",
+                    "description": "Bisect a slowdown relative to the good revision, e.g. 0.2 for 20% slower"
+                },
+                "repeats": {
+                    "type": "integer",
+                    "description": "Timed runs per commit when bisecting a slowdown; the fastest counts (default: 3)"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Timeout per command run in seconds (default: 600)"
+                }
+            },
+            "required": ["good", "command"]
+        }
+    
+    async def execute(
+        self,
+        good: str,
+        command: str,
+        bad: str = "HEAD",
+        workers: int = 3,
+        max_seconds: float = None,
+        slowdown: float = None,
+        repeats: int = 3,
+        timeout: int = 600
+    ) -> ToolResult:
+        try:
+            result = await bisect(
+                self.project_root, good, bad, command,
+                workers=max(1, workers),
+                timeout=timeout,
+                max_seconds=max_seconds,
+                slowdown=slowdown,
+                repeats=max(1, repeats),
             )
             
-            stdout, stderr = await process.communicate()
+            lines = [f"{result.candidates} candidate commit(s), {result.rounds} round(s) with {max(1, workers)} worker(s)"]
+            if result.threshold is not None:
+                lines.append(f"Threshold: {result.threshold:.3f}s")
+            for step in result.steps:
+                timing = f" {step.seconds:.3f}s" if step.seconds is not None else ""
+                code = f" (exit {step.returncode})" if step.returncode not in (0, None) else ""
+                lines.append(f"  round {step.round}: {step.commit[:12]} {step.outcome}{timing}{code}")
+            
+            if result.first_bad:
+                summary = await git(self.project_root, "log", "-1", "--format=%H %an <%ae> %ad%n%n    %s", result.first_bad)
+                lines.insert(0, f"First bad commit: {summary.strip()}\n")
+            else:
+                lines.insert(0, "Could not narrow down past skipped commits; the first bad commit is one of:\n"
+                             + "\n".join(f"  {commit}" for commit in result.remaining) + "\n")
             
-            if process.returncode != 0:
-                return self.error(stderr.decode() if stderr else "Git log failed")
+            data = {
+                "first_bad": result.first_bad,
+                "remaining": result.remaining,
+                "threshold": result.threshold,
+                "steps": [vars(step) for step in result.steps],
+            }
+            return self.success("\n".join(lines), data=data)
+        except Exception as e:
+            return self.error(str(e))
+
+
+class ReadFileAtRevTool(BaseTool):
+    
+    name: str = "read_file_at_rev"
+    description: str = "Read a file as it is at a git revision (branch, tag, commit or stash), without checking it out"
+    read_only: bool = True
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+        self.validator = PathValidator(project_root, allow_external)
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "path": {
+                    "type": "string",
+                    "description": "File path relative to the project root"
+                },
+                "rev": {
+                    "type": "string",
+                    "description": "Revision to read from (default: HEAD)"
+                },
+                "start_line": {
+                    "type": "integer",
+                    "description": "First line to return, 1-based (default: 1)"
+                },
+                "end_line": {
+                    "type": "integer",
+                    "description": "Last line to return, inclusive (default: end of file)"
+                }
+            },
+            "required": ["path"]
+        }
+    
+    async def execute(self, path: str, rev: str = "HEAD", start_line: int = None, end_line: int = None) -> ToolResult:
+        try:
+            # Old revisions hold the same secrets read_file refuses to show
+            self.validator.validate(path)
+            obj, content = await git_objects.read_blob(self.project_root, rev, path)
+            data = {"oid": obj.oid, "size": obj.size}
+            if b"\0" in content[:8000]:
+                return self.success(f"Binary file '{path}' at {rev} ({obj.size} bytes, blob {obj.oid})", data=data)
             
-            return self.success(stdout.decode())
+            lines = content.decode("utf-8", errors="replace").splitlines(keepends=True)
+            first = max(1, start_line or 1)
+            selected = lines[first - 1:end_line]
+            text = "".join(selected)
+            if len(text.encode("utf-8")) > GIT_BLOB_INLINE_BYTES:
+                kept = 0
+                size = 0
+                for line in selected:
+                    size += len(line.encode("utf-8"))
+                    if size > GIT_BLOB_INLINE_BYTES:
+                        break
+                    kept += 1
+                if kept:
+                    text = "".join(selected[:kept])
+                else:
+                    # A single line over the limit (minified or generated code) is cut mid-line
+                    text = selected[0].encode("utf-8")[:GIT_BLOB_INLINE_BYTES].decode("utf-8", errors="ignore")
+                    kept = 1
+                data["truncated"] = True
+                text += (
+                    f"\n... truncated at line {first + kept - 1} of {len(lines)} "
+                    f"({GIT_BLOB_INLINE_BYTES} byte limit); use start_line/end_line to read the rest"
+                )
+            return self.success(text, data=data)
+        except Exception as e:
+            return self.error(str(e))
+
+
+class ListTreeAtRevTool(BaseTool):
+    
+    name: str = "list_tree_at_rev"
+    description: str = "List the files and directories at a git revision, like ls-tree, without checking it out"
+    read_only: bool = True
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "path": {
+                    "type": "string",
+                    "description": "Directory relative to the project root (default: the project root)"
+                },
+                "rev": {
+                    "type": "string",
+                    "description": "Revision to list (default: HEAD)"
+                },
+                "recursive": {
+                    "type": "boolean",
+                    "description": "List subdirectories recursively (default: false)"
+                }
+            }
+        }
+    
+    async def execute(self, path: str = "", rev: str = "HEAD", recursive: bool = False) -> ToolResult:
+        try:
+            entries = await git_objects.list_tree(self.project_root, rev, path, recursive)
+            prefix = f"{path.strip('/')}/" if path.strip("/") else ""
+            lines = [f"{entry.mode} {entry.type} {entry.oid}\t{prefix}{name}" for name, entry in entries]
+            return self.success("\n".join(lines) or "(empty tree)", data={"entries": len(entries)})
         except Exception as e:
             return self.error(str(e))
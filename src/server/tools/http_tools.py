@@ -1,12 +1,14 @@
-import asyncio
 import json
 from pathlib import Path
 from .base import BaseTool
 from src.shared import ToolResult
-from src.server.utils import PathValidator
+from src.server.utils import PathValidator, run_process
 import aiohttp
 
 
+CURL_TIMEOUT = 120
+
+
 class HttpRequestTool(BaseTool):
 
     name: str = "http_request_tool"
@@ -142,17 +144,12 @@ class CurlTool(BaseTool):
             curl_command: str
     ) -> ToolResult:
         try:
-            process = await asyncio.create_subprocess_shell(
-                curl_command,
-                cwd=self.project_root,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-
-            stdout, stderr = await process.communicate()
-            output = stdout.decode() + stderr.decode()
+            result = await run_process(curl_command, cwd=self.project_root, timeout=CURL_TIMEOUT)
+            if result.timed_out:
+                return self.error(f"curl command timed out after {CURL_TIMEOUT}s")
+            output = result.stdout + result.stderr
 
-            if process.returncode == 0:
+            if result.ok:
                 return self.success(output)
             else:
                 return self.error(output)
@@ -0,0 +1,178 @@
+import json
+from pathlib import Path
+from src.shared import ToolResult
+from src.server.utils import job_manager
+from .base import BaseTool
+
+
+class StartJobTool(BaseTool):
+    
+    name: str = "start_job"
+    description: str = (
+        "Start a long-running shell command (build, test suite, docker build) in the background "
+        "and return immediately with a job id"
+    )
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "command": {
+                    "type": "string",
+                    "description": "Command to run"
+                },
+                "cwd": {
+                    "type": "string",
+                    "description": "Working directory (optional, defaults to project root)"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Kill the job after this many seconds (default: no limit)"
+                }
+            },
+            "required": ["command"]
+        }
+    
+    async def execute(self, command: str, cwd: str = None, timeout: int = None) -> ToolResult:
+        try:
+            work_dir = Path(cwd) if cwd else self.project_root
+            
+            if not work_dir.exists():
+                return self.error(f"Working directory does not exist: {work_dir}")
+            
+            job = job_manager.start(command, work_dir, timeout=timeout)
+            
+            return self.success(
+                f"Started {job.id}: {command}\n"
+                f"Use job_status to check on it and job_output to read its output",
+                data={"job_id": job.id}
+            )
+        except Exception as e:
+            return self.error(str(e))
+
+
+class JobStatusTool(BaseTool):
+    
+    name: str = "job_status"
+    description: str = "Get the status, exit code and CPU/wall time of a background job, or list all jobs"
+    read_only: bool = True
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "job_id": {
+                    "type": "string",
+                    "description": "Job to inspect (omit to list all jobs)"
+                }
+            }
+        }
+    
+    async def execute(self, job_id: str = None) -> ToolResult:
+        try:
+            if job_id:
+                summary = job_manager.get(job_id).summary()
+                return self.success(json.dumps(summary, indent=2), data=summary)
+            
+            jobs = job_manager.list()
+            if not jobs:
+                return self.success("No jobs")
+            
+            lines = []
+            for job in jobs:
+                summary = job.summary()
+                wall_time = f"{summary['wall_time']:.1f}s" if summary["wall_time"] is not None else "-"
+                exit_code = f" exit {job.returncode}" if job.returncode is not None else ""
+                lines.append(f"{job.id} [{job.status}{exit_code}, {wall_time}] {job.command[:100]}")
+            
+            return self.success("\n".join(lines))
+        except Exception as e:
+            return self.error(str(e))
+
+
+class JobOutputTool(BaseTool):
+    
+    name: str = "job_output"
+    description: str = (
+        "Read a background job's combined stdout/stderr incrementally; pass the returned "
+        "next_offset back in to get only the new output"
+    )
+    read_only: bool = True
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "job_id": {
+                    "type": "string",
+                    "description": "Job to read"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Byte offset to read from (default: 0)"
+                },
+                "max_bytes": {
+                    "type": "integer",
+                    "description": "Maximum bytes to return (default: 65536)"
+                }
+            },
+            "required": ["job_id"]
+        }
+    
+    async def execute(self, job_id: str, offset: int = 0, max_bytes: int = 65536) -> ToolResult:
+        try:
+            job = job_manager.get(job_id)
+            text, next_offset, size = job_manager.read_output(job_id, offset, max_bytes)
+            
+            remaining = size - next_offset
+            header = f"{job.id} [{job.status}] bytes {offset}-{next_offset} of {size}, next_offset={next_offset}"
+            if remaining:
+                header += f" ({remaining} more bytes available)"
+            
+            return self.success(
+                f"{header}\n\n{text or '(no new output)'}",
+                data={"next_offset": next_offset, "status": job.status, "remaining": remaining}
+            )
+        except Exception as e:
+            return self.error(str(e))
+
+
+class CancelJobTool(BaseTool):
+    
+    name: str = "cancel_job"
+    description: str = "Cancel a queued or running background job and its child processes"
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "job_id": {
+                    "type": "string",
+                    "description": "Job to cancel"
+                }
+            },
+            "required": ["job_id"]
+        }
+    
+    async def execute(self, job_id: str) -> ToolResult:
+        try:
+            job = job_manager.get(job_id)
+            if job.finished:
+                return self.success(f"{job.id} already finished ({job.status})")
+            
+            job_manager.cancel(job_id)
+            return self.success(f"Cancelling {job.id}")
+        except Exception as e:
+            return self.error(str(e))
@@ -0,0 +1,682 @@
+import json
+import math
+import os
+import re
+import shutil
+from contextlib import AsyncExitStack
+from pathlib import Path
+from src.shared import ToolResult
+from src.server.utils import (
+    BUILTIN_SNAPSHOTS,
+    IMPORTTIME_MARKER,
+    SNAPSHOT_LABEL_INVALID,
+    BenchmarkResult,
+    ImportNode,
+    allocation_diff_rows,
+    allocation_rows,
+    collapse_pstats,
+    collapse_samples,
+    compare_results,
+    format_bytes,
+    format_duration,
+    git_worktree,
+    read_baseline,
+    load_pstats,
+    load_snapshot,
+    output_store,
+    parse_importtime,
+    pstats_rows,
+    python_pool,
+    run_process,
+    run_pytest_benchmark,
+    run_snippet_benchmark,
+    sample_rows,
+    snapshot_label,
+    write_baseline,
+)
+from .base import BaseTool
+
+
+def format_table(rows: list[dict], columns: list[tuple[str, str, str]]) -> str:
+    header = "  ".join(f"{title:>{width}}" if width else title for _, title, width in columns)
+    lines = [header]
+    for row in rows:
+        cells = []
+        for key, _, width in columns:
+            value = row[key]
+            if isinstance(value, float):
+                value = f"{value:.4f}" if key != "percent" else f"{value:.1f}%"
+            cells.append(f"{value:>{width}}" if width else str(value))
+        lines.append("  ".join(cells))
+    return "\n".join(lines)
+
+
+class ProfilePythonTool(BaseTool):
+    
+    name: str = "profile_python"
+    description: str = (
+        "Run a Python script or snippet under cProfile (or a low-overhead sampling profiler) and "
+        "report the top functions by cumulative and own time, plus collapsed stacks for flamegraphs"
+    )
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "code": {
+                    "type": "string",
+                    "description": "Python code to profile"
+                },
+                "filepath": {
+                    "type": "string",
+                    "description": "Python file to profile (alternative to code)"
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": ["cprofile", "sampling"],
+                    "description": "cprofile (exact, higher overhead) or sampling (CPU-time timer, for long runs). Default: cprofile"
+                },
+                "top_n": {
+                    "type": "integer",
+                    "description": "Number of functions per table (default: 20)"
+                },
+                "interval_ms": {
+                    "type": "number",
+                    "description": "Sampling interval in CPU milliseconds (default: 5)"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Stop profiling after this many seconds and report what was collected (default: 60)"
+                }
+            }
+        }
+    
+    async def execute(
+        self,
+        code: str = None,
+        filepath: str = None,
+        mode: str = "cprofile",
+        top_n: int = 20,
+        interval_ms: float = 5,
+        timeout: int = 60
+    ) -> ToolResult:
+        try:
+            if not code and not filepath:
+                return self.error("Provide either code or filepath")
+            if not hasattr(os, "fork"):
+                return self.error("profile_python needs a platform with fork()")
+            
+            profile_id = output_store.new_id()
+            raw_path = output_store.directory / f"{profile_id}.profile"
+            profile = {"mode": mode, "output": str(raw_path), "interval": interval_ms / 1000}
+            
+            result = await python_pool.run(
+                self.project_root,
+                code=code or None,
+                path=None if code else filepath,
+                timeout=timeout,
+                profile=profile,
+            )
+            
+            if not raw_path.exists():
+                return self.error(f"No profile was collected (exit code: {result.returncode})\n\n{result.output}".rstrip())
+            
+            root = self.project_root.resolve()
+            try:
+                if mode == "sampling":
+                    samples = json.loads(raw_path.read_text(encoding="utf-8"))
+                    rows, count = sample_rows(samples, top_n, root)
+                    collapsed = collapse_samples(samples, root)
+                    tables = [
+                        f"{count} samples every {interval_ms}ms of CPU time",
+                        format_table(rows, [
+                            ("samples", "samples", 8), ("own", "own", 8), ("percent", "total%", 7),
+                            ("function", "function", ""),
+                        ]),
+                    ]
+                else:
+                    stats = load_pstats(raw_path)
+                    collapsed = collapse_pstats(stats, root)
+                    columns = [
+                        ("ncalls", "ncalls", 10), ("tottime", "tottime", 9), ("cumtime", "cumtime", 9),
+                        ("function", "function", ""),
+                    ]
+                    tables = [
+                        f"Top {top_n} by cumulative time:",
+                        format_table(pstats_rows(stats, "cumtime", top_n, root), columns),
+                        f"Top {top_n} by own time:",
+                        format_table(pstats_rows(stats, "tottime", top_n, root), columns),
+                    ]
+            finally:
+                raw_path.unlink(missing_ok=True)
+            
+            status = "completed" if result.returncode == 0 else f"exited with code {result.returncode}"
+            if result.timed_out:
+                status = f"stopped after {timeout}s timeout"
+            parts = [f"Profile ({mode}) {status} in {result.wall_time:.3f}s wall, "
+                     f"{(result.cpu_user or 0) + (result.cpu_system or 0):.3f}s CPU"]
+            parts.extend(tables)
+            
+            if collapsed:
+                collapsed_path = output_store.path_for(profile_id, "collapsed")
+                collapsed_path.write_text("\n".join(collapsed) + "\n", encoding="utf-8")
+                output_store.register(profile_id, "collapsed", collapsed_path)
+                parts.append(
+                    f"Collapsed stacks ({len(collapsed)} unique) saved as output_id='{profile_id}' "
+                    f"stream='collapsed'; read them with read_output or feed {collapsed_path} to flamegraph.pl"
+                )
+            
+            if result.output.strip():
+                parts.append(f"Program output:\n{result.output}")
+            
+            return self.success("\n\n".join(parts), data={"output_id": profile_id if collapsed else None})
+        except Exception as e:
+            return self.error(str(e))
+
+
+class MemoryProfileTool(BaseTool):
+    
+    name: str = "memory_profile"
+    description: str = (
+        "Run a Python script or snippet with tracemalloc and report the top allocation sites "
+        "(file:line) at start, peak and end, peak RSS, and optionally a diff between two snapshots. "
+        "Code can take extra labeled snapshots by calling memory_snapshot('label'); start, peak and end are reserved"
+    )
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "code": {
+                    "type": "string",
+                    "description": "Python code to run"
+                },
+                "filepath": {
+                    "type": "string",
+                    "description": "Python file to run (alternative to code)"
+                },
+                "top_n": {
+                    "type": "integer",
+                    "description": "Number of allocation sites per snapshot (default: 15)"
+                },
+                "compare": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Two snapshot labels to diff, e.g. [\"start\", \"end\"] or labels passed to memory_snapshot()"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Timeout in seconds (default: 60)"
+                },
+                "memory_limit_mb": {
+                    "type": "integer",
+                    "description": "Address-space limit for the run in MB (optional)"
+                }
+            }
+        }
+    
+    async def execute(
+        self,
+        code: str = None,
+        filepath: str = None,
+        top_n: int = 15,
+        compare: list[str] = None,
+        timeout: int = 60,
+        memory_limit_mb: int = None
+    ) -> ToolResult:
+        try:
+            if not code and not filepath:
+                return self.error("Provide either code or filepath")
+            if compare and len(compare) != 2:
+                return self.error("compare takes exactly two snapshot labels")
+            if not hasattr(os, "fork"):
+                return self.error("memory_profile needs a platform with fork()")
+            
+            snapshot_dir = output_store.directory / f"{output_store.new_id()}.memory"
+            snapshot_dir.mkdir()
+            try:
+                result = await python_pool.run(
+                    self.project_root,
+                    code=code or None,
+                    path=None if code else filepath,
+                    timeout=timeout,
+                    memory_limit=memory_limit_mb * 1024 * 1024 if memory_limit_mb else None,
+                    profile={
+                        "mode": "memory",
+                        "output": str(snapshot_dir),
+                        "interval": 0.01,
+                        "label_invalid": SNAPSHOT_LABEL_INVALID,
+                        "reserved_labels": BUILTIN_SNAPSHOTS,
+                    },
+                )
+                
+                summary_path = snapshot_dir / "summary.json"
+                if not summary_path.exists():
+                    return self.error(f"No memory profile was collected (exit code: {result.returncode})\n\n{result.output}".rstrip())
+                summary = json.loads(summary_path.read_text(encoding="utf-8"))
+                
+                root = self.project_root.resolve()
+                columns = [("size", "size", 11), ("count", "count", 8), ("location", "location", "")]
+                
+                status = "completed" if result.returncode == 0 else f"exited with code {result.returncode}"
+                if result.timed_out:
+                    status = f"stopped after {timeout}s timeout"
+                rss_peak = summary["rss_peak_kb"]
+                parts = [
+                    f"Memory profile {status} in {result.wall_time:.3f}s\n"
+                    f"Traced (Python allocations): peak {format_bytes(summary['traced_peak'])}, "
+                    f"at end {format_bytes(summary['traced_end'])}\n"
+                    f"RSS: peak {format_bytes(rss_peak * 1024) if rss_peak else 'unknown'}"
+                    f" (includes the pre-warmed interpreter), "
+                    f"at start {format_bytes((summary['rss_start_kb'] or 0) * 1024)}, "
+                    f"at end {format_bytes((summary['rss_end_kb'] or 0) * 1024)}\n"
+                    f"Snapshots: {', '.join(summary['labels'])}"
+                ]
+                
+                for label in ("peak", "end"):
+                    path = snapshot_dir / f"{label}.snapshot"
+                    if not path.exists():
+                        continue
+                    rows = allocation_rows(load_snapshot(path), top_n, root)
+                    for row in rows:
+                        row["size"] = format_bytes(row["size"])
+                    title = f"Top {top_n} allocation sites at {label}"
+                    if label == "peak":
+                        title += f" (taken at {format_bytes(summary['peak_snapshot_size'])} traced)"
+                    parts.append(f"{title}:\n{format_table(rows, columns)}")
+                
+                if compare:
+                    # Saved under the same sanitized name memory_snapshot() used
+                    before, after = (snapshot_dir / f"{snapshot_label(label)}.snapshot" for label in compare)
+                    missing = [label for label, path in zip(compare, (before, after)) if not path.exists()]
+                    if missing:
+                        parts.append(f"Cannot diff: no snapshot labeled {', '.join(missing)}")
+                    else:
+                        rows = allocation_diff_rows(load_snapshot(before), load_snapshot(after), top_n, root)
+                        for row in rows:
+                            row["size_diff"] = format_bytes(row["size_diff"], signed=True)
+                            row["count_diff"] = f"{row['count_diff']:+d}"
+                            row["size"] = format_bytes(row["size"])
+                        parts.append(f"Top {top_n} changes from {compare[0]} to {compare[1]}:\n" + format_table(rows, [
+                            ("size_diff", "size diff", 12), ("count_diff", "count diff", 10),
+                            ("size", "size", 11), ("location", "location", ""),
+                        ]))
+            finally:
+                shutil.rmtree(snapshot_dir, ignore_errors=True)
+            
+            if result.output.strip():
+                parts.append(f"Program output:\n{result.output}")
+            
+            return self.success("\n\n".join(parts), data=summary)
+        except Exception as e:
+            return self.error(str(e))
+
+
+class ImportProfileTool(BaseTool):
+    
+    name: str = "import_profile"
+    description: str = (
+        "Measure cold import time of a module with python -X importtime: slowest import chains with "
+        "self and cumulative microseconds, optionally compared between two git revisions"
+    )
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "module": {
+                    "type": "string",
+                    "description": "Module to import, e.g. mypackage.cli"
+                },
+                "base": {
+                    "type": "string",
+                    "description": "Git revision to compare against (optional)"
+                },
+                "head": {
+                    "type": "string",
+                    "description": "Git revision to compare with base (default: the working tree)"
+                },
+                "pythonpath": {
+                    "type": "string",
+                    "description": "Directory relative to the project root to put on PYTHONPATH, e.g. src"
+                },
+                "runs": {
+                    "type": "integer",
+                    "description": "Measured runs per tree after one warm-up; the fastest is reported (default: 3)"
+                },
+                "top_n": {
+                    "type": "integer",
+                    "description": "Number of rows per table (default: 15)"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Timeout per run in seconds (default: 120)"
+                }
+            },
+            "required": ["module"]
+        }
+    
+    async def _measure(self, root: Path, module: str, pythonpath: str, runs: int, timeout: int) -> tuple[list[ImportNode], list[ImportNode]]:
+        code = f"import sys; print({IMPORTTIME_MARKER!r}, file=sys.stderr, flush=True); import {module}"
+        env = None
+        if pythonpath:
+            env = dict(os.environ)
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(root / pythonpath), env.get("PYTHONPATH")]))
+        
+        best = None
+        # The warm-up run writes bytecode caches so later runs measure imports, not compilation
+        for _ in range(runs + 1):
+            result = await run_process(
+                ["python", "-X", "importtime", "-c", code], cwd=root, env=env, timeout=timeout, max_output=None
+            )
+            if result.timed_out:
+                raise TimeoutError(f"Importing {module} timed out after {timeout}s")
+            if not result.ok:
+                errors = [
+                    line for line in result.stderr.splitlines()
+                    if not line.startswith("import time:") and line != IMPORTTIME_MARKER
+                ]
+                raise RuntimeError(f"Importing {module} failed in {root}:\n" + "\n".join(errors[-20:]))
+            startup, target = parse_importtime(result.stderr)
+            total = sum(node.cumulative_us for node in target)
+            if best is None or total < best[0]:
+                best = (total, startup, target)
+        return best[1], best[2]
+    
+    async def execute(
+        self,
+        module: str,
+        base: str = None,
+        head: str = None,
+        pythonpath: str = None,
+        runs: int = 3,
+        top_n: int = 15,
+        timeout: int = 120
+    ) -> ToolResult:
+        try:
+            if not re.fullmatch(r"[A-Za-z_][\w.]*", module):
+                return self.error(f"Invalid module name: {module}")
+            runs = max(1, runs)
+            
+            if base is None:
+                startup, target = await self._measure(self.project_root, module, pythonpath, runs, timeout)
+                return self.success(self._report(module, startup, target, top_n))
+            
+            async with git_worktree(self.project_root, base) as base_root:
+                _, base_tree = await self._measure(base_root, module, pythonpath, runs, timeout)
+            if head:
+                async with git_worktree(self.project_root, head) as head_root:
+                    _, head_tree = await self._measure(head_root, module, pythonpath, runs, timeout)
+            else:
+                _, head_tree = await self._measure(self.project_root, module, pythonpath, runs, timeout)
+            
+            return self.success(self._compare(module, base, head or "working tree", base_tree, head_tree, top_n))
+        except Exception as e:
+            return self.error(str(e))
+    
+    def _report(self, module: str, startup: list[ImportNode], target: list[ImportNode], top_n: int) -> str:
+        nodes = [node for root in target for node in root.walk()]
+        total = sum(node.cumulative_us for node in target)
+        startup_total = sum(node.cumulative_us for node in startup)
+        columns = [("self_us", "self us", 9), ("cumulative_us", "cumul us", 9), ("chain", "import chain", "")]
+        
+        def rows(key):
+            return [
+                {"self_us": n.self_us, "cumulative_us": n.cumulative_us, "chain": " > ".join(n.chain)}
+                for n in sorted(nodes, key=key, reverse=True)[:top_n]
+            ]
+        
+        return "\n\n".join([
+            f"import {module}: {total / 1000:.1f} ms across {len(nodes)} modules "
+            f"(interpreter startup: {startup_total / 1000:.1f} ms, not included)",
+            f"Slowest by cumulative time:\n{format_table(rows(lambda n: n.cumulative_us), columns)}",
+            f"Slowest by self time:\n{format_table(rows(lambda n: n.self_us), columns)}",
+        ])
+    
+    def _compare(
+        self,
+        module: str,
+        base: str,
+        head: str,
+        base_tree: list[ImportNode],
+        head_tree: list[ImportNode],
+        top_n: int
+    ) -> str:
+        before = {node.name: node for root in base_tree for node in root.walk()}
+        after = {node.name: node for root in head_tree for node in root.walk()}
+        base_total = sum(node.cumulative_us for node in base_tree)
+        head_total = sum(node.cumulative_us for node in head_tree)
+        
+        changes = []
+        for name in before.keys() | after.keys():
+            old, new = before.get(name), after.get(name)
+            changes.append({
+                "name": name,
+                "status": "added" if old is None else "removed" if new is None else "",
+                "self_diff": (new.self_us if new else 0) - (old.self_us if old else 0),
+                "cumulative_diff": (new.cumulative_us if new else 0) - (old.cumulative_us if old else 0),
+                "chain": " > ".join((new or old).chain),
+            })
+        changes.sort(key=lambda c: abs(c["self_diff"]), reverse=True)
+        for change in changes:
+            change["self_diff"] = f"{change['self_diff']:+d}"
+            change["cumulative_diff"] = f"{change['cumulative_diff']:+d}"
+        
+        added = sorted(after.keys() - before.keys())
+        removed = sorted(before.keys() - after.keys())
+        delta = head_total - base_total
+        percent = f" ({100.0 * delta / base_total:+.1f}%)" if base_total else ""
+        parts = [
+            f"import {module}: {base} {base_total / 1000:.1f} ms ({len(before)} modules) -> "
+            f"{head} {head_total / 1000:.1f} ms ({len(after)} modules), {delta / 1000:+.1f} ms{percent}",
+            f"Largest self-time changes:\n" + format_table(changes[:top_n], [
+                ("self_diff", "self us", 9), ("cumulative_diff", "cumul us", 9),
+                ("status", "", 7), ("chain", "import chain", ""),
+            ]),
+        ]
+        for title, names in (("Newly imported", added), ("No longer imported", removed)):
+            if names:
+                more = f", ... {len(names) - 50} more" if len(names) > 50 else ""
+                parts.append(f"{title} ({len(names)}): " + ", ".join(names[:50]) + more)
+        return "\n\n".join(parts)
+
+
+class BenchmarkTool(BaseTool):
+    
+    name: str = "benchmark"
+    description: str = (
+        "Benchmark a Python statement (calibrated loops, warmup, repeated samples) or a "
+        "pytest-benchmark selection; report median and 95% confidence interval, compare two git "
+        "revisions or a saved baseline with a Mann-Whitney significance test, and save baselines"
+    )
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "statement": {
+                    "type": "string",
+                    "description": "Python statement to time"
+                },
+                "setup": {
+                    "type": "string",
+                    "description": "Setup code run once before timing, e.g. imports"
+                },
+                "pytest": {
+                    "type": "string",
+                    "description": "pytest-benchmark selection to run instead of a statement, e.g. tests/bench -k parse"
+                },
+                "repeats": {
+                    "type": "integer",
+                    "description": "Number of timed samples (default: 20)"
+                },
+                "warmup": {
+                    "type": "integer",
+                    "description": "Untimed warmup samples (default: 2)"
+                },
+                "min_time": {
+                    "type": "number",
+                    "description": "Minimum seconds per sample used to calibrate the loop count (default: 0.05)"
+                },
+                "base": {
+                    "type": "string",
+                    "description": "Git revision to compare against, run in a temporary worktree"
+                },
+                "head": {
+                    "type": "string",
+                    "description": "Git revision to compare with base (default: the working tree)"
+                },
+                "rounds": {
+                    "type": "integer",
+                    "description": "When comparing revisions, alternate base/head runs this many times so drift hits both equally (default: 3)"
+                },
+                "baseline": {
+                    "type": "string",
+                    "description": "Name of a saved baseline to compare against"
+                },
+                "save_baseline": {
+                    "type": "string",
+                    "description": "Save these results as a baseline under this name"
+                },
+                "pythonpath": {
+                    "type": "string",
+                    "description": "Directory relative to the tree root to put on PYTHONPATH, e.g. src"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Timeout per tree in seconds (default: 600)"
+                }
+            }
+        }
+    
+    async def execute(
+        self,
+        statement: str = None,
+        setup: str = None,
+        pytest: str = None,
+        repeats: int = 20,
+        warmup: int = 2,
+        min_time: float = 0.05,
+        base: str = None,
+        head: str = None,
+        rounds: int = 3,
+        baseline: str = None,
+        save_baseline: str = None,
+        pythonpath: str = None,
+        timeout: int = 600
+    ) -> ToolResult:
+        try:
+            if not statement and not pytest:
+                return self.error("Provide either statement or pytest")
+            if base and baseline:
+                return self.error("Compare against either a git revision (base) or a saved baseline, not both")
+            repeats = max(2, repeats)
+            
+            async def measure(root: Path, samples: int) -> list[BenchmarkResult]:
+                if pytest:
+                    return await run_pytest_benchmark(root, pytest, timeout, pythonpath)
+                return await run_snippet_benchmark(
+                    root, statement, setup, samples, max(0, warmup), min_time, timeout, pythonpath
+                )
+            
+            def merge(into: dict[str, BenchmarkResult], results: list[BenchmarkResult]) -> None:
+                for result in results:
+                    if result.name in into:
+                        into[result.name].samples.extend(result.samples)
+                    else:
+                        into[result.name] = result
+            
+            before = None
+            before_label = None
+            if baseline:
+                before, metadata = read_baseline(self.project_root, baseline)
+                before_label = f"baseline '{baseline}' ({metadata.get('revision')})"
+            
+            async with AsyncExitStack() as stack:
+                head_root = self.project_root
+                if head:
+                    head_root = await stack.enter_async_context(git_worktree(self.project_root, head))
+                
+                collected: dict[str, BenchmarkResult] = {}
+                if base:
+                    base_root = await stack.enter_async_context(git_worktree(self.project_root, base))
+                    rounds = max(1, min(rounds, repeats))
+                    per_round = math.ceil(repeats / rounds)
+                    previous: dict[str, BenchmarkResult] = {}
+                    for _ in range(rounds):
+                        merge(previous, await measure(base_root, per_round))
+                        merge(collected, await measure(head_root, per_round))
+                    before = list(previous.values())
+                    before_label = base
+                else:
+                    merge(collected, await measure(head_root, repeats))
+                after = list(collected.values())
+            after_label = head or "working tree"
+            
+            if not after:
+                return self.error("No benchmarks were collected")
+            
+            parts = [self._summary(after_label, after)]
+            comparisons = []
+            if before is not None:
+                parts.insert(0, self._summary(before_label, before))
+                previous = {result.name: result for result in before}
+                comparisons = [
+                    compare_results(previous[result.name], result) for result in after if result.name in previous
+                ]
+                parts.append(self._comparison(before_label, after_label, comparisons))
+            
+            if save_baseline:
+                path = write_baseline(self.project_root, save_baseline, after, {
+                    "statement": statement, "setup": setup, "pytest": pytest, "revision": after_label,
+                })
+                parts.append(f"Saved baseline '{save_baseline}' to {path}")
+            
+            data = {
+                "results": [
+                    {"name": r.name, "median": r.median, "ci": r.confidence_interval()[:2], "loops": r.loops}
+                    for r in after
+                ],
+                "comparisons": comparisons,
+            }
+            return self.success("\n\n".join(parts), data=data)
+        except Exception as e:
+            return self.error(str(e))
+    
+    def _summary(self, label: str, results: list[BenchmarkResult]) -> str:
+        lines = [f"{label}:"]
+        for result in results:
+            low, high, coverage = result.confidence_interval()
+            lines.append(
+                f"  {result.name}: median {format_duration(result.median)} per loop "
+                f"({coverage:.0%} CI {format_duration(low)} .. {format_duration(high)}; "
+                f"{len(result.samples)} samples x {result.loops} loops)"
+            )
+        return "\n".join(lines)
+    
+    def _comparison(self, before_label: str, after_label: str, comparisons: list[dict]) -> str:
+        if not comparisons:
+            return "No benchmarks in common to compare"
+        lines = [f"{after_label} vs {before_label}:"]
+        for c in comparisons:
+            if not c["significant"]:
+                verdict = "no significant change"
+            else:
+                verdict = "slower" if c["change"] > 0 else "faster"
+            lines.append(
+                f"  {c['name']}: {format_duration(c['before'])} -> {format_duration(c['after'])} "
+                f"({c['change']:+.1%}, p={c['p_value']:.3g}) {verdict}"
+            )
+        return "\n".join(lines)
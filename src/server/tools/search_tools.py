@@ -1,14 +1,29 @@
 import re
 from pathlib import Path
-from src.shared import ToolResult, SearchMatch
-from src.server.utils import PathValidator, collect_project_files, read_file, matches_pattern
+from src.shared import MAX_FILE_SIZE, ToolResult, SearchMatch
+from src.server.utils import (
+    PathValidator,
+    collect_project_files,
+    read_file,
+    matches_pattern,
+    should_include_file,
+    git_grep,
+    glob_pathspec,
+    is_git_repo,
+    project_pathspecs,
+    untracked_files,
+)
 from .base import BaseTool
 
 
 class SearchInFilesTool(BaseTool):
     
     name: str = "search_in_files"
-    description: str = "Search for text or pattern across project files"
+    description: str = (
+        "Search for text or pattern across project files. In a git repository tracked files are searched "
+        "with git grep (which can also search past revisions) and untracked files in Python"
+    )
+    read_only: bool = True
     
     def __init__(self, project_root: Path, allow_external: bool = True):
         self.project_root = project_root
@@ -33,6 +48,20 @@ class SearchInFilesTool(BaseTool):
                 "max_results": {
                     "type": "integer",
                     "description": "Maximum number of results"
+                },
+                "backend": {
+                    "type": "string",
+                    "enum": ["auto", "git", "python"],
+                    "description": "auto: git grep for tracked files plus Python for untracked ones when in a git repository, otherwise Python (default: auto)"
+                },
+                "rev": {
+                    "type": "string",
+                    "description": "Search the tree of this git revision instead of the working tree (uses git grep)"
+                },
+                "paths": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Git pathspecs to search instead of the usual project files, e.g. ['src', ':!*_test.py'] (git backend)"
                 }
             },
             "required": ["pattern"]
@@ -43,46 +72,85 @@ class SearchInFilesTool(BaseTool):
         pattern: str,
         file_pattern: str = "*",
         case_sensitive: bool = False,
-        max_results: int = 100
+        max_results: int = 100,
+        backend: str = "auto",
+        rev: str = None,
+        paths: list[str] = None
     ) -> ToolResult:
         try:
             flags = 0 if case_sensitive else re.IGNORECASE
             regex = re.compile(pattern, flags)
             
-            files = collect_project_files(self.project_root)
-            results = []
+            use_git = backend == "git" or rev is not None or paths is not None
+            if backend == "auto" and not use_git:
+                use_git = await is_git_repo(self.project_root)
             
-            for filepath in files:
-                if not matches_pattern(filepath, file_pattern):
-                    continue
-                
-                try:
-                    content = read_file(filepath)
-                except Exception:
-                    continue
-                
-                lines = content.splitlines()
-                for line_num, line in enumerate(lines, 1):
-                    match = regex.search(line)
-                    if match:
-                        rel_path = self.validator.get_relative(filepath)
-                        results.append(f"{rel_path}:{line_num}: {line.strip()}")
-                        
-                        if len(results) >= max_results:
-                            break
-                
-                if len(results) >= max_results:
-                    break
+            if use_git:
+                if paths is None:
+                    # The same files the Python backend searches
+                    pathspecs = project_pathspecs(file_pattern)
+                    include = lambda path: self._included(self.project_root / path, check_size=rev is None)
+                else:
+                    pathspecs = glob_pathspec(file_pattern) + paths
+                    include = None
+                matches = await git_grep(
+                    self.project_root, pattern, case_sensitive, pathspecs, rev, max_results, include
+                )
+                results = [f"{m.file_path}:{m.line_number}: {m.line_content.strip()}" for m in matches]
+                if rev is None and len(results) < max_results:
+                    # git grep only sees tracked files
+                    untracked = [
+                        f for f in await untracked_files(self.project_root, pathspecs)
+                        if matches_pattern(f, file_pattern) and (include is None or self._included(f))
+                    ]
+                    results += self._scan(untracked, regex, max_results - len(results))
+            else:
+                files = [f for f in collect_project_files(self.project_root) if matches_pattern(f, file_pattern)]
+                results = self._scan(files, regex, max_results)
             
             if not results:
                 return self.success("No matches found")
             
-            header = f"Found {len(results)} matches:\n\n"
+            header = f"Found {len(results)} matches{f' at {rev}' if rev else ''}:\n\n"
             return self.success(header + "\n".join(results))
         except re.error as e:
             return self.error(f"Invalid regex pattern: {e}")
         except Exception as e:
             return self.error(str(e))
+    
+    def _included(self, filepath: Path, check_size: bool = True) -> bool:
+        # Mirrors collect_project_files
+        if not should_include_file(filepath):
+            return False
+        if not check_size:
+            return True
+        try:
+            return filepath.stat().st_size <= MAX_FILE_SIZE
+        except OSError:
+            return False
+    
+    def _scan(self, files: list[Path], regex: re.Pattern, max_results: int) -> list[str]:
+        results = []
+        
+        for filepath in files:
+            try:
+                if filepath.stat().st_size > MAX_FILE_SIZE:
+                    continue
+                content = read_file(filepath)
+            except Exception:
+                continue
+            
+            lines = content.splitlines()
+            for line_num, line in enumerate(lines, 1):
+                match = regex.search(line)
+                if match:
+                    rel_path = self.validator.get_relative(filepath)
+                    results.append(f"{rel_path}:{line_num}: {line.strip()}")
+                    
+                    if len(results) >= max_results:
+                        return results
+        
+        return results
         
 class FindReplaceTool(BaseTool):
     
@@ -0,0 +1,288 @@
+from collections import Counter
+from pathlib import Path
+from src.shared import PathSecurityError, ToolResult, ToolResultStatus
+from src.server.utils import (
+    ImportGraph,
+    PathValidator,
+    changed_paths,
+    paths_from_diff,
+    repo_prefix,
+    run_pytest,
+    run_sharded_pytest,
+    save_durations,
+    trim_traceback,
+)
+from .base import BaseTool
+
+
+OUTCOME_ORDER = ("failed", "error", "passed", "skipped", "xfailed", "xpassed")
+
+
+def summarize(report: dict) -> str:
+    counts = Counter(test["outcome"] for test in report["tests"])
+    parts = [f"{counts[outcome]} {outcome}" for outcome in OUTCOME_ORDER if counts[outcome]]
+    if report["collect_errors"]:
+        parts.append(f"{len(report['collect_errors'])} collection error(s)")
+    collection = report.get("collect_duration")
+    timing = f"in {report['duration']:.2f}s"
+    if collection is not None:
+        timing += f" (collection {collection:.2f}s)"
+    return f"{', '.join(parts) or 'no tests ran'} {timing}"
+
+
+def format_failures(report: dict, max_failures: int) -> list[str]:
+    sections = []
+    for error in report["collect_errors"][:max_failures]:
+        sections.append(f"ERROR collecting {error['nodeid']}\n{trim_traceback(error['longrepr'])}")
+    failures = [test for test in report["tests"] if test["outcome"] in ("failed", "error")]
+    for test in failures[:max_failures]:
+        label = "FAILED" if test["outcome"] == "failed" else test["outcome"].upper()
+        if test["outcome"] == "error":
+            label += f" in {test.get('when')}"
+        body = trim_traceback(test.get("longrepr") or "")
+        if test.get("stdout"):
+            body += f"\n--- captured stdout ---\n{trim_traceback(test['stdout'], 10)}"
+        sections.append(f"{label} {test['nodeid']}\n{body}".rstrip())
+    hidden = len(failures) - max_failures
+    if hidden > 0:
+        sections.append(f"... {hidden} more failure(s) not shown")
+    return sections
+
+
+class RunTestsTool(BaseTool):
+    
+    name: str = "run_tests"
+    description: str = (
+        "Run pytest on a warm worker (test modules stay imported between runs; only changed ones "
+        "are re-imported) and return counts, durations and failures with trimmed tracebacks"
+    )
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "paths": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Test files, directories or node ids (default: pytest's configured testpaths)"
+                },
+                "keyword": {
+                    "type": "string",
+                    "description": "Only run tests matching this -k expression"
+                },
+                "markers": {
+                    "type": "string",
+                    "description": "Only run tests matching this -m marker expression"
+                },
+                "last_failed": {
+                    "type": "boolean",
+                    "description": "Only rerun the tests that failed last time (--lf)"
+                },
+                "failed_first": {
+                    "type": "boolean",
+                    "description": "Run last time's failures first, then the rest (--ff, default: true)"
+                },
+                "maxfail": {
+                    "type": "integer",
+                    "description": "Stop after this many failures (with workers > 1, counted per worker)"
+                },
+                "max_failures": {
+                    "type": "integer",
+                    "description": "Maximum number of failures to show in detail (default: 10)"
+                },
+                "workers": {
+                    "type": "integer",
+                    "description": "Split the tests across this many parallel workers, balanced by recorded durations (default: 1)"
+                },
+                "extra_args": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Additional pytest arguments"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Timeout in seconds (default: 600)"
+                }
+            }
+        }
+    
+    async def execute(
+        self,
+        paths: list[str] = None,
+        keyword: str = None,
+        markers: str = None,
+        last_failed: bool = False,
+        failed_first: bool = True,
+        maxfail: int = None,
+        max_failures: int = 10,
+        workers: int = 1,
+        extra_args: list[str] = None,
+        timeout: int = 600
+    ) -> ToolResult:
+        try:
+            selection = list(paths or [])
+            if keyword:
+                selection += ["-k", keyword]
+            if markers:
+                selection += ["-m", markers]
+            if last_failed:
+                selection.append("--lf")
+            options = ["-q", "--tb=short", "-p", "no:sugar"]
+            if maxfail:
+                options.append(f"--maxfail={maxfail}")
+            options += extra_args or []
+            
+            if workers > 1:
+                report = await run_sharded_pytest(
+                    self.project_root, selection, options, workers, timeout, failed_first=failed_first
+                )
+            else:
+                ordering = ["--ff"] if failed_first and not last_failed else []
+                report = await run_pytest(self.project_root, [*selection, *ordering, *options], timeout)
+            save_durations(self.project_root, report["tests"])
+            
+            failed = any(test["outcome"] in ("failed", "error") for test in report["tests"])
+            failed = failed or bool(report["collect_errors"]) or report["exit_code"] not in (0, 5)
+            status = "FAILED" if failed else "PASSED"
+            if report["timed_out"]:
+                status = f"TIMED OUT after {timeout}s"
+            
+            parts = [f"{status}: {summarize(report)}"]
+            parts.extend(format_failures(report, max_failures))
+            
+            if report.get("shards"):
+                parts.append("Shards:\n" + "\n".join(
+                    f"  {index}: {shard['tests']} tests, "
+                    + (f"{shard['duration']:.2f}s" if shard["duration"] is not None else "failed")
+                    + f" (predicted {shard['predicted']:.2f}s)"
+                    for index, shard in enumerate(report["shards"], 1)
+                ))
+            
+            slowest = sorted(report["tests"], key=lambda test: test["duration"], reverse=True)[:5]
+            if slowest and slowest[0]["duration"] >= 0.1:
+                parts.append("Slowest:\n" + "\n".join(
+                    f"  {test['duration']:.2f}s {test['nodeid']}" for test in slowest if test["duration"] >= 0.1
+                ))
+            
+            data = {
+                "exit_code": report["exit_code"],
+                "counts": dict(Counter(test["outcome"] for test in report["tests"])),
+                "duration": report["duration"],
+                "failures": [test["nodeid"] for test in report["tests"] if test["outcome"] in ("failed", "error")],
+            }
+            content = "\n\n".join(parts)
+            return self.error(content) if failed else self.success(content, data=data)
+        except Exception as e:
+            return self.error(str(e))
+
+
+class AffectedTestsTool(BaseTool):
+    
+    name: str = "affected_tests"
+    description: str = (
+        "Find the test files that transitively import changed files (from a file list, a diff, or git changes "
+        "against a revision) using the project's import graph, and optionally run only those"
+    )
+    
+    def __init__(self, project_root: Path, allow_external: bool = True):
+        self.project_root = project_root
+        self.validator = PathValidator(project_root, allow_external=allow_external)
+        self.graph = ImportGraph(project_root)
+        self.runner = RunTestsTool(project_root, allow_external)
+    
+    def _resolve(self, path: str) -> Path:
+        # Only paths are looked up, never file contents, so sensitive-looking names (.env, *secret*)
+        # are reported like any other file; they just have to stay inside the project
+        full_path = (self.validator.project_root / path).resolve()
+        try:
+            full_path.relative_to(self.validator.project_root)
+        except ValueError:
+            raise PathSecurityError(f"Access to path '{full_path}' is outside the project root '{self.validator.project_root}'")
+        return full_path
+    
+    def get_input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "changed_files": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Changed files relative to the project root"
+                },
+                "diff": {
+                    "type": "string",
+                    "description": "Unified diff (e.g. git diff output) to take the changed files from"
+                },
+                "rev": {
+                    "type": "string",
+                    "description": "Compare the working tree against this revision when no files or diff are given (default: HEAD)"
+                },
+                "run": {
+                    "type": "boolean",
+                    "description": "Run the affected tests with run_tests (default: false)"
+                },
+                "workers": {
+                    "type": "integer",
+                    "description": "Parallel workers when running (default: 1)"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Timeout in seconds when running (default: 600)"
+                }
+            }
+        }
+    
+    async def execute(
+        self,
+        changed_files: list[str] = None,
+        diff: str = None,
+        rev: str = "HEAD",
+        run: bool = False,
+        workers: int = 1,
+        timeout: int = 600
+    ) -> ToolResult:
+        try:
+            if changed_files:
+                changed = changed_files
+            elif diff:
+                changed = paths_from_diff(diff, await repo_prefix(self.project_root))
+            else:
+                changed = await changed_paths(self.project_root, rev)
+            changed_full = list(dict.fromkeys(self._resolve(path) for path in changed))
+            changed = [self.validator.get_relative(path) for path in changed_full]
+            if not changed:
+                return self.success("No changed files", data={"changed": [], "tests": [], "unknown": []})
+            
+            await self.graph.refresh()
+            tests, unknown = self.graph.affected_tests(changed_full)
+            tests = [self.validator.get_relative(Path(path)) for path in tests]
+            unknown = [self.validator.get_relative(Path(path)) for path in unknown]
+            
+            parts = [f"{len(changed)} changed file(s), {len(tests)} affected test file(s)"]
+            if tests:
+                parts.append("\n".join(tests))
+            if unknown:
+                parts.append(
+                    "Not in the import graph (non-Python or excluded files; their tests cannot be inferred):\n"
+                    + "\n".join(unknown)
+                )
+            errors = self.graph.errors()
+            if errors:
+                parts.append("Could not parse:\n" + "\n".join(
+                    f"{self.validator.get_relative(Path(path))}: {error}" for path, error in errors.items()
+                ))
+            data = {"changed": changed, "tests": tests, "unknown": unknown, "graph": self.graph.stats()}
+            
+            if run and tests:
+                result = await self.runner.execute(paths=tests, workers=workers, timeout=timeout)
+                parts.append(result.content)
+                data["results"] = result.data
+                content = "\n\n".join(parts)
+                return self.success(content, data=data) if result.status == ToolResultStatus.SUCCESS else self.error(content)
+            
+            return self.success("\n\n".join(parts), data=data)
+        except Exception as e:
+            return self.error(str(e))
@@ -1,4 +1,60 @@
 from .mime_types import get_mime_type, MIME_TYPES
 from .patterns import should_include_file, should_exclude_file, matches_pattern
 from .path_utils import PathValidator
-from .file_utils import *
\ No newline at end of file
+from .file_utils import *
+from .line_index import FileViewer, LineIndex, get_line_index
+from .tail import TailCursor, TailChunk, tail_lines, read_since
+from .ast_cache import ASTCache, ParsedModule, Definition, ast_cache
+from .workers import get_process_pool, batched
+from .outline import ModuleOutline, ProjectOutliner
+from .formatting import FormatResult, format_cache, format_files
+from .linting import Diagnostic, SEVERITIES, lint_cache, lint_files
+from .output_capture import HeadTailBuffer, OutputStore, output_store
+from .process import ProcessResult, BoundedBuffer, process_monitor, run_process, run_to_file
+from .jobs import Job, JobManager, job_manager
+from .shell_session import ShellResult, ShellSession, ShellSessionManager, shell_sessions
+from .worktrees import git, git_worktree, resolve_rev
+from .benchmarking import (
+    BenchmarkResult,
+    compare_results,
+    format_duration,
+    run_snippet_benchmark,
+    run_pytest_benchmark,
+    write_baseline,
+    read_baseline,
+)
+from .python_pool import PythonForkServer, PythonPool, python_pool
+from .profiling import (
+    load_pstats,
+    pstats_rows,
+    collapse_pstats,
+    sample_rows,
+    collapse_samples,
+    format_bytes,
+    load_snapshot,
+    snapshot_label,
+    SNAPSHOT_LABEL_INVALID,
+    BUILTIN_SNAPSHOTS,
+    allocation_rows,
+    allocation_diff_rows,
+    ImportNode,
+    IMPORTTIME_MARKER,
+    parse_importtime,
+)
+from .testing import (
+    pytest_pool,
+    run_pytest,
+    run_sharded_pytest,
+    shard_tests,
+    load_durations,
+    save_durations,
+    trim_traceback,
+    is_test_file,
+)
+from .import_graph import ImportGraph, ModuleImports, changed_paths, paths_from_diff, repo_prefix
+from .bisecting import BisectResult, BisectStep, bisect
+from .git_objects import GitObject, GitObjectStore, TreeEntry, git_objects, tree_path
+from .git_log import Commit, CommitIndex, commit_indexes
+from .git_status import GitStatus, StatusEntry, configure_fast_status, git_status_cache, parse_status_v2
+from .git_diff import FileDiff, FileStat, diff_file, diff_range, diff_stats, diff_text, rename_source
+from .git_grep import git_grep, glob_pathspec, is_git_repo, parse_grep, project_pathspecs, untracked_files
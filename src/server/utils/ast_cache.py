@@ -0,0 +1,224 @@
+import ast
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from src.shared import AST_CACHE_MAX_BYTES, FileAccessError
+from .file_utils import read_file
+
+
+# Rough in-memory footprint of a parsed module relative to its source size
+AST_SIZE_FACTOR = 12
+
+
+@dataclass
+class Definition:
+    kind: str
+    name: str
+    qualname: str
+    lineno: int
+    end_lineno: int
+    parent: str | None = None
+    signature: str = ""
+    decorators: list[str] = field(default_factory=list)
+    docstring: str = ""
+    start_lineno: int = 0
+
+
+@dataclass
+class ParsedModule:
+    path: str
+    mtime_ns: int
+    size: int
+    source: str
+    tree: ast.Module
+    definitions: list[Definition] = field(default_factory=list)
+    imports: list[str] = field(default_factory=list)
+    total_lines: int = 0
+    blank_lines: int = 0
+
+    @property
+    def cost(self) -> int:
+        return len(self.source) * AST_SIZE_FACTOR
+
+    @property
+    def functions(self) -> list[Definition]:
+        return [d for d in self.definitions if d.kind in ("function", "async_function")]
+
+    @property
+    def classes(self) -> list[Definition]:
+        return [d for d in self.definitions if d.kind == "class"]
+
+    def lines(self, start: int, end: int) -> str:
+        return "\n".join(self.source.splitlines()[start - 1:end])
+
+    def find(self, symbol: str, line: int | None = None) -> list[Definition]:
+        matches = [d for d in self.definitions if d.qualname == symbol]
+        if not matches:
+            matches = [d for d in self.definitions if d.name == symbol]
+        if line is not None:
+            # Property getter/setter pairs and conditional redefinitions share a qualname
+            matches = [d for d in matches if d.start_lineno <= line <= d.end_lineno]
+        return matches
+
+    def outline(self) -> str:
+        lines = []
+        if self.imports:
+            lines.append(f"imports: {', '.join(self.imports)}")
+        for definition in self.definitions:
+            depth = definition.qualname.count(".")
+            keyword = {"class": "class", "async_function": "async def"}.get(definition.kind, "def")
+            lines.append(
+                f"{'  ' * depth}{keyword} {definition.name}{definition.signature} "
+                f"(lines {definition.lineno}-{definition.end_lineno})"
+            )
+        return "\n".join(lines)
+
+
+def _signature(node: ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef) -> str:
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(base) for base in node.bases]
+        bases.extend(ast.unparse(keyword) for keyword in node.keywords)
+        return f"({', '.join(bases)})" if bases else ""
+
+    signature = f"({ast.unparse(node.args)})"
+    if node.returns is not None:
+        signature += f" -> {ast.unparse(node.returns)}"
+    return signature
+
+
+def _first_line(docstring: str | None) -> str:
+    if not docstring:
+        return ""
+    return docstring.strip().splitlines()[0]
+
+
+def collect_definitions(tree: ast.Module) -> list[Definition]:
+    definitions = []
+
+    def visit(node: ast.AST, prefix: str, parent: str | None):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                if isinstance(child, ast.ClassDef):
+                    kind = "class"
+                elif isinstance(child, ast.AsyncFunctionDef):
+                    kind = "async_function"
+                else:
+                    kind = "function"
+                qualname = f"{prefix}{child.name}"
+                definitions.append(Definition(
+                    kind=kind,
+                    name=child.name,
+                    qualname=qualname,
+                    lineno=child.lineno,
+                    end_lineno=child.end_lineno,
+                    parent=parent,
+                    signature=_signature(child),
+                    decorators=[ast.unparse(d) for d in child.decorator_list],
+                    docstring=_first_line(ast.get_docstring(child)),
+                    start_lineno=min([child.lineno] + [d.lineno for d in child.decorator_list]),
+                ))
+                visit(child, f"{qualname}.", qualname)
+            else:
+                visit(child, prefix, parent)
+
+    visit(tree, "", None)
+    return definitions
+
+
+def collect_imports(tree: ast.Module) -> list[str]:
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append("." * node.level + (node.module or ""))
+    return list(dict.fromkeys(imports))
+
+
+def parse_module(filepath: Path, source: str, stat: os.stat_result) -> ParsedModule:
+    tree = ast.parse(source, filename=str(filepath))
+    lines = source.splitlines()
+    return ParsedModule(
+        path=str(filepath),
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        source=source,
+        tree=tree,
+        definitions=collect_definitions(tree),
+        imports=collect_imports(tree),
+        total_lines=len(lines),
+        blank_lines=sum(1 for line in lines if not line.strip()),
+    )
+
+
+class ASTCache:
+
+    def __init__(self, max_bytes: int = AST_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, ParsedModule] = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, filepath: Path) -> ParsedModule:
+        try:
+            stat = filepath.stat()
+        except OSError:
+            raise FileAccessError(f"File '{filepath}' does not exist.")
+
+        key = str(filepath)
+        with self._lock:
+            module = self._entries.get(key)
+            if module is not None and module.mtime_ns == stat.st_mtime_ns and module.size == stat.st_size:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return module
+            self.misses += 1
+
+        module = parse_module(filepath, read_file(filepath), stat)
+        self._store(key, module)
+        return module
+
+    def _store(self, key: str, module: ParsedModule) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old.cost
+            if module.cost > self.max_bytes:
+                return
+            self._entries[key] = module
+            self.current_bytes += module.cost
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.cost
+                self.evictions += 1
+
+    def invalidate(self, filepath: Path | None = None) -> None:
+        with self._lock:
+            if filepath is None:
+                self._entries.clear()
+                self.current_bytes = 0
+                return
+            old = self._entries.pop(str(filepath), None)
+            if old is not None:
+                self.current_bytes -= old.cost
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "estimated_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+ast_cache = ASTCache()
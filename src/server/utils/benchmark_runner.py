@@ -0,0 +1,30 @@
+# Benchmark runner for the benchmark tool. Runs standalone in the target tree's interpreter
+# (exec'd via -c) so it must not import anything from this package.
+import json
+import sys
+import timeit
+
+
+def calibrate(timer, min_time):
+    # Grow the loop count until one sample takes at least min_time
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 10 ** 9:
+            return number
+        scale = min_time * 1.2 / elapsed if elapsed > 0 else 10
+        number = int(number * min(10, max(2, scale)))
+
+
+def main():
+    spec = json.loads(sys.argv[1])
+    timer = timeit.Timer(spec["statement"], spec.get("setup") or "pass")
+    number = calibrate(timer, spec["min_time"])
+    for _ in range(spec["warmup"]):
+        timer.timeit(number)
+    times = [timer.timeit(number) / number for _ in range(spec["repeats"])]
+    with open(spec["output"], "w") as f:
+        json.dump({"statement": {"loops": number, "samples": times}}, f)
+
+
+main()
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import math
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from src.shared import CACHE_DIR, CommandExecutionError, ResourceNotFoundError
+from .process import run_process
+
+
+BASELINE_DIR = CACHE_DIR / "benchmarks"
+
+RUNNER_SOURCE = (Path(__file__).parent / "benchmark_runner.py").read_text(encoding="utf-8")
+
+RUNNER_FILENAME = "<code-buddy-benchmark>"
+
+SIGNIFICANCE_LEVEL = 0.05
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    loops: int
+    samples: list[float] = field(default_factory=list)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    def confidence_interval(self, confidence: float = 0.95) -> tuple[float, float, float]:
+        return median_ci(self.samples, confidence)
+
+
+def median_ci(samples: list[float], confidence: float = 0.95) -> tuple[float, float, float]:
+    # Distribution-free interval from order statistics: [x(j), x(n-j+1)] covers the median with
+    # probability 1 - 2 * P(Binomial(n, 1/2) < j). Returns (low, high, actual coverage).
+    ordered = sorted(samples)
+    n = len(ordered)
+    alpha = 1 - confidence
+    tail = 0.0
+    j = 0
+    while j < n // 2:
+        next_tail = tail + math.comb(n, j) / 2 ** n
+        if 2 * next_tail > alpha:
+            break
+        tail = next_tail
+        j += 1
+    j = max(j, 1)
+    coverage = 1 - 2 * sum(math.comb(n, i) for i in range(j)) / 2 ** n
+    return ordered[j - 1], ordered[n - j], coverage
+
+
+def mann_whitney_u(a: list[float], b: list[float]) -> float:
+    # Two-sided p-value, normal approximation with tie and continuity correction
+    n1, n2 = len(a), len(b)
+    combined = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    ranks = [0.0] * len(combined)
+    tie_term = 0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        tie_term += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return min(1.0, math.erfc(max(z, 0) / math.sqrt(2)))
+
+
+def compare_results(before: BenchmarkResult, after: BenchmarkResult) -> dict:
+    p_value = mann_whitney_u(before.samples, after.samples)
+    return {
+        "name": after.name,
+        "before": before.median,
+        "after": after.median,
+        "change": after.median / before.median - 1 if before.median else float("nan"),
+        "p_value": p_value,
+        "significant": p_value < SIGNIFICANCE_LEVEL,
+    }
+
+
+def format_duration(seconds: float) -> str:
+    for unit, scale in (("ns", 1e-9), ("us", 1e-6), ("ms", 1e-3)):
+        if seconds < scale * 1000:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds:.3g} s"
+
+
+def _pythonpath_env(root: Path, pythonpath: str | None) -> dict | None:
+    if not pythonpath:
+        return None
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(root / pythonpath), env.get("PYTHONPATH")]))
+    return env
+
+
+async def run_snippet_benchmark(
+    root: Path,
+    statement: str,
+    setup: str | None,
+    repeats: int,
+    warmup: int,
+    min_time: float,
+    timeout: float,
+    pythonpath: str | None = None,
+) -> list[BenchmarkResult]:
+    fd, output = tempfile.mkstemp(prefix="code-buddy-bench-", suffix=".json")
+    os.close(fd)
+    spec = {
+        "statement": statement,
+        "setup": setup,
+        "repeats": repeats,
+        "warmup": warmup,
+        "min_time": min_time,
+        "output": output,
+    }
+    try:
+        result = await run_process(
+            ["python", "-c", f"exec(compile({RUNNER_SOURCE!r}, {RUNNER_FILENAME!r}, 'exec'))", json.dumps(spec)],
+            cwd=root,
+            env=_pythonpath_env(root, pythonpath),
+            timeout=timeout,
+        )
+        if result.timed_out:
+            raise CommandExecutionError(f"Benchmark timed out after {timeout}s in {root}")
+        if not result.ok:
+            raise CommandExecutionError(f"Benchmark failed in {root}:\n{result.stderr[-4000:]}")
+        data = json.loads(Path(output).read_text(encoding="utf-8"))
+    finally:
+        Path(output).unlink(missing_ok=True)
+    return [BenchmarkResult(name, entry["loops"], entry["samples"]) for name, entry in data.items()]
+
+
+async def run_pytest_benchmark(
+    root: Path,
+    selection: str,
+    timeout: float,
+    pythonpath: str | None = None,
+) -> list[BenchmarkResult]:
+    fd, output = tempfile.mkstemp(prefix="code-buddy-bench-", suffix=".json")
+    os.close(fd)
+    try:
+        result = await run_process(
+            [
+                "python", "-m", "pytest", *selection.split(), "-q", "-p", "no:cacheprovider",
+                "--benchmark-only", "--benchmark-save-data", f"--benchmark-json={output}",
+            ],
+            cwd=root,
+            env=_pythonpath_env(root, pythonpath),
+            timeout=timeout,
+        )
+        if result.timed_out:
+            raise CommandExecutionError(f"pytest-benchmark timed out after {timeout}s in {root}")
+        if result.returncode not in (0, 5) or not Path(output).stat().st_size:
+            raise CommandExecutionError(f"pytest-benchmark failed in {root}:\n{result.output[-4000:]}")
+        data = json.loads(Path(output).read_text(encoding="utf-8"))
+    finally:
+        Path(output).unlink(missing_ok=True)
+    return [
+        BenchmarkResult(bench["fullname"], bench["stats"].get("iterations", 1), bench["stats"]["data"])
+        for bench in data.get("benchmarks", [])
+    ]
+
+
+def baseline_path(project_root: Path, name: str) -> Path:
+    digest = hashlib.sha1(str(project_root.resolve()).encode("utf-8")).hexdigest()[:16]
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    return BASELINE_DIR / digest / f"{safe_name}.json"
+
+
+def write_baseline(project_root: Path, name: str, results: list[BenchmarkResult], metadata: dict) -> Path:
+    path = baseline_path(project_root, name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        **metadata,
+        "created_at": time.time(),
+        "results": [{**asdict(result), "median": result.median} for result in results],
+    }
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return path
+
+
+def read_baseline(project_root: Path, name: str) -> tuple[list[BenchmarkResult], dict]:
+    path = baseline_path(project_root, name)
+    if not path.exists():
+        raise ResourceNotFoundError(f"No benchmark baseline named '{name}'")
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    results = [BenchmarkResult(r["name"], r["loops"], r["samples"]) for r in payload.pop("results")]
+    return results, payload
@@ -0,0 +1,146 @@
+import asyncio
+import statistics
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from src.shared import CommandExecutionError
+from .process import run_process
+from .worktrees import git, git_worktree, resolve_rev
+
+
+# git bisect run's convention for "cannot test this commit"
+SKIP_EXIT_CODE = 125
+
+
+@dataclass
+class BisectStep:
+    commit: str
+    outcome: str
+    returncode: int | None
+    seconds: float | None
+    round: int
+
+
+@dataclass
+class BisectResult:
+    first_bad: str | None
+    good: str
+    bad: str
+    candidates: int
+    threshold: float | None = None
+    steps: list[BisectStep] = field(default_factory=list)
+    remaining: list[str] = field(default_factory=list)
+
+    @property
+    def rounds(self) -> int:
+        return max((step.round for step in self.steps), default=0)
+
+
+def split_points(low: int, high: int, k: int) -> list[int]:
+    # K evenly spaced probes strictly between low (known good) and high (known bad)
+    span = high - low
+    return sorted({low + span * i // (k + 1) for i in range(1, k + 1)} - {low, high})
+
+
+async def commit_range(repo: Path, good: str, bad: str) -> list[str]:
+    # Oldest first, ending with bad. Merged side branches are flattened in topological order,
+    # which keeps the search a straight line at the cost of exactness on nonlinear history.
+    output = await git(repo, "rev-list", "--reverse", "--topo-order", "--ancestry-path", f"{good}..{bad}")
+    return output.split()
+
+
+async def evaluate(
+    worktree: Path,
+    commit: str,
+    command: str,
+    timeout: float,
+    threshold: float | None,
+    repeats: int,
+) -> tuple[str, int | None, float | None]:
+    await git(worktree, "checkout", "--quiet", "--detach", "--force", commit)
+    # worktree may be a subdirectory; clean the whole checkout
+    await git(worktree, "clean", "-fdq", "--", ":/")
+    times = []
+    for _ in range(repeats if threshold is not None else 1):
+        result = await run_process(command, cwd=worktree, timeout=timeout, max_output=None)
+        if result.timed_out:
+            # A hang is a failure, and slower than the timeout is over any threshold
+            return "bad", None, result.wall_time
+        if result.returncode == SKIP_EXIT_CODE:
+            return "skip", result.returncode, None
+        if result.returncode != 0:
+            # A failing build is not evidence about a slowdown
+            return ("skip" if threshold is not None else "bad"), result.returncode, result.wall_time
+        times.append(result.wall_time)
+    fastest = min(times)
+    if threshold is not None:
+        return ("bad" if fastest > threshold else "good"), 0, fastest
+    return "good", 0, fastest
+
+
+async def bisect(
+    repo: Path,
+    good: str,
+    bad: str,
+    command: str,
+    workers: int = 3,
+    timeout: float = 600,
+    max_seconds: float | None = None,
+    slowdown: float | None = None,
+    repeats: int = 3,
+) -> BisectResult:
+    good_commit = await resolve_rev(repo, good)
+    bad_commit = await resolve_rev(repo, bad)
+    commits = await commit_range(repo, good_commit, bad_commit)
+    if not commits:
+        raise CommandExecutionError(f"{bad} is not a descendant of {good}")
+
+    result = BisectResult(None, good_commit, bad_commit, len(commits) - 1, max_seconds)
+    async with AsyncExitStack() as stack:
+        worktrees = [await stack.enter_async_context(git_worktree(repo, good_commit)) for _ in range(workers)]
+
+        if slowdown is not None and max_seconds is None:
+            # Calibrate on the good revision in every worktree at once, so the baseline is measured
+            # under the same parallel load as the probes it will be compared with
+            calibration = await asyncio.gather(*(
+                evaluate(worktree, good_commit, command, timeout, float("inf"), repeats) for worktree in worktrees
+            ))
+            if any(outcome != "good" for outcome, _, _ in calibration):
+                raise CommandExecutionError(f"Command fails on the good revision {good}")
+            seconds = statistics.median(seconds for _, _, seconds in calibration)
+            result.threshold = seconds * (1 + slowdown)
+            result.steps.append(BisectStep(good_commit, "good", 0, seconds, 0))
+
+        # commits[-1] is bad; index -1 stands for the good revision
+        low, high = -1, len(commits) - 1
+        skipped: set[int] = set()
+        round_number = 0
+        while True:
+            pending = [i for i in range(low + 1, high) if i not in skipped]
+            if not pending:
+                break
+            round_number += 1
+            # Probe evenly among the still-untested commits so skips don't stall the search
+            probes = [pending[p] for p in split_points(-1, len(pending), min(workers, len(pending)))]
+            outcomes = await asyncio.gather(*(
+                evaluate(worktree, commits[index], command, timeout, result.threshold, repeats)
+                for worktree, index in zip(worktrees, probes)
+            ))
+            for index, (outcome, returncode, seconds) in zip(probes, outcomes):
+                result.steps.append(BisectStep(commits[index], outcome, returncode, seconds, round_number))
+
+            bad_probes = [index for index, (outcome, _, _) in zip(probes, outcomes) if outcome == "bad"]
+            if bad_probes:
+                high = bad_probes[0]
+            good_probes = [index for index, (outcome, _, _) in zip(probes, outcomes) if outcome == "good" and index < high]
+            if good_probes:
+                low = good_probes[-1]
+            skipped.update(index for index, (outcome, _, _) in zip(probes, outcomes) if outcome == "skip")
+
+    remaining = [commits[i] for i in range(low + 1, high)]
+    if remaining:
+        # Only skipped commits separate the last good from the first bad
+        result.remaining = remaining + [commits[high]]
+    else:
+        result.first_bad = commits[high]
+    return result
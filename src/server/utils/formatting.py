@@ -0,0 +1,138 @@
+import asyncio
+import dataclasses
+import hashlib
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from .workers import get_process_pool, batched
+
+
+@dataclass
+class FormatResult:
+    path: str
+    status: str
+    source: str | None = None
+    error: str | None = None
+
+
+def content_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def config_version(config_root: Path) -> str:
+    # Identifies the pyproject.toml black would read (the first directory up with .git, .hg or
+    # pyproject.toml), so editing [tool.black] invalidates cached modes and "already formatted" entries
+    for directory in (config_root.resolve(), *config_root.resolve().parents):
+        pyproject = directory / "pyproject.toml"
+        if pyproject.is_file():
+            stat = pyproject.stat()
+            return f"{pyproject}:{stat.st_mtime_ns}:{stat.st_size}"
+        if (directory / ".git").exists() or (directory / ".hg").is_dir():
+            break
+    return ""
+
+
+@lru_cache(maxsize=32)
+def _black_mode(config_root: str, version: str):
+    import black
+    import black.files
+
+    # black memoizes parsed TOML by path, which would hide the edit that changed version
+    load_toml = getattr(black.files, "_load_toml", None)
+    if hasattr(load_toml, "cache_clear"):
+        load_toml.cache_clear()
+    pyproject = black.find_pyproject_toml((config_root,))
+    config = black.parse_pyproject_toml(pyproject) if pyproject else {}
+    return black.Mode(
+        target_versions={black.TargetVersion[v.upper()] for v in config.get("target_version", [])},
+        line_length=config.get("line_length", black.DEFAULT_LINE_LENGTH),
+        string_normalization=not config.get("skip_string_normalization", False),
+        magic_trailing_comma=not config.get("skip_magic_trailing_comma", False),
+        preview=config.get("preview", False),
+    )
+
+
+def format_sources(jobs: list[tuple[str, str]], config_root: str, version: str = "") -> list[FormatResult]:
+    try:
+        import black
+    except ImportError:
+        return [FormatResult(path, "failed", error="black is not installed. Run: pip install black") for path, _ in jobs]
+
+    mode = _black_mode(config_root, version)
+    results = []
+    for path, source in jobs:
+        try:
+            file_mode = dataclasses.replace(mode, is_pyi=path.endswith(".pyi"))
+            formatted = black.format_file_contents(source, fast=False, mode=file_mode)
+            results.append(FormatResult(path, "formatted", source=formatted))
+        except black.NothingChanged:
+            results.append(FormatResult(path, "unchanged"))
+        except Exception as e:
+            results.append(FormatResult(path, "failed", error=str(e)))
+    return results
+
+
+class FormatCache:
+
+    def __init__(self):
+        self._formatted: set[tuple[str, str, str]] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def is_formatted(self, source: str, config_root: str, version: str = "") -> bool:
+        with self._lock:
+            if (config_root, version, content_hash(source)) in self._formatted:
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def mark_formatted(self, source: str, config_root: str, version: str = "") -> None:
+        with self._lock:
+            self._formatted.add((config_root, version, content_hash(source)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._formatted), "hits": self.hits, "misses": self.misses}
+
+
+format_cache = FormatCache()
+
+
+async def format_files(files: list[Path], config_root: Path, check: bool = False) -> list[FormatResult]:
+    root = str(config_root)
+    version = config_version(config_root)
+    results = []
+    jobs = []
+
+    for filepath in files:
+        try:
+            source = filepath.read_bytes().decode("utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            results.append(FormatResult(str(filepath), "failed", error=str(e)))
+            continue
+        if format_cache.is_formatted(source, root, version):
+            results.append(FormatResult(str(filepath), "cached"))
+        else:
+            jobs.append((str(filepath), source))
+
+    if jobs:
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(pool, format_sources, batch, root, version) for batch in batched(jobs)
+        ))
+        originals = dict(jobs)
+        for result in (r for batch in batches for r in batch):
+            if result.status == "unchanged":
+                format_cache.mark_formatted(originals[result.path], root, version)
+            elif result.status == "formatted":
+                if not check:
+                    Path(result.path).write_bytes(result.source.encode("utf-8"))
+                    format_cache.mark_formatted(result.source, root, version)
+                result.source = None
+            results.append(result)
+
+    return results
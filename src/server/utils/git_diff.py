@@ -0,0 +1,159 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from src.shared import CommandExecutionError
+from .process import ProcessResult, run_process
+
+
+@dataclass
+class FileStat:
+    path: str
+    added: int | None
+    deleted: int | None
+    original_path: str | None = None
+
+    @property
+    def binary(self) -> bool:
+        return self.added is None
+
+
+@dataclass
+class FileDiff:
+    path: str
+    header: list[str] = field(default_factory=list)
+    hunks: list[list[str]] = field(default_factory=list)
+    truncated: bool = False
+
+    @staticmethod
+    def hunk_counts(hunk: list[str]) -> tuple[int, int]:
+        added = sum(1 for line in hunk[1:] if line.startswith("+"))
+        deleted = sum(1 for line in hunk[1:] if line.startswith("-"))
+        return added, deleted
+
+
+def diff_range(base: str | None = None, target: str | None = None, staged: bool = False) -> list[str]:
+    # Working tree vs index by default; --staged is index vs HEAD (or base)
+    args = ["--staged"] if staged else []
+    if base:
+        args.append(base)
+    if target:
+        args.append(target)
+    return args
+
+
+async def _git_diff(repo: Path, args: list[str], max_output: int | None = None) -> ProcessResult:
+    result = await run_process(
+        ["git", "-c", "core.quotePath=false", "diff", "--no-color", "--no-ext-diff", *args],
+        cwd=repo,
+        timeout=None,
+        max_output=max_output,
+    )
+    if not result.ok:
+        raise CommandExecutionError(result.stderr.strip() or "git diff failed")
+    return result
+
+
+def parse_numstat(output: str) -> list[FileStat]:
+    # -z format: "added\tdeleted\tpath\0", or "added\tdeleted\t\0old\0new\0" for renames;
+    # binary files report "-" for both counts
+    stats = []
+    records = output.split("\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+        added, deleted, path = record.split("\t", 2)
+        original = None
+        if not path:
+            original, path = records[i], records[i + 1]
+            i += 2
+        stats.append(FileStat(
+            path,
+            None if added == "-" else int(added),
+            None if deleted == "-" else int(deleted),
+            original,
+        ))
+    return stats
+
+
+async def diff_stats(repo: Path, range_args: list[str], paths: list[str] | None = None) -> list[FileStat]:
+    result = await _git_diff(repo, ["--numstat", "-z", "-M", *range_args, "--", *(paths or [])])
+    return parse_numstat(result.stdout)
+
+
+def parse_diff(output: str) -> list[FileDiff]:
+    files = []
+    current = None
+    hunk = None
+    for line in output.splitlines():
+        if line.startswith("diff --git "):
+            current = FileDiff(line.split(" b/", 1)[-1])
+            files.append(current)
+            hunk = None
+            current.header.append(line)
+        elif current is None:
+            continue
+        elif line.startswith("@@"):
+            hunk = [line]
+            current.hunks.append(hunk)
+        elif hunk is not None:
+            hunk.append(line)
+        else:
+            if line.startswith("+++ b/"):
+                current.path = line[6:]
+            current.header.append(line)
+    return files
+
+
+async def rename_source(repo: Path, range_args: list[str], path: str) -> str | None:
+    # path is relative to the top level. Only an added file can be a rename target and only deleted
+    # files can be its source, so rename detection runs on those instead of the whole diff.
+    added = await _git_diff(repo, ["--name-only", "-z", "--no-renames", "--diff-filter=A", *range_args, "--", f":(top){path}"])
+    if not added.stdout.strip("\0"):
+        return None
+    deleted = await _git_diff(repo, ["--name-only", "-z", "--no-renames", "--diff-filter=D", *range_args, "--", ":(top)"])
+    candidates = [name for name in deleted.stdout.split("\0") if name]
+    if not candidates:
+        return None
+    stats = await diff_stats(repo, range_args, [f":(top){name}" for name in (path, *candidates)])
+    return next((stat.original_path for stat in stats if stat.path == path), None)
+
+
+async def diff_file(
+    repo: Path,
+    range_args: list[str],
+    path: str,
+    context: int = 3,
+    original_path: str | None = None,
+    max_bytes: int | None = None,
+) -> FileDiff | None:
+    # A rename is only detected when both sides are in the pathspec
+    paths = [original_path, path] if original_path else [path]
+    result = await _git_diff(repo, [f"-U{max(0, context)}", "-M", *range_args, "--", *paths], max_output=max_bytes)
+    files = parse_diff(result.stdout)
+    if not files:
+        return None
+    diff = files[0]
+    if result.stdout_dropped:
+        # The last hunk was cut off mid-way
+        diff.truncated = True
+        if diff.hunks:
+            diff.hunks.pop()
+    return diff
+
+
+async def diff_text(
+    repo: Path,
+    range_args: list[str],
+    paths: list[str] | None = None,
+    context: int = 3,
+    max_bytes: int | None = None,
+) -> str | None:
+    # None when the diff is larger than max_bytes; only max_bytes of it are ever held in memory
+    result = await _git_diff(
+        repo,
+        [f"-U{max(0, context)}", *range_args, "--", *(paths or [])],
+        max_output=max_bytes + 1 if max_bytes is not None else None,
+    )
+    return None if result.stdout_dropped else result.stdout
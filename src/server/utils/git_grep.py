@@ -0,0 +1,128 @@
+import asyncio
+import os
+import re
+from pathlib import Path
+from typing import Callable
+from src.shared import EXCLUDE_DIRS, INCLUDE_PATTERN, CommandExecutionError, SearchMatch
+from .process import _semaphore, process_monitor, run_process, terminate
+from .worktrees import git
+
+
+_pcre_support: dict[str, bool] = {}
+
+
+async def is_git_repo(path: Path) -> bool:
+    result = await run_process(["git", "rev-parse", "--is-inside-work-tree"], cwd=path, timeout=30)
+    return result.ok and result.stdout.strip() == "true"
+
+
+async def _supports_pcre(repo: Path) -> bool:
+    # Python's re is closest to PCRE; git builds without libpcre only have -E
+    key = str(repo)
+    if key not in _pcre_support:
+        result = await run_process(["git", "grep", "-P", "-q", "-e", "x", "--", ":(exclude)*"], cwd=repo, timeout=30)
+        # 0/1 are match/no match; a build without PCRE dies with 128
+        _pcre_support[key] = result.returncode in (0, 1)
+    return _pcre_support[key]
+
+
+def glob_pathspec(file_pattern: str | None) -> list[str]:
+    # Same meaning as the Python backend's fnmatch on the file name, at any depth
+    if not file_pattern or file_pattern == "*":
+        return []
+    return [f":(glob)**/{file_pattern}"]
+
+
+def project_pathspecs(file_pattern: str | None = None) -> list[str]:
+    # Roughly the files collect_project_files walks, so git skips the rest; should_include_file
+    # still has the final say on each match
+    includes = glob_pathspec(file_pattern) or [f":(glob)**/{pattern}" for pattern in INCLUDE_PATTERN]
+    excludes = [f":(exclude,glob)**/{name}/**" for name in EXCLUDE_DIRS]
+    excludes += [":(exclude,glob)**/.*", ":(exclude,glob)**/.*/**"]
+    return includes + excludes
+
+
+def parse_grep(output: str, regex: re.Pattern, rev: str | None = None) -> list[SearchMatch]:
+    # -z --column: "path\0line\0column\0text\n"; with a revision the path is "rev:path"
+    matches = []
+    prefix = f"{rev}:" if rev else ""
+    for record in output.split("\n"):
+        fields = record.split("\0", 3)
+        if len(fields) < 4:
+            continue
+        path, line_number, column, text = fields
+        if prefix and path.startswith(prefix):
+            path = path[len(prefix):]
+        match = regex.search(text)
+        if match:
+            start, end = match.span()
+        else:
+            start = end = int(column) - 1
+        matches.append(SearchMatch(path, int(line_number), text, start, end))
+    return matches
+
+
+async def git_grep(
+    repo: Path,
+    pattern: str,
+    case_sensitive: bool = False,
+    pathspecs: list[str] | None = None,
+    rev: str | None = None,
+    max_results: int = 100,
+    include: Callable[[str], bool] | None = None,
+) -> list[SearchMatch]:
+    regex = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+    cmd = ["git", "-c", "core.quotePath=false", "grep", "-n", "-z", "--column", "-I", "--no-color", f"--threads={os.cpu_count() or 1}"]
+    cmd.append("-P" if await _supports_pcre(repo) else "-E")
+    if not case_sensitive:
+        cmd.append("-i")
+    cmd += ["-e", pattern]
+    if rev:
+        cmd.append(rev)
+    cmd += ["--", *(pathspecs or [])]
+
+    # Streamed rather than buffered: include can reject most of what git prints, so a cut-off
+    # buffer could hide accepted matches, and git is stopped once max_results have been accepted
+    matches = []
+    async with _semaphore():
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=str(repo),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        process_monitor.started += 1
+        process_monitor.running += 1
+        stderr = asyncio.create_task(process.stderr.read())
+        try:
+            pending = b""
+            while len(matches) < max_results:
+                chunk = await process.stdout.read(65536)
+                if not chunk:
+                    break
+                # Records end with a newline; keep a partial one for the next chunk
+                records, _, pending = (pending + chunk).rpartition(b"\n")
+                for match in parse_grep(records.decode("utf-8", errors="replace"), regex, rev):
+                    if include is None or include(match.file_path):
+                        matches.append(match)
+            if len(matches) >= max_results:
+                # git is still running or done; either way the rest of its output is not needed
+                return matches[:max_results]
+            await process.wait()
+            # Exit code 1 means no matches
+            if process.returncode not in (0, 1):
+                message = (await stderr).decode("utf-8", errors="replace").strip()
+                raise CommandExecutionError(message or "git grep failed")
+        finally:
+            process_monitor.running -= 1
+            if process.returncode is None:
+                await terminate(process)
+            stderr.cancel()
+    return matches
+
+
+async def untracked_files(repo: Path, pathspecs: list[str] | None = None) -> list[Path]:
+    output = await git(repo, "ls-files", "-z", "--others", "--exclude-standard", "--", *(pathspecs or []))
+    return [repo / name for name in output.split("\0") if name]
@@ -0,0 +1,198 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from src.shared import CommandExecutionError, ResourceNotFoundError
+from .git_objects import git_objects, tree_path
+from .process import run_process
+from .worktrees import git
+
+
+RECORD = "\x1e"
+FIELD = "\x1f"
+# --name-only appends the changed files after the formatted fields of each record
+LOG_FORMAT = f"--format={RECORD}%H{FIELD}%P{FIELD}%an{FIELD}%ae{FIELD}%at{FIELD}%ct{FIELD}%s{FIELD}%b{FIELD}"
+
+
+@dataclass
+class Commit:
+    hash: str
+    parents: list[str]
+    author: str
+    email: str
+    author_time: int
+    commit_time: int
+    subject: str
+    body: str
+    files: list[str] = field(default_factory=list)
+
+    def touches(self, path: str) -> bool:
+        return any(f == path or f.startswith(path + "/") for f in self.files)
+
+
+def parse_log(output: str) -> list[Commit]:
+    commits = []
+    for record in output.split(RECORD)[1:]:
+        parts = record.split(FIELD)
+        if len(parts) < 9:
+            continue
+        hash_, parents, author, email, author_time, commit_time, subject, body, files = parts[:9]
+        commits.append(Commit(
+            hash=hash_,
+            parents=parents.split(),
+            author=author,
+            email=email,
+            author_time=int(author_time),
+            commit_time=int(commit_time),
+            subject=subject,
+            body=body.strip(),
+            files=[line for line in files.splitlines() if line],
+        ))
+    return commits
+
+
+def parse_date(value: str | int | float) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', expected ISO 8601 (e.g. 2024-05-01) or a Unix timestamp")
+
+
+class CommitIndex:
+
+    def __init__(self, repo: Path):
+        self.repo = repo
+        self.commits: dict[str, Commit] = {}
+        self.order: list[str] = []
+        self.positions: dict[str, int] = {}
+        self.head: str | None = None
+        self.prefix: str | None = None
+        self._lock = asyncio.Lock()
+        self.updates = 0
+        self.rebuilds = 0
+
+    async def _log(self, *args: str, stdin: str | None = None) -> list[Commit]:
+        result = await run_process(
+            ["git", "-c", "core.quotePath=false", "log", LOG_FORMAT, "--name-only", *args],
+            cwd=self.repo,
+            timeout=None,
+            max_output=None,
+            stdin=stdin.encode("utf-8") if stdin is not None else None,
+        )
+        if not result.ok:
+            raise CommandExecutionError(result.stderr.strip() or "git log failed")
+        return parse_log(result.stdout)
+
+    async def refresh(self) -> None:
+        if self.prefix is None:
+            # Also the first check that repo is a repository at all, with git's own error if not
+            self.prefix = (await git(self.repo, "rev-parse", "--show-prefix")).strip()
+        # HEAD comes from the persistent cat-file reader, so an unchanged repo costs no new process
+        try:
+            head = (await git_objects.resolve(self.repo, "HEAD")).oid
+        except ResourceNotFoundError:
+            # Unborn branch: no commits yet
+            head = None
+
+        async with self._lock:
+            if head == self.head:
+                return
+            if head is None:
+                self.order, self.positions, self.head = [], {}, None
+                return
+
+            fast_forward = self.head is not None and (await run_process(
+                ["git", "merge-base", "--is-ancestor", self.head, head], cwd=self.repo, timeout=None
+            )).returncode == 0
+
+            if fast_forward:
+                new = await self._log(f"{self.head}..{head}")
+                for commit in new:
+                    self.commits[commit.hash] = commit
+                self.order = [commit.hash for commit in new] + self.order
+                self.updates += 1
+            else:
+                # Rewritten history or a branch switch: re-list, but only fetch commits not seen before
+                order = (await git(self.repo, "rev-list", head)).split()
+                missing = [hash_ for hash_ in order if hash_ not in self.commits]
+                if missing:
+                    for commit in await self._log("--no-walk=unsorted", "--stdin", stdin="\n".join(missing) + "\n"):
+                        self.commits[commit.hash] = commit
+                self.order = order
+                self.rebuilds += 1
+            self.positions = {hash_: index for index, hash_ in enumerate(self.order)}
+            self.head = head
+
+    def query(
+        self,
+        path: str | None = None,
+        author: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        grep: str | None = None,
+        limit: int = 20,
+        cursor: str | None = None,
+    ) -> tuple[list[Commit], str | None]:
+        start = 0
+        if cursor:
+            if cursor not in self.positions:
+                raise ValueError(f"Unknown cursor '{cursor}' (not in the history of HEAD)")
+            start = self.positions[cursor] + 1
+
+        # "./src" and "src/" name the same directory as "src"
+        path = tree_path(self.prefix or "", path) if path else None
+        author = author.lower() if author else None
+        grep = grep.lower() if grep else None
+        since_ts = parse_date(since) if since else None
+        until_ts = parse_date(until) if until else None
+
+        results = []
+        for index in range(start, len(self.order)):
+            commit = self.commits[self.order[index]]
+            if since_ts is not None and commit.commit_time < since_ts:
+                continue
+            if until_ts is not None and commit.commit_time > until_ts:
+                continue
+            if author and author not in commit.author.lower() and author not in commit.email.lower():
+                continue
+            if grep and grep not in commit.subject.lower() and grep not in commit.body.lower():
+                continue
+            if path and not commit.touches(path):
+                continue
+            if len(results) == limit:
+                # There is at least one more match, so hand back a cursor
+                return results, results[-1].hash
+            results.append(commit)
+        return results, None
+
+    def stats(self) -> dict:
+        return {
+            "commits": len(self.commits),
+            "head": self.head,
+            "updates": self.updates,
+            "rebuilds": self.rebuilds,
+        }
+
+
+class CommitIndexStore:
+
+    def __init__(self):
+        self._indexes: dict[str, CommitIndex] = {}
+
+    def get(self, repo: Path) -> CommitIndex:
+        key = str(repo.resolve())
+        if key not in self._indexes:
+            self._indexes[key] = CommitIndex(repo)
+        return self._indexes[key]
+
+    def stats(self) -> dict:
+        return {key: index.stats() for key, index in self._indexes.items()}
+
+
+commit_indexes = CommitIndexStore()
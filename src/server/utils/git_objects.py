@@ -0,0 +1,230 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from src.shared import GIT_OBJECT_CACHE_MAX_BYTES, CommandExecutionError, ResourceNotFoundError
+from .process import run_process
+
+
+@dataclass
+class GitObject:
+    oid: str
+    type: str
+    size: int
+
+
+@dataclass
+class TreeEntry:
+    mode: str
+    type: str
+    oid: str
+    name: str
+
+
+class CatFileProcess:
+    # One long-lived `git cat-file --batch[-check]`; the lock queues requests in arrival order
+
+    def __init__(self, repo: Path, mode: str):
+        self.repo = repo
+        self.mode = mode
+        self.process: asyncio.subprocess.Process | None = None
+        self.started = False
+        self._lock = asyncio.Lock()
+        self.requests = 0
+        self.restarts = 0
+
+    async def _ensure_started(self) -> asyncio.subprocess.Process:
+        if self.process is None or self.process.returncode is not None:
+            # process is dropped on a crash, so count every start after the first
+            if self.started:
+                self.restarts += 1
+            self.started = True
+            self.process = await asyncio.create_subprocess_exec(
+                "git", "cat-file", self.mode,
+                cwd=str(self.repo),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        return self.process
+
+    async def request(self, name: str) -> tuple[GitObject | None, bytes | None]:
+        if "\n" in name:
+            raise ValueError("Object names cannot contain newlines")
+        async with self._lock:
+            process = await self._ensure_started()
+            self.requests += 1
+            try:
+                process.stdin.write(name.encode("utf-8") + b"\n")
+                await process.stdin.drain()
+                header = await process.stdout.readline()
+                if not header:
+                    raise ConnectionResetError
+                fields = header.decode("utf-8", errors="replace").split()
+                if len(fields) < 3 or fields[-1] in ("missing", "ambiguous"):
+                    return None, None
+                obj = GitObject(fields[0], fields[1], int(fields[2]))
+                if self.mode != "--batch":
+                    return obj, None
+                # Contents are followed by a single newline
+                content = await process.stdout.readexactly(obj.size + 1)
+                return obj, content[:-1]
+            except (BrokenPipeError, ConnectionResetError, asyncio.IncompleteReadError):
+                self.process = None
+                raise CommandExecutionError(f"git cat-file exited unexpectedly in {self.repo}")
+            except BaseException:
+                # A cancelled request leaves its reply in the pipe; the next one would read it
+                process.kill()
+                self.process = None
+                raise
+
+    async def close(self) -> None:
+        if self.process is not None and self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+        self.process = None
+        self.started = False
+
+
+def tree_path(prefix: str, path: str) -> str:
+    # Relative to the top level; cat-file dies (rather than answering "missing") on a path that
+    # leaves the repository, so those are rejected here
+    parts = []
+    for part in PurePosixPath(prefix, path.lstrip("/")).parts:
+        if part == ".":
+            continue
+        if part == "..":
+            if not parts:
+                raise ResourceNotFoundError(f"Path '{path}' is outside the repository")
+            parts.pop()
+        else:
+            parts.append(part)
+    return "/".join(parts)
+
+
+def parse_tree(content: bytes, oid_bytes: int) -> list[TreeEntry]:
+    # Raw tree format: "<mode> <name>\0<binary oid>" repeated
+    entries = []
+    position = 0
+    while position < len(content):
+        space = content.index(b" ", position)
+        nul = content.index(b"\0", space)
+        mode = content[position:space].decode("ascii")
+        name = content[space + 1:nul].decode("utf-8", errors="surrogateescape")
+        oid = content[nul + 1:nul + 1 + oid_bytes].hex()
+        kind = "tree" if mode == "40000" else "commit" if mode == "160000" else "blob"
+        entries.append(TreeEntry(mode.zfill(6), kind, oid, name))
+        position = nul + 1 + oid_bytes
+    return entries
+
+
+class GitObjectStore:
+
+    def __init__(self, max_bytes: int = GIT_OBJECT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._readers: dict[str, tuple[CatFileProcess, CatFileProcess]] = {}
+        self._prefixes: dict[str, str] = {}
+        self._objects: OrderedDict[str, tuple[GitObject, bytes]] = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _processes(self, repo: Path) -> tuple[CatFileProcess, CatFileProcess]:
+        key = str(repo.resolve())
+        if key not in self._readers:
+            self._readers[key] = (CatFileProcess(repo, "--batch-check"), CatFileProcess(repo, "--batch"))
+        return self._readers[key]
+
+    async def _prefix(self, repo: Path) -> str:
+        key = str(repo.resolve())
+        if key not in self._prefixes:
+            result = await run_process(["git", "rev-parse", "--show-prefix"], cwd=repo, timeout=30)
+            if not result.ok:
+                raise CommandExecutionError(result.stderr.strip() or "git rev-parse failed")
+            self._prefixes[key] = result.stdout.strip()
+        return self._prefixes[key]
+
+    async def resolve(self, repo: Path, name: str) -> GitObject:
+        # Names like HEAD:path move with the branch, so only the oid they resolve to is cached
+        check, _ = self._processes(repo)
+        obj, _ = await check.request(name)
+        if obj is None:
+            raise ResourceNotFoundError(f"No git object named '{name}'")
+        return obj
+
+    async def read(self, repo: Path, name: str) -> tuple[GitObject, bytes]:
+        obj = await self.resolve(repo, name)
+        cached = self._objects.get(obj.oid)
+        if cached is not None:
+            self._objects.move_to_end(obj.oid)
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        _, batch = self._processes(repo)
+        obj, content = await batch.request(obj.oid)
+        if obj is None:
+            raise ResourceNotFoundError(f"No git object named '{name}'")
+        self._store(obj, content)
+        return obj, content
+
+    def _store(self, obj: GitObject, content: bytes) -> None:
+        if len(content) > self.max_bytes or obj.oid in self._objects:
+            return
+        self._objects[obj.oid] = (obj, content)
+        self.current_bytes += len(content)
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted) = self._objects.popitem(last=False)
+            self.current_bytes -= len(evicted)
+            self.evictions += 1
+
+    async def read_blob(self, repo: Path, rev: str, path: str) -> tuple[GitObject, bytes]:
+        obj, content = await self.read(repo, f"{rev}:{tree_path(await self._prefix(repo), path)}")
+        if obj.type != "blob":
+            raise CommandExecutionError(f"'{path}' is a {obj.type} at {rev}, not a file")
+        return obj, content
+
+    async def list_tree(self, repo: Path, rev: str, path: str = "", recursive: bool = False) -> list[tuple[str, TreeEntry]]:
+        obj, content = await self.read(repo, f"{rev}:{tree_path(await self._prefix(repo), path)}")
+        if obj.type != "tree":
+            raise CommandExecutionError(f"'{path}' is a {obj.type} at {rev}, not a directory")
+
+        oid_bytes = len(obj.oid) // 2
+        entries = []
+        pending = [("", content)]
+        while pending:
+            prefix, tree = pending.pop()
+            for entry in parse_tree(tree, oid_bytes):
+                entries.append((prefix + entry.name, entry))
+                if recursive and entry.type == "tree":
+                    _, subtree = await self.read(repo, entry.oid)
+                    pending.append((f"{prefix}{entry.name}/", subtree))
+        return sorted(entries, key=lambda item: item[0])
+
+    async def close(self) -> None:
+        for check, batch in self._readers.values():
+            await check.close()
+            await batch.close()
+        self._readers.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "repositories": len(self._readers),
+            "requests": sum(check.requests + batch.requests for check, batch in self._readers.values()),
+            "restarts": sum(check.restarts + batch.restarts for check, batch in self._readers.values()),
+            "entries": len(self._objects),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+git_objects = GitObjectStore()
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from src.shared import GIT_STATUS_CACHE_TTL, CommandExecutionError
+from .git_objects import git_objects
+from .process import run_process
+from .worktrees import git
+
+
+@dataclass
+class StatusEntry:
+    path: str
+    index: str
+    worktree: str
+    kind: str
+    original_path: str | None = None
+    submodule: bool = False
+
+
+@dataclass
+class GitStatus:
+    branch: str | None = None
+    oid: str | None = None
+    upstream: str | None = None
+    ahead: int = 0
+    behind: int = 0
+    entries: list[StatusEntry] = field(default_factory=list)
+
+    @property
+    def staged(self) -> list[StatusEntry]:
+        return [e for e in self.entries if e.kind in ("changed", "renamed") and e.index != "."]
+
+    @property
+    def unstaged(self) -> list[StatusEntry]:
+        return [e for e in self.entries if e.kind in ("changed", "renamed") and e.worktree != "."]
+
+    @property
+    def conflicted(self) -> list[StatusEntry]:
+        return [e for e in self.entries if e.kind == "conflict"]
+
+    @property
+    def untracked(self) -> list[StatusEntry]:
+        return [e for e in self.entries if e.kind == "untracked"]
+
+    @property
+    def renamed(self) -> list[StatusEntry]:
+        return [e for e in self.entries if e.kind == "renamed"]
+
+    @property
+    def clean(self) -> bool:
+        return not any(e.kind != "ignored" for e in self.entries)
+
+
+def parse_status_v2(output: str) -> GitStatus:
+    # `git status --porcelain=v2 --branch -z`: NUL-terminated records, renames carry an extra
+    # NUL-terminated original path
+    status = GitStatus()
+    records = output.split("\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+        if record.startswith("# "):
+            key, _, value = record[2:].partition(" ")
+            if key == "branch.oid":
+                status.oid = None if value == "(initial)" else value
+            elif key == "branch.head":
+                status.branch = None if value == "(detached)" else value
+            elif key == "branch.upstream":
+                status.upstream = value
+            elif key == "branch.ab":
+                ahead, behind = value.split()
+                status.ahead, status.behind = int(ahead), -int(behind)
+            continue
+
+        kind = record[0]
+        if kind == "1":
+            fields = record.split(" ", 8)
+            status.entries.append(StatusEntry(fields[8], fields[1][0], fields[1][1], "changed", submodule=fields[2] != "N..."))
+        elif kind == "2":
+            fields = record.split(" ", 9)
+            status.entries.append(StatusEntry(
+                fields[9], fields[1][0], fields[1][1], "renamed",
+                original_path=records[i], submodule=fields[2] != "N...",
+            ))
+            i += 1
+        elif kind == "u":
+            fields = record.split(" ", 10)
+            status.entries.append(StatusEntry(fields[10], fields[1][0], fields[1][1], "conflict"))
+        elif kind == "?":
+            status.entries.append(StatusEntry(record[2:], "?", "?", "untracked"))
+        elif kind == "!":
+            status.entries.append(StatusEntry(record[2:], "!", "!", "ignored"))
+    return status
+
+
+@dataclass
+class CachedStatus:
+    key: tuple
+    generation: int
+    created: float
+    status: GitStatus
+
+
+class GitStatusCache:
+    # A status stays valid while .git/index and HEAD are unchanged and no tool that can modify the
+    # workspace has run since; the TTL bounds staleness from edits made outside the server
+
+    def __init__(self, ttl: float = GIT_STATUS_CACHE_TTL):
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: dict[tuple, CachedStatus] = {}
+        self._index_paths: dict[str, Path] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self) -> None:
+        self.generation += 1
+
+    async def _index_path(self, repo: Path) -> Path:
+        key = str(repo.resolve())
+        if key not in self._index_paths:
+            path = (await git(repo, "rev-parse", "--path-format=absolute", "--git-path", "index")).strip()
+            self._index_paths[key] = Path(path)
+        return self._index_paths[key]
+
+    async def _fingerprint(self, repo: Path) -> tuple:
+        try:
+            stat = os.stat(await self._index_path(repo))
+            index = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            index = None
+        try:
+            head = (await git_objects.resolve(repo, "HEAD")).oid
+        except Exception:
+            head = None
+        return index, head
+
+    async def get(self, repo: Path, untracked: str = "normal", ignored: bool = False, refresh: bool = False) -> tuple[GitStatus, bool]:
+        key = (str(repo.resolve()), untracked, ignored)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            fingerprint = await self._fingerprint(repo)
+            cached = self._entries.get(key)
+            if (
+                not refresh
+                and cached is not None
+                and cached.key == fingerprint
+                and cached.generation == self.generation
+                and time.monotonic() - cached.created < self.ttl
+            ):
+                self.hits += 1
+                return cached.status, True
+            self.misses += 1
+
+            generation = self.generation
+            cmd = ["git", "status", "--porcelain=v2", "--branch", "-z", f"--untracked-files={untracked}"]
+            if ignored:
+                cmd.append("--ignored")
+            result = await run_process(cmd, cwd=repo, timeout=None, max_output=None)
+            if not result.ok:
+                raise CommandExecutionError(result.stderr.strip() or "git status failed")
+            status = parse_status_v2(result.stdout)
+            # git status may refresh the index itself, so fingerprint after it ran
+            self._entries[key] = CachedStatus(await self._fingerprint(repo), generation, time.monotonic(), status)
+            return status, False
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+async def configure_fast_status(repo: Path) -> list[str]:
+    # Untracked cache works everywhere; the builtin fsmonitor daemon only on platforms git supports
+    notes = []
+    await git(repo, "config", "core.untrackedCache", "true")
+    await git(repo, "update-index", "--untracked-cache")
+    notes.append("core.untrackedCache enabled")
+
+    probe = await run_process(["git", "fsmonitor--daemon", "status"], cwd=repo, timeout=30)
+    if "not supported" in probe.stderr or "is not a git command" in probe.stderr:
+        notes.append("builtin fsmonitor is not supported by this git build or platform; left disabled")
+        return notes
+    await git(repo, "config", "core.fsmonitor", "true")
+    if probe.returncode != 0:
+        start = await run_process(["git", "fsmonitor--daemon", "start"], cwd=repo, timeout=30)
+        if not start.ok:
+            notes.append(f"core.fsmonitor enabled, but the daemon did not start: {start.stderr.strip()}")
+            return notes
+    notes.append("core.fsmonitor enabled and daemon running")
+    return notes
+
+
+git_status_cache = GitStatusCache()
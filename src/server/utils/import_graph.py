@@ -0,0 +1,221 @@
+import ast
+import asyncio
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from src.shared import OUTLINE_INLINE_THRESHOLD, logger
+from .file_utils import collect_project_files, read_file
+from .process import run_process
+from .testing import is_test_file
+from .workers import get_process_pool, batched
+from .worktrees import git
+
+
+# Changing any of these can change which tests run or how, so they affect the whole suite
+PYTEST_CONFIG_FILES = {"pytest.ini", "pyproject.toml", "setup.cfg", "tox.ini"}
+
+DIFF_PATH = re.compile(r"^(?:\+\+\+ b/|--- a/|rename (?:from|to) )(.+?)\t?$")
+
+
+@dataclass
+class ModuleImports:
+    path: str
+    mtime_ns: int
+    size: int
+    imports: list[str] = field(default_factory=list)
+    error: str | None = None
+
+
+def package_name(path: Path) -> str:
+    # Dotted name as Python sees it: walk up while the directory is a package
+    parts = [] if path.stem == "__init__" else [path.stem]
+    directory = path.parent
+    while (directory / "__init__.py").exists():
+        parts.insert(0, directory.name)
+        directory = directory.parent
+    return ".".join(parts)
+
+
+def extract_imports(tree: ast.Module, name: str, is_package: bool) -> list[str]:
+    # Every module an import statement may execute: `import a.b.c` runs a, a.b and a.b.c, and
+    # `from a import b` may be importing the submodule a.b
+    package = name if is_package else name.rpartition(".")[0]
+    targets = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            targets.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package.split(".") if package else []
+                if node.level > 1:
+                    base = base[:len(base) - node.level + 1]
+                module = ".".join(filter(None, [*base, node.module or ""]))
+            else:
+                module = node.module or ""
+            if module:
+                targets.append(module)
+            targets.extend(f"{module}.{alias.name}" if module else alias.name for alias in node.names if alias.name != "*")
+
+    candidates = []
+    for target in targets:
+        parts = target.split(".")
+        candidates.extend(".".join(parts[:i]) for i in range(1, len(parts) + 1))
+    return list(dict.fromkeys(candidates))
+
+
+def scan_file(path: str, mtime_ns: int, size: int) -> ModuleImports:
+    filepath = Path(path)
+    try:
+        tree = ast.parse(read_file(filepath), filename=path)
+        imports = extract_imports(tree, package_name(filepath), filepath.stem == "__init__")
+        return ModuleImports(path, mtime_ns, size, imports)
+    except SyntaxError as e:
+        return ModuleImports(path, mtime_ns, size, error=f"syntax error at line {e.lineno}: {e.msg}")
+    except Exception as e:
+        return ModuleImports(path, mtime_ns, size, error=str(e))
+
+
+def scan_files(jobs: list[tuple[str, int, int]]) -> list[ModuleImports]:
+    return [scan_file(*job) for job in jobs]
+
+
+class ImportGraph:
+
+    def __init__(self, project_root: Path):
+        # Resolved so keys match paths that went through PathValidator
+        self.project_root = project_root.resolve()
+        self._modules: dict[str, ModuleImports] = {}
+        self._names: dict[str, list[str]] = {}
+        self._dependents: dict[str, set[str]] = {}
+        self._lock = asyncio.Lock()
+        self.rescanned = 0
+
+    def _module_names(self, path: Path) -> list[str]:
+        # The package-qualified name, plus the root-relative one for rootdir-style imports
+        names = [package_name(path)]
+        relative = path.relative_to(self.project_root).with_suffix("")
+        parts = relative.parts[:-1] if relative.name == "__init__" else relative.parts
+        names.append(".".join(parts))
+        return [name for name in dict.fromkeys(names) if name]
+
+    async def refresh(self) -> None:
+        files = [f for f in collect_project_files(self.project_root) if f.suffix == ".py"]
+
+        async with self._lock:
+            stale = []
+            for filepath in files:
+                try:
+                    stat = filepath.stat()
+                except OSError:
+                    continue
+                cached = self._modules.get(str(filepath))
+                if cached is None or cached.mtime_ns != stat.st_mtime_ns or cached.size != stat.st_size:
+                    stale.append((str(filepath), stat.st_mtime_ns, stat.st_size))
+
+            present = {str(f) for f in files}
+            removed = [path for path in self._modules if path not in present]
+            for path in removed:
+                del self._modules[path]
+
+            if stale:
+                logger.debug(f"Scanning imports of {len(stale)} changed file(s) under {self.project_root}")
+                for module in await self._scan_many(stale):
+                    self._modules[module.path] = module
+                self.rescanned += len(stale)
+
+            if stale or removed or not self._dependents:
+                self._rebuild()
+
+    async def _scan_many(self, jobs: list[tuple[str, int, int]]) -> list[ModuleImports]:
+        if len(jobs) <= OUTLINE_INLINE_THRESHOLD:
+            return scan_files(jobs)
+
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, scan_files, batch) for batch in batched(jobs)
+        ))
+        return [module for batch in results for module in batch]
+
+    def _rebuild(self) -> None:
+        # Edges are cheap to recompute from the cached per-file imports; only parsing is incremental
+        self._names = {}
+        for path in self._modules:
+            for name in self._module_names(Path(path)):
+                self._names.setdefault(name, []).append(path)
+
+        # Ambiguous names (same-named modules in separate rootdir-style test folders) link to all matches
+        self._dependents = {path: set() for path in self._modules}
+        for path, module in self._modules.items():
+            for name in module.imports:
+                for target in self._names.get(name, ()):
+                    if target != path:
+                        self._dependents[target].add(path)
+
+        # conftest.py files apply to every test module below them
+        tests = [path for path in self._modules if is_test_file(path)]
+        for path in self._modules:
+            if os.path.basename(path) == "conftest.py":
+                prefix = os.path.dirname(path) + os.sep
+                self._dependents[path].update(test for test in tests if test.startswith(prefix))
+
+    def dependents(self, changed: list[Path]) -> set[str]:
+        seen = {str(path) for path in changed if str(path) in self._dependents}
+        # A deleted module is gone from the graph, but whatever still imports it is affected
+        for path in changed:
+            if path.suffix == ".py" and not path.exists():
+                names = set(self._module_names(path))
+                seen.update(p for p, module in self._modules.items() if names.intersection(module.imports))
+        queue = deque(seen)
+        while queue:
+            for dependent in self._dependents[queue.popleft()]:
+                if dependent not in seen:
+                    seen.add(dependent)
+                    queue.append(dependent)
+        return seen
+
+    def affected_tests(self, changed: list[Path]) -> tuple[list[str], list[str]]:
+        # Returns (test files to run, changed files the graph cannot account for)
+        if any(path.name in PYTEST_CONFIG_FILES and path.parent == self.project_root for path in changed):
+            return sorted(path for path in self._modules if is_test_file(path)), []
+        unknown = [
+            str(path) for path in changed
+            if str(path) not in self._modules and (path.suffix != ".py" or path.exists())
+        ]
+        return sorted(path for path in self.dependents(changed) if is_test_file(path)), unknown
+
+    def errors(self) -> dict[str, str]:
+        return {path: module.error for path, module in self._modules.items() if module.error}
+
+    def stats(self) -> dict:
+        return {
+            "modules": len(self._modules),
+            "edges": sum(len(dependents) for dependents in self._dependents.values()),
+            "rescanned": self.rescanned,
+        }
+
+
+def paths_from_diff(diff: str, prefix: str = "") -> list[str]:
+    # git names files from the repository top level; prefix is the project root's place in it
+    paths = []
+    for line in diff.splitlines():
+        match = DIFF_PATH.match(line)
+        if match and match.group(1) != "/dev/null":
+            path = match.group(1)
+            paths.append(path[len(prefix):] if prefix and path.startswith(prefix) else path)
+    return list(dict.fromkeys(paths))
+
+
+async def repo_prefix(project_root: Path) -> str:
+    # "" both at the top level and outside a git repository
+    result = await run_process(["git", "rev-parse", "--show-prefix"], cwd=project_root, timeout=30)
+    return result.stdout.strip() if result.ok else ""
+
+
+async def changed_paths(project_root: Path, rev: str = "HEAD") -> list[str]:
+    # Tracked changes against rev (committed, staged and unstaged) plus untracked files
+    changed = await git(project_root, "diff", "--name-only", "--relative", "--no-renames", rev, "--")
+    untracked = await git(project_root, "ls-files", "--others", "--exclude-standard")
+    return list(dict.fromkeys(line for line in (changed + untracked).splitlines() if line))
@@ -0,0 +1,184 @@
+import asyncio
+import codecs
+import itertools
+import signal
+import time
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from src.shared import JOB_CONCURRENCY, MAX_FINISHED_JOBS, ResourceNotFoundError, logger
+from .output_capture import output_store
+from .process import KILL_GRACE_PERIOD, run_to_file, signal_process_group
+
+
+JOB_STATES = ("queued", "running", "succeeded", "failed", "cancelled", "timed_out")
+
+
+@dataclass
+class Job:
+    id: str
+    command: str
+    cwd: str
+    log_path: Path
+    timeout: float | None = None
+    status: str = "queued"
+    pid: int | None = None
+    returncode: int | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    cpu_user: float | None = None
+    cpu_system: float | None = None
+    max_rss_kb: int | None = None
+    error: str | None = None
+    cancel_requested: bool = False
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in ("queued", "running")
+
+    @property
+    def wall_time(self) -> float | None:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+    def summary(self) -> dict:
+        wall_time = self.wall_time
+        return {
+            "id": self.id,
+            "command": self.command,
+            "cwd": self.cwd,
+            "status": self.status,
+            "pid": self.pid,
+            "returncode": self.returncode,
+            "wall_time": round(wall_time, 3) if wall_time is not None else None,
+            "cpu_user": round(self.cpu_user, 3) if self.cpu_user is not None else None,
+            "cpu_system": round(self.cpu_system, 3) if self.cpu_system is not None else None,
+            "max_rss_kb": self.max_rss_kb,
+            "output_bytes": self.log_path.stat().st_size if self.log_path.exists() else 0,
+            "error": self.error,
+        }
+
+
+class JobManager:
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY, max_finished: int = MAX_FINISHED_JOBS):
+        self.concurrency = concurrency
+        self.max_finished = max_finished
+        self._jobs: dict[str, Job] = {}
+        self._ids = itertools.count(1)
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return self._semaphores[loop]
+
+    def start(self, command: str, cwd: Path, timeout: float | None = None) -> Job:
+        job_id = f"job-{next(self._ids)}"
+        job = Job(
+            id=job_id,
+            command=command,
+            cwd=str(cwd),
+            log_path=output_store.directory / f"{job_id}.log",
+            timeout=timeout,
+        )
+        job.log_path.touch()
+        self._jobs[job_id] = job
+        job.task = asyncio.create_task(self._run(job))
+        self._prune()
+        return job
+
+    async def _run(self, job: Job) -> None:
+        def started(pid: int) -> None:
+            job.pid = pid
+            job.status = "running"
+            job.started_at = time.time()
+
+        try:
+            async with self._semaphore():
+                if job.cancel_requested:
+                    job.status = "cancelled"
+                    return
+                result = await run_to_file(
+                    job.command, job.log_path, cwd=job.cwd, timeout=job.timeout, on_start=started
+                )
+            job.returncode = result.returncode
+            job.cpu_user = result.cpu_user
+            job.cpu_system = result.cpu_system
+            job.max_rss_kb = result.max_rss_kb
+            if job.cancel_requested:
+                job.status = "cancelled"
+            elif result.timed_out:
+                job.status = "timed_out"
+            else:
+                job.status = "succeeded" if result.returncode == 0 else "failed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            logger.debug(f"Job {job.id} '{job.command[:80]}' finished: {job.status}")
+
+    def get(self, job_id: str) -> Job:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise ResourceNotFoundError(f"No job with id '{job_id}'")
+        return job
+
+    def list(self) -> list[Job]:
+        return list(reversed(self._jobs.values()))
+
+    def read_output(self, job_id: str, offset: int = 0, max_bytes: int = 64 * 1024) -> tuple[str, int, int]:
+        job = self.get(job_id)
+        with open(job.log_path, "rb") as f:
+            size = f.seek(0, 2)
+            offset = min(max(0, offset), size)
+            f.seek(offset)
+            data = f.read(max_bytes)
+        # An incremental decoder holds back a trailing partial UTF-8 character for the next read
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        text = decoder.decode(data, final=len(data) < max_bytes)
+        pending = len(decoder.getstate()[0])
+        return text, offset + len(data) - pending, size
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if job.finished:
+            return job
+        job.cancel_requested = True
+        if job.pid is not None:
+            signal_process_group(job.pid, signal.SIGTERM)
+            loop = asyncio.get_running_loop()
+            loop.call_later(KILL_GRACE_PERIOD, self._kill_if_running, job)
+        elif job.task is not None:
+            job.task.cancel()
+        return job
+
+    def _kill_if_running(self, job: Job) -> None:
+        if job.status == "running" and job.pid is not None:
+            signal_process_group(job.pid, signal.SIGKILL)
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+            job.log_path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            "concurrency_limit": self.concurrency,
+            "jobs": counts,
+            "cpu_time": round(sum((job.cpu_user or 0) + (job.cpu_system or 0) for job in self._jobs.values()), 3),
+        }
+
+
+job_manager = JobManager()
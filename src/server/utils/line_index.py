@@ -0,0 +1,237 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from src.shared import CACHE_DIR, LINE_INDEX_CHECKPOINT, FileAccessError, logger
+
+
+INDEX_DIR = CACHE_DIR / "line_index"
+
+# Bytes hashed at each end of the indexed region to tell appends from in-place rewrites
+EDGE_CHECK_BYTES = 4096
+
+
+@dataclass
+class LineIndex:
+    path: str
+    inode: int
+    size: int
+    mtime_ns: int
+    checkpoint_every: int = LINE_INDEX_CHECKPOINT
+    total_lines: int = 0
+    # offsets[i] is the byte offset where line (i * checkpoint_every + 1) starts
+    offsets: list[int] = field(default_factory=lambda: [0])
+    edges: str = ""
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return (
+            self.inode == stat.st_ino
+            and self.size == stat.st_size
+            and self.mtime_ns == stat.st_mtime_ns
+        )
+
+    def _edges(self, mm: mmap.mmap, size: int) -> str:
+        digest = hashlib.sha1(mm[:min(EDGE_CHECK_BYTES, size)])
+        digest.update(mm[max(0, size - EDGE_CHECK_BYTES):size])
+        # A rewrite that shifts content moves checkpoints off line starts
+        digest.update(bytes(mm[offset - 1] for offset in self.offsets if offset))
+        return digest.hexdigest()
+
+    def can_extend(self, mm: mmap.mmap, stat: os.stat_result) -> bool:
+        # Append-only growth (typical for logs) lets us resume from the last checkpoint. Editors and
+        # write_file rewrite in place on the same inode, so the already-indexed bytes must be unchanged
+        return (
+            self.inode == stat.st_ino
+            and stat.st_size >= self.size
+            and bool(self.edges)
+            and self._edges(mm, self.size) == self.edges
+        )
+
+    def update(self, mm: mmap.mmap, stat: os.stat_result) -> None:
+        size = stat.st_size
+        n = self.checkpoint_every
+        pos = self.offsets[-1]
+        line = (len(self.offsets) - 1) * n + 1
+
+        while True:
+            nl = mm.find(b"\n", pos)
+            if nl == -1:
+                break
+            pos = nl + 1
+            line += 1
+            if pos < size and (line - 1) % n == 0:
+                self.offsets.append(pos)
+
+        self.total_lines = line if pos < size else line - 1
+        self.inode = stat.st_ino
+        self.size = size
+        self.mtime_ns = stat.st_mtime_ns
+        self.edges = self._edges(mm, size)
+
+    def line_offset(self, mm: mmap.mmap, line: int) -> int:
+        checkpoint = (line - 1) // self.checkpoint_every
+        pos = self.offsets[checkpoint]
+        for _ in range((line - 1) - checkpoint * self.checkpoint_every):
+            pos = mm.find(b"\n", pos) + 1
+        return pos
+
+
+_indexes: dict[str, LineIndex] = {}
+
+
+def _index_file(filepath: Path) -> Path:
+    digest = hashlib.sha1(str(filepath).encode("utf-8")).hexdigest()
+    return INDEX_DIR / f"{digest}.json"
+
+
+def _load_index(filepath: Path) -> LineIndex | None:
+    index_file = _index_file(filepath)
+    if not index_file.exists():
+        return None
+    try:
+        index = LineIndex(**json.loads(index_file.read_text(encoding="utf-8")))
+    except (OSError, ValueError, TypeError) as e:
+        logger.debug(f"Discarding unreadable line index {index_file}: {e}")
+        return None
+    if index.path != str(filepath) or index.checkpoint_every != LINE_INDEX_CHECKPOINT:
+        return None
+    return index
+
+
+def _save_index(index: LineIndex) -> None:
+    try:
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        index_file = _index_file(Path(index.path))
+        # Views run in worker threads, so concurrent saves must not share a temp file
+        tmp_file = index_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_file.write_text(json.dumps(asdict(index)), encoding="utf-8")
+        tmp_file.replace(index_file)
+    except OSError as e:
+        logger.debug(f"Could not persist line index for {index.path}: {e}")
+
+
+def get_line_index(filepath: Path, mm: mmap.mmap | None, stat: os.stat_result, persist: bool = True) -> LineIndex:
+    key = str(filepath)
+    if mm is None:
+        return LineIndex(path=key, inode=stat.st_ino, size=0, mtime_ns=stat.st_mtime_ns)
+
+    index = _indexes.get(key) or (_load_index(filepath) if persist else None)
+
+    if index is not None and index.matches(stat):
+        _indexes[key] = index
+        return index
+
+    if index is None or not index.can_extend(mm, stat):
+        index = LineIndex(path=key, inode=stat.st_ino, size=0, mtime_ns=0)
+
+    index.update(mm, stat)
+    _indexes[key] = index
+    if persist:
+        _save_index(index)
+    return index
+
+
+def _decode(raw: bytes, max_length: int) -> str:
+    text = raw.rstrip(b"\r").decode("utf-8", errors="replace")
+    if len(text) > max_length:
+        return text[:max_length] + f"... [{len(text) - max_length} more chars]"
+    return text
+
+
+class FileViewer:
+
+    def __init__(self, filepath: Path, max_line_length: int, persist_index: bool = True):
+        self.filepath = filepath
+        self.max_line_length = max_line_length
+        # Off for short-lived files (e.g. spilled command output) whose index would outlive them
+        self.persist_index = persist_index
+
+    def __enter__(self) -> "FileViewer":
+        if not self.filepath.is_file():
+            raise FileAccessError(f"File '{self.filepath}' does not exist or is not a file.")
+        self._file = open(self.filepath, "rb")
+        self.stat = os.fstat(self._file.fileno())
+        self.mm = None
+        if self.stat.st_size > 0:
+            self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.mm is not None:
+            self.mm.close()
+        self._file.close()
+
+    @property
+    def index(self) -> LineIndex:
+        return get_line_index(self.filepath, self.mm, self.stat, self.persist_index)
+
+    def lines(self, start: int, end: int) -> list[tuple[int, str]]:
+        if self.mm is None:
+            return []
+        index = self.index
+        end = min(end, index.total_lines)
+        if start > end:
+            return []
+
+        size = self.stat.st_size
+        pos = index.line_offset(self.mm, start)
+        result = []
+        for line_num in range(start, end + 1):
+            nl = self.mm.find(b"\n", pos)
+            if nl == -1:
+                nl = size
+            result.append((line_num, _decode(self.mm[pos:nl], self.max_line_length)))
+            pos = nl + 1
+        return result
+
+    def tail(self, count: int) -> list[tuple[int, str]]:
+        if self.mm is None:
+            return []
+        end = self.stat.st_size
+        if self.mm[end - 1:end] == b"\n":
+            end -= 1
+
+        raw_lines = []
+        while len(raw_lines) < count:
+            nl = self.mm.rfind(b"\n", 0, end)
+            raw_lines.append(self.mm[nl + 1:end])
+            if nl == -1:
+                break
+            end = nl
+        raw_lines.reverse()
+
+        # Line numbers are only known once the file has been indexed
+        cached = _indexes.get(str(self.filepath)) or _load_index(self.filepath)
+        if cached is not None and (cached.matches(self.stat) or cached.can_extend(self.mm, self.stat)):
+            first = self.index.total_lines - len(raw_lines) + 1
+        else:
+            first = 0
+
+        return [
+            (first + i if first else 0, _decode(raw, self.max_line_length))
+            for i, raw in enumerate(raw_lines)
+        ]
+
+    def grep(self, regex: re.Pattern, start: int, end: int, max_results: int) -> list[tuple[int, str]]:
+        if self.mm is None or max_results <= 0:
+            return []
+        index = self.index
+        end = min(end, index.total_lines)
+        size = self.stat.st_size
+        pos = index.line_offset(self.mm, start) if start <= end else size
+        result = []
+        for line_num in range(start, end + 1):
+            nl = self.mm.find(b"\n", pos)
+            if nl == -1:
+                nl = size
+            text = self.mm[pos:nl].rstrip(b"\r").decode("utf-8", errors="replace")
+            if regex.search(text):
+                result.append((line_num, _decode(self.mm[pos:nl], self.max_line_length)))
+                if len(result) >= max_results:
+                    break
+            pos = nl + 1
+        return result
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from .process import run_process
+
+
+RUFF_CONFIG_FILES = ("pyproject.toml", "ruff.toml", ".ruff.toml")
+
+# Files per ruff invocation; keeps the argument list well under OS limits
+RUFF_BATCH_SIZE = 500
+
+RUFF_TIMEOUT = 300
+
+SEVERITIES = ("error", "warning", "info")
+
+
+@dataclass
+class Diagnostic:
+    code: str
+    message: str
+    row: int
+    column: int
+    severity: str
+    fixable: bool = False
+
+
+def classify_severity(code: str | None) -> str:
+    # ruff reports every violation as an error, so rank by rule family instead
+    if not code or code.startswith(("E9", "F")):
+        return "error"
+    if code.startswith(("E", "W")):
+        return "warning"
+    return "info"
+
+
+def parse_ruff_json(output: str) -> dict[str, list[Diagnostic]]:
+    diagnostics: dict[str, list[Diagnostic]] = {}
+    for item in json.loads(output or "[]"):
+        code = item.get("code") or "syntax-error"
+        location = item.get("location") or {}
+        diagnostics.setdefault(str(Path(item["filename"]).resolve()), []).append(Diagnostic(
+            code=code,
+            message=item.get("message", ""),
+            row=location.get("row", 0),
+            column=location.get("column", 0),
+            severity=classify_severity(item.get("code")),
+            fixable=item.get("fix") is not None,
+        ))
+    return diagnostics
+
+
+def ruff_config_hash(project_root: Path, extra_args: list[str]) -> str:
+    digest = hashlib.sha256(" ".join(extra_args).encode("utf-8"))
+    for name in RUFF_CONFIG_FILES:
+        config = project_root / name
+        if config.is_file():
+            digest.update(name.encode("utf-8"))
+            digest.update(config.read_bytes())
+    return digest.hexdigest()
+
+
+class LintCache:
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._entries: dict[tuple[str, str, str], list[Diagnostic]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, content_hash: str, config_hash: str) -> list[Diagnostic] | None:
+        # The path is part of the key because per-file-ignores make results path dependent
+        with self._lock:
+            result = self._entries.get((path, content_hash, config_hash))
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def put(self, path: str, content_hash: str, config_hash: str, diagnostics: list[Diagnostic]) -> None:
+        with self._lock:
+            self._entries.pop((path, content_hash, config_hash), None)
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[(path, content_hash, config_hash)] = diagnostics
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+lint_cache = LintCache()
+
+
+async def _run_ruff(files: list[str], project_root: Path, extra_args: list[str]) -> str:
+    result = await run_process(
+        ["ruff", "check", "--output-format", "json", "--no-fix", "--exit-zero", *extra_args, *files],
+        cwd=project_root,
+        timeout=RUFF_TIMEOUT,
+        max_output=None,
+    )
+    if not result.ok:
+        raise RuntimeError(result.stderr or f"ruff exited with code {result.returncode}")
+    return result.stdout
+
+
+async def lint_files(
+    files: list[Path],
+    project_root: Path,
+    extra_args: list[str] | None = None
+) -> tuple[dict[str, list[Diagnostic]], int]:
+    extra_args = extra_args or []
+    config_hash = ruff_config_hash(project_root, extra_args)
+    results: dict[str, list[Diagnostic]] = {}
+    pending: dict[str, str] = {}
+
+    for filepath in files:
+        key = str(filepath)
+        digest = hashlib.sha256(filepath.read_bytes()).hexdigest()
+        cached = lint_cache.get(key, digest, config_hash)
+        if cached is None:
+            pending[key] = digest
+        else:
+            results[key] = cached
+
+    paths = list(pending)
+    for start in range(0, len(paths), RUFF_BATCH_SIZE):
+        batch = paths[start:start + RUFF_BATCH_SIZE]
+        found = parse_ruff_json(await _run_ruff(batch, project_root, extra_args))
+        for key in batch:
+            diagnostics = found.get(str(Path(key).resolve()), [])
+            lint_cache.put(key, pending[key], config_hash, diagnostics)
+            results[key] = diagnostics
+
+    return results, len(pending)
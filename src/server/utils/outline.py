@@ -0,0 +1,78 @@
+import ast
+import asyncio
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from src.shared import OUTLINE_INLINE_THRESHOLD, logger
+from .ast_cache import Definition, collect_definitions
+from .file_utils import collect_project_files, read_file
+from .workers import get_process_pool, batched
+
+
+@dataclass
+class ModuleOutline:
+    path: str
+    mtime_ns: int
+    size: int
+    definitions: list[Definition] = field(default_factory=list)
+    error: str | None = None
+
+
+def outline_file(path: str, mtime_ns: int, size: int) -> ModuleOutline:
+    try:
+        tree = ast.parse(read_file(Path(path)), filename=path)
+        return ModuleOutline(path, mtime_ns, size, collect_definitions(tree))
+    except SyntaxError as e:
+        return ModuleOutline(path, mtime_ns, size, error=f"syntax error at line {e.lineno}: {e.msg}")
+    except Exception as e:
+        return ModuleOutline(path, mtime_ns, size, error=str(e))
+
+
+def outline_files(jobs: list[tuple[str, int, int]]) -> list[ModuleOutline]:
+    return [outline_file(*job) for job in jobs]
+
+
+class ProjectOutliner:
+
+    def __init__(self, project_root: Path):
+        self.project_root = project_root
+        self._modules: dict[str, ModuleOutline] = {}
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, directory: Path | None = None) -> list[ModuleOutline]:
+        root = directory or self.project_root
+        files = [f for f in collect_project_files(root) if f.suffix == ".py"]
+
+        async with self._lock:
+            stale = []
+            for filepath in files:
+                try:
+                    stat = filepath.stat()
+                except OSError:
+                    continue
+                cached = self._modules.get(str(filepath))
+                if cached is None or cached.mtime_ns != stat.st_mtime_ns or cached.size != stat.st_size:
+                    stale.append((str(filepath), stat.st_mtime_ns, stat.st_size))
+
+            present = {str(f) for f in files}
+            root_prefix = str(root) + os.sep
+            for path in [p for p in self._modules if p.startswith(root_prefix) and p not in present]:
+                del self._modules[path]
+
+            if stale:
+                logger.debug(f"Outlining {len(stale)} changed file(s) under {root}")
+                for outline in await self._outline_many(stale):
+                    self._modules[outline.path] = outline
+
+            return [self._modules[path] for path in sorted(present) if path in self._modules]
+
+    async def _outline_many(self, jobs: list[tuple[str, int, int]]) -> list[ModuleOutline]:
+        if len(jobs) <= OUTLINE_INLINE_THRESHOLD:
+            return [outline_file(*job) for job in jobs]
+
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, outline_files, batch) for batch in batched(jobs)
+        ))
+        return [outline for batch in results for outline in batch]
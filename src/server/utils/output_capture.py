@@ -0,0 +1,154 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from src.shared import MAX_SPILLED_OUTPUTS, ResourceNotFoundError
+
+
+class OutputStore:
+
+    def __init__(self, max_entries: int = MAX_SPILLED_OUTPUTS):
+        self.max_entries = max_entries
+        self._directory: Path | None = None
+        self._entries: OrderedDict[str, dict[str, Path]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is None:
+            self._directory = Path(tempfile.mkdtemp(prefix="code-buddy-output-"))
+            atexit.register(self._cleanup_at_exit, os.getpid())
+        return self._directory
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex[:12]
+
+    def path_for(self, output_id: str, stream: str) -> Path:
+        return self.directory / f"{output_id}.{stream}.log"
+
+    def register(self, output_id: str, stream: str, path: Path) -> None:
+        with self._lock:
+            self._entries.setdefault(output_id, {})[stream] = path
+            self._entries.move_to_end(output_id)
+            while len(self._entries) > self.max_entries:
+                _, streams = self._entries.popitem(last=False)
+                for old_path in streams.values():
+                    old_path.unlink(missing_ok=True)
+
+    def get(self, output_id: str, stream: str) -> Path:
+        with self._lock:
+            streams = self._entries.get(output_id)
+        if not streams:
+            raise ResourceNotFoundError(f"No saved output with id '{output_id}' (it may have been evicted)")
+        if stream not in streams:
+            available = ", ".join(sorted(streams))
+            raise ResourceNotFoundError(f"Output '{output_id}' has no saved {stream}; available: {available}")
+        return streams[stream]
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"output_id": output_id, "streams": sorted(streams)}
+                for output_id, streams in reversed(self._entries.items())
+            ]
+
+    def cleanup(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._directory is not None:
+                shutil.rmtree(self._directory, ignore_errors=True)
+                self._directory = None
+
+    def _cleanup_at_exit(self, owner: int) -> None:
+        # Forked children inherit atexit handlers; only the process that made the directory removes it
+        if os.getpid() == owner:
+            self.cleanup()
+
+
+output_store = OutputStore()
+
+
+class HeadTailBuffer:
+
+    def __init__(self, head_limit: int, tail_limit: int, output_id: str, stream: str):
+        self.head_limit = head_limit
+        self.tail_limit = tail_limit
+        self.output_id = output_id
+        self.stream = stream
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.size = 0
+        self.spill_path: Path | None = None
+        self._spill_file = None
+
+    @classmethod
+    def from_file(cls, path: Path, head_limit: int, tail_limit: int, output_id: str, stream: str) -> "HeadTailBuffer":
+        # For output a child already wrote to disk: keep the file itself only if it overflows
+        buffer = cls(head_limit, tail_limit, output_id, stream)
+        with open(path, "rb") as f:
+            buffer.size = f.seek(0, 2)
+            f.seek(0)
+            buffer.head += f.read(head_limit)
+            tail_size = min(tail_limit, buffer.size - len(buffer.head))
+            f.seek(buffer.size - tail_size)
+            buffer.tail += f.read(tail_size)
+        if buffer.dropped:
+            buffer.spill_path = path
+            output_store.register(output_id, stream, path)
+        else:
+            path.unlink(missing_ok=True)
+        return buffer
+
+    @property
+    def dropped(self) -> int:
+        return self.size - len(self.head) - len(self.tail)
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if len(self.head) < self.head_limit:
+            room = self.head_limit - len(self.head)
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+            if not chunk:
+                return
+
+        if self._spill_file is not None:
+            self._spill_file.write(chunk)
+        self.tail += chunk
+
+        if len(self.tail) > self.tail_limit:
+            if self._spill_file is None:
+                # First overflow: everything seen so far is still in head + tail
+                self.spill_path = output_store.path_for(self.output_id, self.stream)
+                self._spill_file = open(self.spill_path, "wb")
+                self._spill_file.write(self.head)
+                self._spill_file.write(self.tail)
+            del self.tail[:len(self.tail) - self.tail_limit]
+
+    def close(self) -> None:
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+            output_store.register(self.output_id, self.stream, self.spill_path)
+
+    def text(self) -> str:
+        head = self.head.decode("utf-8", errors="replace")
+        if not self.dropped:
+            return head + self.tail.decode("utf-8", errors="replace")
+        # Snap both ends to line boundaries so no half lines are shown
+        head_end = self.head.rfind(b"\n")
+        if head_end != -1:
+            head = self.head[:head_end + 1].decode("utf-8", errors="replace")
+        tail_start = self.tail.find(b"\n")
+        tail = self.tail[tail_start + 1:].decode("utf-8", errors="replace")
+        marker = (
+            f"... [{self.dropped}+ bytes omitted; full {self.stream} saved as "
+            f"output_id='{self.output_id}', page or grep it with read_output] ...\n"
+        )
+        if not head.endswith("\n"):
+            head += "\n"
+        return head + marker + tail
@@ -0,0 +1,381 @@
+import asyncio
+import os
+import signal
+import subprocess
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from src.shared import (
+    PROCESS_CONCURRENCY,
+    PROCESS_DEFAULT_TIMEOUT,
+    PROCESS_MAX_OUTPUT,
+    OUTPUT_HEAD_BYTES,
+    OUTPUT_TAIL_BYTES,
+    logger,
+)
+from .output_capture import HeadTailBuffer, output_store
+
+
+RSS_SAMPLE_INTERVAL = 0.2
+KILL_GRACE_PERIOD = 2.0
+
+
+@dataclass
+class ProcessResult:
+    command: str
+    returncode: int | None
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+    wall_time: float = 0.0
+    max_rss_kb: int | None = None
+    stdout_dropped: int = 0
+    stderr_dropped: int = 0
+    output_id: str | None = None
+    cpu_user: float | None = None
+    cpu_system: float | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    @property
+    def output(self) -> str:
+        return "\n".join(part for part in (self.stdout, self.stderr) if part)
+
+
+class BoundedBuffer:
+
+    def __init__(self, limit: int | None):
+        self.limit = limit
+        self._chunks: list[bytes] = []
+        self.size = 0
+        self.dropped = 0
+
+    def write(self, chunk: bytes) -> None:
+        if self.limit is not None:
+            room = self.limit - self.size
+            if room <= 0:
+                self.dropped += len(chunk)
+                return
+            if len(chunk) > room:
+                self.dropped += len(chunk) - room
+                chunk = chunk[:room]
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+
+    def text(self) -> str:
+        text = b"".join(self._chunks).decode("utf-8", errors="replace")
+        if self.dropped:
+            text += f"\n... [{self.dropped} more bytes truncated]"
+        return text
+
+
+class ProcessMonitor:
+
+    def __init__(self, history: int = 50):
+        self.started = 0
+        self.running = 0
+        self.timed_out = 0
+        self.total_wall_time = 0.0
+        self.recent: deque[dict] = deque(maxlen=history)
+
+    def record(self, result: ProcessResult) -> None:
+        self.total_wall_time += result.wall_time
+        if result.timed_out:
+            self.timed_out += 1
+        self.recent.append({
+            "command": result.command[:200],
+            "returncode": result.returncode,
+            "timed_out": result.timed_out,
+            "wall_time": round(result.wall_time, 3),
+            "max_rss_kb": result.max_rss_kb,
+        })
+
+    def stats(self) -> dict:
+        slowest = sorted(self.recent, key=lambda r: r["wall_time"], reverse=True)[:5]
+        return {
+            "started": self.started,
+            "running": self.running,
+            "timed_out": self.timed_out,
+            "total_wall_time": round(self.total_wall_time, 3),
+            "concurrency_limit": PROCESS_CONCURRENCY,
+            "slowest_recent": slowest,
+        }
+
+
+process_monitor = ProcessMonitor()
+
+_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(PROCESS_CONCURRENCY)
+    return _semaphores[loop]
+
+
+def _read_peak_rss(pid: int) -> int | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _only_shell(pid: int, shell_exe: str) -> bool:
+    # The shell hasn't started (or exec'd into) the workload yet, so its RSS says nothing about it
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            if f.read().split():
+                return False
+        return os.path.realpath(f"/proc/{pid}/exe") == shell_exe
+    except OSError:
+        return False
+
+
+async def _sample_rss(process: asyncio.subprocess.Process, shell: bool, peak: list[int | None]) -> None:
+    # Current RSS of the whole tree, since a shell command's workload runs in a child of /bin/sh.
+    # Without a shell the direct child's VmHWM also covers its own peaks between samples
+    shell_exe = os.path.realpath("/bin/sh")
+    while process.returncode is None:
+        if shell and _only_shell(process.pid, shell_exe):
+            rss = None
+        else:
+            rss = _tree_rss_kb(process.pid)
+            if not shell:
+                rss = max(rss or 0, _read_peak_rss(process.pid) or 0) or None
+        if rss is not None:
+            peak[0] = max(peak[0] or 0, rss)
+        await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+
+def _tree_rss_kb(pid: int) -> int | None:
+    # Current RSS summed over the process and all of its descendants
+    total = None
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total = (total or 0) + int(line.split()[1])
+                        break
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+async def _sample_tree_rss(pid: int, peak: list[int | None]) -> None:
+    while True:
+        rss = _tree_rss_kb(pid)
+        if rss is not None:
+            peak[0] = max(peak[0] or 0, rss)
+        await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+
+async def _drain(stream: asyncio.StreamReader, sink) -> None:
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        sink.write(chunk)
+
+
+def signal_process_group(pid: int, sig: int) -> None:
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+
+def kill_process_group(process: asyncio.subprocess.Process, sig: int = signal.SIGKILL) -> None:
+    signal_process_group(process.pid, sig)
+
+
+async def terminate(process: asyncio.subprocess.Process) -> None:
+    kill_process_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), timeout=KILL_GRACE_PERIOD)
+    except asyncio.TimeoutError:
+        kill_process_group(process, signal.SIGKILL)
+        await process.wait()
+
+
+async def run_process(
+    cmd: list[str] | str,
+    cwd: Path | str | None = None,
+    timeout: float | None = PROCESS_DEFAULT_TIMEOUT,
+    max_output: int | None = PROCESS_MAX_OUTPUT,
+    env: dict | None = None,
+    stdin: bytes | None = None,
+    spill: bool = False,
+) -> ProcessResult:
+    shell = isinstance(cmd, str)
+    command = cmd if shell else " ".join(str(part) for part in cmd)
+    if spill:
+        # Keep the head and tail for the caller; the full stream goes to disk once it overflows
+        output_id = output_store.new_id()
+        stdout_buffer = HeadTailBuffer(OUTPUT_HEAD_BYTES, OUTPUT_TAIL_BYTES, output_id, "stdout")
+        stderr_buffer = HeadTailBuffer(OUTPUT_HEAD_BYTES, OUTPUT_TAIL_BYTES, output_id, "stderr")
+    else:
+        output_id = None
+        stdout_buffer = BoundedBuffer(max_output)
+        stderr_buffer = BoundedBuffer(max_output)
+
+    async with _semaphore():
+        kwargs = dict(
+            cwd=str(cwd) if cwd else None,
+            env=env,
+            stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            # Own process group so a timeout can take down the whole tree
+            start_new_session=True,
+        )
+        start = time.monotonic()
+        if shell:
+            process = await asyncio.create_subprocess_shell(cmd, **kwargs)
+        else:
+            process = await asyncio.create_subprocess_exec(*[str(part) for part in cmd], **kwargs)
+
+        process_monitor.started += 1
+        process_monitor.running += 1
+        peak_rss: list[int | None] = [None]
+        sampler = asyncio.create_task(_sample_rss(process, shell, peak_rss))
+        timed_out = False
+
+        async def communicate():
+            if stdin is not None:
+                try:
+                    process.stdin.write(stdin)
+                    await process.stdin.drain()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                process.stdin.close()
+            await asyncio.gather(
+                _drain(process.stdout, stdout_buffer),
+                _drain(process.stderr, stderr_buffer),
+            )
+            await process.wait()
+
+        task = asyncio.create_task(communicate())
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            await terminate(process)
+            try:
+                await asyncio.wait_for(task, timeout=KILL_GRACE_PERIOD)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                task.cancel()
+        except asyncio.CancelledError:
+            await terminate(process)
+            task.cancel()
+            raise
+        finally:
+            process_monitor.running -= 1
+            sampler.cancel()
+            if spill:
+                stdout_buffer.close()
+                stderr_buffer.close()
+
+    result = ProcessResult(
+        command=command,
+        returncode=process.returncode,
+        stdout=stdout_buffer.text(),
+        stderr=stderr_buffer.text(),
+        timed_out=timed_out,
+        wall_time=time.monotonic() - start,
+        max_rss_kb=peak_rss[0],
+        stdout_dropped=stdout_buffer.dropped,
+        stderr_dropped=stderr_buffer.dropped,
+        output_id=output_id if stdout_buffer.dropped or stderr_buffer.dropped else None,
+    )
+    process_monitor.record(result)
+    logger.debug(
+        f"Process '{command[:80]}' exited {result.returncode} in {result.wall_time:.2f}s "
+        f"(peak RSS {result.max_rss_kb} kB{', timed out' if timed_out else ''})"
+    )
+    return result
+
+
+async def run_to_file(
+    cmd: list[str] | str,
+    log_path: Path,
+    cwd: Path | str | None = None,
+    timeout: float | None = None,
+    env: dict | None = None,
+    on_start=None,
+) -> ProcessResult:
+    # For long-running work: output goes straight to a file and the child is reaped with
+    # wait4() so its exact CPU time (including descendants) is known. wait4's ru_maxrss would
+    # inherit this server's own high-water mark across fork+exec, so RSS is sampled instead.
+    shell = isinstance(cmd, str)
+    command = cmd if shell else " ".join(str(part) for part in cmd)
+    with open(log_path, "wb") as log:
+        popen = subprocess.Popen(
+            cmd if shell else [str(part) for part in cmd],
+            shell=shell,
+            cwd=str(cwd) if cwd else None,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+    timed_out = False
+    process_monitor.started += 1
+    process_monitor.running += 1
+    if on_start is not None:
+        on_start(popen.pid)
+
+    def expire():
+        nonlocal timed_out
+        timed_out = True
+        signal_process_group(popen.pid, signal.SIGTERM)
+        loop.call_later(KILL_GRACE_PERIOD, signal_process_group, popen.pid, signal.SIGKILL)
+
+    timer = loop.call_later(timeout, expire) if timeout else None
+    peak_rss: list[int | None] = [None]
+    sampler = asyncio.create_task(_sample_tree_rss(popen.pid, peak_rss))
+    try:
+        _, status, rusage = await asyncio.shield(loop.run_in_executor(None, os.wait4, popen.pid, 0))
+    except asyncio.CancelledError:
+        signal_process_group(popen.pid, signal.SIGKILL)
+        raise
+    finally:
+        process_monitor.running -= 1
+        sampler.cancel()
+        if timer is not None:
+            timer.cancel()
+
+    popen.returncode = os.waitstatus_to_exitcode(status)
+    result = ProcessResult(
+        command=command,
+        returncode=popen.returncode,
+        stdout="",
+        stderr="",
+        timed_out=timed_out,
+        wall_time=time.monotonic() - start,
+        max_rss_kb=peak_rss[0],
+        cpu_user=rusage.ru_utime,
+        cpu_system=rusage.ru_stime,
+    )
+    process_monitor.record(result)
+    return result
@@ -0,0 +1,218 @@
+import os
+import pstats
+import re
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from .python_pool import WORKER_FILENAME
+
+
+# Call paths carrying less than this share of total time are dropped when collapsing
+COLLAPSE_MIN_SHARE = 1e-4
+
+COLLAPSE_MAX_DEPTH = 64
+
+
+def describe_function(func: tuple[str, int, str], root: Path | None = None) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    if root is not None and filename.startswith(str(root) + os.sep):
+        filename = os.path.relpath(filename, root)
+    return f"{name} ({filename}:{lineno})"
+
+
+def load_pstats(path: Path) -> dict:
+    stats = pstats.Stats(str(path)).stats
+    # Drop the profiler's own bookkeeping and the runpy frames that launch a script
+    return {
+        func: entry for func, entry in stats.items()
+        if "_lsprof.Profiler" not in func[2] and func[0] != "<frozen runpy>"
+    }
+
+
+def pstats_rows(stats: dict, sort: str, top_n: int, root: Path | None = None) -> list[dict]:
+    column = 2 if sort == "tottime" else 3
+    ranked = sorted(stats.items(), key=lambda item: item[1][column], reverse=True)[:top_n]
+    return [
+        {
+            "function": describe_function(func, root),
+            "ncalls": nc if cc == nc else f"{nc}/{cc}",
+            "tottime": tt,
+            "cumtime": ct,
+        }
+        for func, (cc, nc, tt, ct, _) in ranked
+    ]
+
+
+def collapse_pstats(stats: dict, root: Path | None = None) -> list[str]:
+    # cProfile only records caller -> callee edges, so each function's own time is spread over
+    # its call paths in proportion to the cumulative time each caller spent in it
+    total = sum(entry[2] for entry in stats.values())
+    if not total:
+        return []
+    threshold = total * COLLAPSE_MIN_SHARE
+    folded: Counter = Counter()
+
+    def walk(func, weight: float, path: list, seen: set) -> None:
+        callers = stats[func][4] if func in stats else {}
+        callers = {caller: info for caller, info in callers.items() if caller not in seen and caller in stats}
+        caller_total = sum(info[3] for info in callers.values())
+        if not callers or len(path) >= COLLAPSE_MAX_DEPTH or not caller_total:
+            folded[";".join(describe_function(f, root) for f in reversed(path))] += weight
+            return
+        for caller, info in callers.items():
+            share = weight * info[3] / caller_total
+            if share >= threshold:
+                walk(caller, share, path + [caller], seen | {caller})
+
+    for func, entry in stats.items():
+        if entry[2] >= threshold:
+            walk(func, entry[2], [func], {func})
+
+    # flamegraph.pl wants integer counts; use microseconds
+    return [f"{stack} {round(weight * 1e6)}" for stack, weight in folded.most_common() if round(weight * 1e6)]
+
+
+def sample_rows(samples: dict[str, int], top_n: int, root: Path | None = None) -> tuple[list[dict], int]:
+    own: Counter = Counter()
+    total: Counter = Counter()
+    count = sum(samples.values())
+    for stack, hits in samples.items():
+        frames = stack.split(";")
+        own[frames[-1]] += hits
+        for frame in set(frames):
+            total[frame] += hits
+
+    def short(frame: str) -> str:
+        if root is not None:
+            return frame.replace(str(root) + os.sep, "")
+        return frame
+
+    rows = [
+        {"function": short(frame), "samples": hits, "own": own[frame], "percent": 100.0 * hits / count}
+        for frame, hits in total.most_common(top_n)
+    ]
+    return rows, count
+
+
+def collapse_samples(samples: dict[str, int], root: Path | None = None) -> list[str]:
+    prefix = str(root) + os.sep if root is not None else None
+    lines = []
+    for stack, hits in sorted(samples.items(), key=lambda item: item[1], reverse=True):
+        if prefix:
+            stack = stack.replace(prefix, "")
+        lines.append(f"{stack} {hits}")
+    return lines
+
+
+def format_bytes(size: float, signed: bool = False) -> str:
+    sign = "+" if signed and size > 0 else ""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{sign}{size:.0f} {unit}" if unit == "B" else f"{sign}{size:.1f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.2f} GiB"
+
+
+# Snapshot labels become file names; the worker gets these with the profile request so both
+# sides agree on what a label is saved as
+SNAPSHOT_LABEL_INVALID = r"[^\w.-]"
+
+BUILTIN_SNAPSHOTS = ("start", "peak", "end")
+
+
+def snapshot_label(label: str) -> str:
+    return re.sub(SNAPSHOT_LABEL_INVALID, "_", str(label))
+
+
+def load_snapshot(path: Path) -> tracemalloc.Snapshot:
+    return tracemalloc.Snapshot.load(str(path)).filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<unknown>"),
+        tracemalloc.Filter(False, WORKER_FILENAME),
+    ])
+
+
+def _location(trace_frame, root: Path | None) -> str:
+    filename = trace_frame.filename
+    if root is not None and filename.startswith(str(root) + os.sep):
+        filename = os.path.relpath(filename, root)
+    return f"{filename}:{trace_frame.lineno}"
+
+
+def allocation_rows(snapshot: tracemalloc.Snapshot, top_n: int, root: Path | None = None) -> list[dict]:
+    return [
+        {"location": _location(stat.traceback[0], root), "size": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:top_n]
+    ]
+
+
+def allocation_diff_rows(
+    before: tracemalloc.Snapshot,
+    after: tracemalloc.Snapshot,
+    top_n: int,
+    root: Path | None = None
+) -> list[dict]:
+    return [
+        {
+            "location": _location(stat.traceback[0], root),
+            "size_diff": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size": stat.size,
+        }
+        for stat in after.compare_to(before, "lineno")[:top_n]
+        if stat.size_diff or stat.count_diff
+    ]
+
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Printed by the profiled -c snippet just before the target import, to split off interpreter startup
+IMPORTTIME_MARKER = "code-buddy:importtime-start"
+
+
+@dataclass
+class ImportNode:
+    name: str
+    self_us: int
+    cumulative_us: int
+    children: list["ImportNode"] = field(default_factory=list)
+    parent: "ImportNode | None" = field(default=None, repr=False)
+
+    @property
+    def chain(self) -> list[str]:
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.name)
+            node = node.parent
+        return list(reversed(names))
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+def parse_importtime(stderr: str) -> tuple[list[ImportNode], list[ImportNode]]:
+    # -X importtime prints each module after its own imports, indented two spaces per level,
+    # so children are collected per depth until their parent line arrives
+    startup: list[ImportNode] = []
+    pending: dict[int, list[ImportNode]] = {}
+    for line in stderr.splitlines():
+        if line.strip() == IMPORTTIME_MARKER:
+            startup = pending.pop(0, [])
+            pending.clear()
+            continue
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        depth = (len(match.group(3)) - 1) // 2
+        node = ImportNode(match.group(4), int(match.group(1)), int(match.group(2)))
+        node.children = pending.pop(depth + 1, [])
+        for child in node.children:
+            child.parent = node
+        pending.setdefault(depth, []).append(node)
+    return startup, pending.get(0, [])
@@ -0,0 +1,80 @@
+# Runs pytest inside a run_tests fork-server child and writes structured results to SPEC["output"].
+# Standalone: exec'd in the project's interpreter with SPEC already defined.
+import json
+import time
+
+import pytest
+
+
+class ResultCollector:
+
+    def __init__(self):
+        self.tests = {}
+        self.collect_errors = []
+        self.collected = 0
+        self.items = []
+        self.collect_started = time.perf_counter()
+        self.collect_duration = None
+        self.cache_dir = None
+
+    def pytest_configure(self, config):
+        # Where pytest's cache plugin reads and writes (rootdir plus the cache_dir ini option);
+        # unknown when the run disables the plugin
+        cache = getattr(config, "cache", None)
+        if cache is not None:
+            self.cache_dir = str(cache._cachedir)
+
+    def pytest_collection_finish(self, session):
+        self.collected = len(session.items)
+        if SPEC.get("list_items"):
+            self.items = [item.nodeid for item in session.items]
+        self.collect_duration = time.perf_counter() - self.collect_started
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.collect_errors.append({"nodeid": report.nodeid or "<collection>", "longrepr": str(report.longrepr)})
+
+    def pytest_runtest_logreport(self, report):
+        entry = self.tests.setdefault(report.nodeid, {
+            "nodeid": report.nodeid,
+            "outcome": "passed",
+            "duration": 0.0,
+            "location": f"{report.location[0]}:{(report.location[1] or 0) + 1}",
+        })
+        entry["duration"] += report.duration
+        if report.failed:
+            # A strict XPASS is reported as a plain failure
+            entry["outcome"] = "failed" if report.when == "call" else "error"
+            entry["when"] = report.when
+            entry["longrepr"] = str(report.longrepr)
+            if report.capstdout:
+                entry["stdout"] = report.capstdout
+            if report.capstderr:
+                entry["stderr"] = report.capstderr
+        elif report.passed and report.when == "call" and hasattr(report, "wasxfail"):
+            # Non-strict XPASS: the test passed, which is not a failure
+            entry["outcome"] = "xpassed"
+        elif report.skipped and entry["outcome"] == "passed":
+            entry["outcome"] = "xfailed" if hasattr(report, "wasxfail") else "skipped"
+            if not hasattr(report, "wasxfail") and isinstance(report.longrepr, tuple):
+                entry["reason"] = report.longrepr[2]
+
+
+def main():
+    collector = ResultCollector()
+    started = time.perf_counter()
+    exit_code = pytest.main(SPEC["args"], plugins=[collector])
+    with open(SPEC["output"], "w") as f:
+        json.dump({
+            "exit_code": int(exit_code),
+            "duration": time.perf_counter() - started,
+            "collect_duration": collector.collect_duration,
+            "collected": collector.collected,
+            "items": collector.items,
+            "tests": list(collector.tests.values()),
+            "collect_errors": collector.collect_errors,
+            "cache_dir": collector.cache_dir,
+        }, f)
+
+
+main()
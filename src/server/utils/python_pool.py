@@ -0,0 +1,266 @@
+import asyncio
+import itertools
+import json
+import math
+import os
+import signal
+import time
+from pathlib import Path
+from src.shared import (
+    PYTHON_PRELOAD_MODULES,
+    PYTHON_POOL_START_TIMEOUT,
+    OUTPUT_HEAD_BYTES,
+    OUTPUT_TAIL_BYTES,
+    CommandExecutionError,
+    logger,
+)
+from .output_capture import HeadTailBuffer, output_store
+from .process import KILL_GRACE_PERIOD, ProcessResult, _semaphore, process_monitor, signal_process_group
+
+
+WORKER_SOURCE = (Path(__file__).parent / "python_worker.py").read_text(encoding="utf-8")
+
+# Compiled under its own name so its frames and allocations never look like the user's "<string>"
+WORKER_FILENAME = "<code-buddy-worker>"
+
+
+class PythonForkServer:
+
+    def __init__(
+        self,
+        python: str,
+        project_root: Path,
+        preload: tuple[str, ...],
+        warmup: str | None = None,
+        volatile=None,
+    ):
+        self.python = python
+        self.project_root = project_root
+        self.preload = preload
+        self.warmup = warmup
+        # Files matching volatile() are re-imported per run instead of forcing a restart
+        self.volatile = volatile
+        self.failed_preloads: dict[str, str] = {}
+        self.executions = 0
+        self._process: asyncio.subprocess.Process | None = None
+        self._reader: asyncio.Task | None = None
+        self._watched: dict[str, int] = {}
+        self._started: dict[int, asyncio.Future] = {}
+        self._finished: dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    def changed_files(self) -> list[str]:
+        changed = []
+        for path, mtime_ns in self._watched.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    changed.append(path)
+            except OSError:
+                changed.append(path)
+        return changed
+
+    def stale(self) -> bool:
+        # Preloaded project modules would be served from memory; restart once any changes on disk
+        return any(self.volatile is None or not self.volatile(path) for path in self.changed_files())
+
+    async def start(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            self.python, "-c", f"exec(compile({WORKER_SOURCE!r}, {WORKER_FILENAME!r}, 'exec'))",
+            json.dumps({"preload": list(self.preload), "warmup": self.warmup}),
+            cwd=str(self.project_root),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        try:
+            line = await asyncio.wait_for(self._process.stdout.readline(), timeout=PYTHON_POOL_START_TIMEOUT)
+            ready = json.loads(line)
+        except (asyncio.TimeoutError, ValueError):
+            await self.close()
+            raise CommandExecutionError(f"Python fork server did not start ({self.python})")
+
+        self.failed_preloads = ready["failed"]
+        root = str(self.project_root.resolve()) + os.sep
+        self._watched = {}
+        for path in ready["files"]:
+            if path.startswith(root):
+                try:
+                    self._watched[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    pass
+        self._reader = asyncio.create_task(self._read_replies())
+        logger.debug(
+            f"Python fork server {ready['pid']} ready with {len(ready['files'])} modules "
+            f"({len(self._watched)} from the project)"
+        )
+
+    async def _read_replies(self) -> None:
+        while True:
+            line = await self._process.stdout.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            if "pid" in reply:
+                future = self._started.pop(reply["id"], None)
+            else:
+                future = self._finished.pop(reply["id"], None)
+            if future is not None and not future.done():
+                future.set_result(reply)
+
+        error = CommandExecutionError("Python fork server exited")
+        for future in [*self._started.values(), *self._finished.values()]:
+            if not future.done():
+                future.set_exception(error)
+        self._started.clear()
+        self._finished.clear()
+
+    async def execute(
+        self,
+        code: str | None,
+        path: str | None,
+        cwd: Path,
+        timeout: float | None,
+        memory_limit: int | None = None,
+        profile: dict | None = None,
+    ) -> ProcessResult:
+        loop = asyncio.get_running_loop()
+        request_id = next(self._ids)
+        output_id = output_store.new_id()
+        stdout_path = output_store.path_for(output_id, "stdout")
+        stderr_path = output_store.path_for(output_id, "stderr")
+        started = self._started[request_id] = loop.create_future()
+        finished = self._finished[request_id] = loop.create_future()
+
+        request = {
+            "id": request_id,
+            "code": code,
+            "path": path,
+            "cwd": str(cwd),
+            "stdout": str(stdout_path),
+            "stderr": str(stderr_path),
+            "memory_limit": memory_limit,
+            # Backstop in case the server-side timeout never fires
+            "cpu_limit": math.ceil(timeout) + 1 if timeout else None,
+            "profile": profile,
+            "evict": self.changed_files() if self.volatile is not None else None,
+        }
+        start = time.monotonic()
+        self._process.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+        await self._process.stdin.drain()
+        pid = (await started)["pid"]
+
+        self.executions += 1
+        process_monitor.started += 1
+        process_monitor.running += 1
+        timed_out = False
+        try:
+            reply = await asyncio.wait_for(asyncio.shield(finished), timeout=timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            signal_process_group(pid, signal.SIGTERM)
+            try:
+                reply = await asyncio.wait_for(asyncio.shield(finished), timeout=KILL_GRACE_PERIOD)
+            except asyncio.TimeoutError:
+                signal_process_group(pid, signal.SIGKILL)
+                reply = await finished
+        except asyncio.CancelledError:
+            signal_process_group(pid, signal.SIGKILL)
+            raise
+        finally:
+            process_monitor.running -= 1
+
+        stdout = HeadTailBuffer.from_file(stdout_path, OUTPUT_HEAD_BYTES, OUTPUT_TAIL_BYTES, output_id, "stdout")
+        stderr = HeadTailBuffer.from_file(stderr_path, OUTPUT_HEAD_BYTES, OUTPUT_TAIL_BYTES, output_id, "stderr")
+        command = f"python {path}" if path else "python -c <code>"
+        result = ProcessResult(
+            command=command,
+            returncode=reply["returncode"],
+            stdout=stdout.text(),
+            stderr=stderr.text(),
+            timed_out=timed_out,
+            wall_time=time.monotonic() - start,
+            stdout_dropped=stdout.dropped,
+            stderr_dropped=stderr.dropped,
+            output_id=output_id if stdout.dropped or stderr.dropped else None,
+            cpu_user=reply["cpu_user"],
+            cpu_system=reply["cpu_system"],
+        )
+        process_monitor.record(result)
+        return result
+
+    async def close(self) -> None:
+        if self._process is not None and self._process.returncode is None:
+            self._process.stdin.close()
+            try:
+                await asyncio.wait_for(self._process.wait(), timeout=KILL_GRACE_PERIOD)
+            except asyncio.TimeoutError:
+                signal_process_group(self._process.pid, signal.SIGKILL)
+                await self._process.wait()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+        self._process = None
+        self._reader = None
+
+
+class PythonPool:
+
+    def __init__(
+        self,
+        python: str = "python",
+        preload: list[str] | None = None,
+        warmup: str | None = None,
+        volatile=None,
+    ):
+        self.python = python
+        self.preload = tuple(PYTHON_PRELOAD_MODULES if preload is None else preload)
+        self.warmup = warmup
+        self.volatile = volatile
+        self._servers: dict[str, PythonForkServer] = {}
+        self._lock = asyncio.Lock()
+        self.restarts = 0
+
+    async def get(self, project_root: Path) -> PythonForkServer:
+        async with self._lock:
+            key = str(project_root)
+            server = self._servers.get(key)
+            if server is not None and server.alive and not server.stale():
+                return server
+            if server is not None:
+                self.restarts += 1
+                await server.close()
+            server = PythonForkServer(self.python, project_root, self.preload, self.warmup, self.volatile)
+            await server.start()
+            self._servers[key] = server
+            return server
+
+    async def run(
+        self,
+        project_root: Path,
+        code: str | None = None,
+        path: str | None = None,
+        timeout: float | None = None,
+        memory_limit: int | None = None,
+        profile: dict | None = None,
+    ) -> ProcessResult:
+        server = await self.get(project_root)
+        async with _semaphore():
+            return await server.execute(code, path, project_root, timeout, memory_limit, profile)
+
+    def stats(self) -> dict:
+        return {
+            "servers": len(self._servers),
+            "preload": list(self.preload),
+            "restarts": self.restarts,
+            "executions": sum(server.executions for server in self._servers.values()),
+            "failed_preloads": {
+                name: error for server in self._servers.values() for name, error in server.failed_preloads.items()
+            },
+        }
+
+
+python_pool = PythonPool()
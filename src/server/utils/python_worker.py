@@ -0,0 +1,269 @@
+# Fork server for run_python. Runs standalone in the project's interpreter (exec'd via -c), so
+# it must not import anything from this package. Protocol: JSON lines, requests on stdin,
+# replies on the original stdout.
+import builtins
+import cProfile
+import importlib
+import json
+import re
+import linecache
+import os
+import resource
+import runpy
+import selectors
+import signal
+import sys
+import tracemalloc
+import traceback
+import types
+
+
+def send(fd, message):
+    data = (json.dumps(message) + "\n").encode("utf-8")
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def exit_code(code):
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def start_sampler(interval, worker_globals):
+    samples = {}
+
+    def sample(signum, frame):
+        stack = []
+        while frame is not None:
+            if frame.f_globals is not worker_globals and frame.f_code.co_filename != "<frozen runpy>":
+                code = frame.f_code
+                stack.append(f"{getattr(code, 'co_qualname', code.co_name)} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if stack:
+            key = ";".join(reversed(stack))
+            samples[key] = samples.get(key, 0) + 1
+
+    signal.signal(signal.SIGPROF, sample)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    return samples
+
+
+def read_rss_kb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def start_memory_tracking(profile):
+    directory = profile["output"]
+    state = {"snapshot_size": 0, "labels": [], "rss_start_kb": read_rss_kb("VmRSS")}
+
+    def snapshot(label):
+        label = re.sub(profile["label_invalid"], "_", str(label))
+        tracemalloc.take_snapshot().dump(os.path.join(directory, f"{label}.snapshot"))
+        if label not in state["labels"]:
+            state["labels"].append(label)
+
+    def user_snapshot(label):
+        if re.sub(profile["label_invalid"], "_", str(label)) in profile["reserved_labels"]:
+            raise ValueError(f"memory_snapshot label {label!r} is reserved for the built-in snapshots")
+        snapshot(label)
+
+    def check_peak(signum, frame):
+        # Re-snapshot each time traced memory grows by 10%, so "peak" is within 10% of the true peak
+        current, _ = tracemalloc.get_traced_memory()
+        if current > state["snapshot_size"] * 1.1:
+            state["snapshot_size"] = current
+            snapshot("peak")
+
+    tracemalloc.start(profile.get("frames") or 1)
+    snapshot("start")
+    builtins.memory_snapshot = user_snapshot
+    signal.signal(signal.SIGPROF, check_peak)
+    signal.setitimer(signal.ITIMER_PROF, profile["interval"], profile["interval"])
+    return state
+
+
+def stop_memory_tracking(profile, state):
+    signal.setitimer(signal.ITIMER_PROF, 0, 0)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.take_snapshot().dump(os.path.join(profile["output"], "end.snapshot"))
+    state["labels"].append("end")
+    tracemalloc.stop()
+    summary = {
+        "labels": state["labels"],
+        "traced_end": current,
+        "traced_peak": peak,
+        "peak_snapshot_size": state["snapshot_size"],
+        "rss_start_kb": state["rss_start_kb"],
+        "rss_end_kb": read_rss_kb("VmRSS"),
+        "rss_peak_kb": read_rss_kb("VmHWM"),
+    }
+    with open(os.path.join(profile["output"], "summary.json"), "w") as f:
+        json.dump(summary, f)
+
+
+def stop_on_terminate(signum, frame):
+    # Lets a profiled run that hits its timeout still write out what it collected
+    raise SystemExit(124)
+
+
+def run_child(request, worker_globals, close_fds):
+    code = 1
+    profile = request.get("profile")
+    profiler = samples = memory = None
+    try:
+        os.setsid()
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        for fd in close_fds:
+            os.close(fd)
+        for target, path in ((1, request["stdout"]), (2, request["stderr"])):
+            out = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.dup2(out, target)
+            os.close(out)
+        if request.get("memory_limit"):
+            resource.setrlimit(resource.RLIMIT_AS, (request["memory_limit"], request["memory_limit"]))
+        if request.get("cpu_limit"):
+            resource.setrlimit(resource.RLIMIT_CPU, (request["cpu_limit"], request["cpu_limit"] + 1))
+        os.chdir(request["cwd"])
+        if request.get("evict"):
+            # Modules changed on disk since the fork server imported them; drop them so they reload
+            evict = set(request["evict"])
+            for name, module in list(sys.modules.items()):
+                if getattr(module, "__file__", None) in evict:
+                    del sys.modules[name]
+
+        main = types.ModuleType("__main__")
+        sys.modules["__main__"] = main
+        if profile:
+            signal.signal(signal.SIGTERM, stop_on_terminate)
+        if profile and profile["mode"] == "sampling":
+            samples = start_sampler(profile["interval"], worker_globals)
+        elif profile and profile["mode"] == "memory":
+            memory = start_memory_tracking(profile)
+        elif profile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        if request.get("path"):
+            linecache.cache.pop("<string>", None)
+            path = os.path.abspath(request["path"])
+            sys.argv = [request["path"]]
+            sys.path[0] = os.path.dirname(path)
+            runpy.run_path(path, run_name="__main__")
+        else:
+            sys.argv = ["-c"]
+            # The -c launcher is registered as "<string>" too; tracebacks should quote the user's code
+            linecache.cache["<string>"] = (len(request["code"]), None, request["code"].splitlines(True), "<string>")
+            exec(compile(request["code"], "<string>", "exec"), main.__dict__)
+        code = 0
+    except SystemExit as e:
+        code = exit_code(e.code)
+    except BaseException as e:
+        # Hide this file's own frames so the traceback looks like a plain `python -c` run
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_globals is worker_globals:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        code = 1
+    finally:
+        try:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(profile["output"])
+            elif samples is not None:
+                signal.setitimer(signal.ITIMER_PROF, 0, 0)
+                with open(profile["output"], "w") as f:
+                    json.dump(samples, f)
+            elif memory is not None:
+                stop_memory_tracking(profile, memory)
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def main():
+    protocol = os.dup(1)
+    requests = os.dup(0)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    config = json.loads(sys.argv[1])
+    failed = {}
+    for name in config["preload"]:
+        try:
+            importlib.import_module(name)
+        except BaseException as e:
+            failed[name] = f"{type(e).__name__}: {e}"
+    if config.get("warmup"):
+        try:
+            exec(compile(config["warmup"], "<warmup>", "exec"), {"__name__": "__warmup__"})
+        except BaseException as e:
+            failed["<warmup>"] = f"{type(e).__name__}: {e}"
+    files = {getattr(module, "__file__", None) for module in list(sys.modules.values())}
+    send(protocol, {"ready": True, "pid": os.getpid(), "failed": failed, "files": sorted(f for f in files if f)})
+
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_read, False)
+    os.set_blocking(wakeup_write, False)
+    signal.set_wakeup_fd(wakeup_write)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    selector = selectors.DefaultSelector()
+    selector.register(requests, selectors.EVENT_READ)
+    selector.register(wakeup_read, selectors.EVENT_READ)
+    children = {}
+    pending = b""
+
+    while True:
+        for key, _ in selector.select():
+            if key.fd == wakeup_read:
+                try:
+                    while os.read(wakeup_read, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+                while children:
+                    try:
+                        pid, status, rusage = os.wait4(-1, os.WNOHANG)
+                    except ChildProcessError:
+                        break
+                    if pid == 0:
+                        break
+                    send(protocol, {
+                        "id": children.pop(pid),
+                        "returncode": os.waitstatus_to_exitcode(status),
+                        "cpu_user": rusage.ru_utime,
+                        "cpu_system": rusage.ru_stime,
+                    })
+                continue
+
+            chunk = os.read(requests, 65536)
+            if not chunk:
+                os._exit(0)
+            pending += chunk
+            while b"\n" in pending:
+                line, pending = pending.split(b"\n", 1)
+                request = json.loads(line)
+                sys.stdout.flush()
+                sys.stderr.flush()
+                pid = os.fork()
+                if pid == 0:
+                    run_child(request, globals(), (protocol, requests, wakeup_read, wakeup_write))
+                children[pid] = request["id"]
+                send(protocol, {"id": request["id"], "pid": pid})
+
+
+main()
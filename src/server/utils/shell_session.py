@@ -0,0 +1,199 @@
+import asyncio
+import base64
+import re
+import signal
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from src.shared import MAX_SHELL_SESSIONS, OUTPUT_HEAD_BYTES, OUTPUT_TAIL_BYTES, logger
+from .output_capture import HeadTailBuffer, output_store
+from .process import KILL_GRACE_PERIOD, kill_process_group, terminate
+
+
+INTERRUPT_GRACE_PERIOD = 2.0
+
+
+@dataclass
+class ShellResult:
+    output: str
+    exit_code: int | None
+    cwd: str | None
+    wall_time: float
+    timed_out: bool = False
+    restarted: bool = False
+    output_id: str | None = None
+
+
+class ShellSession:
+
+    def __init__(self, name: str, cwd: Path, env: dict | None = None):
+        self.name = name
+        self.initial_cwd = cwd
+        self.env = env
+        self.cwd = str(cwd)
+        self.commands_run = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self._process: asyncio.subprocess.Process | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def _start(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            "bash", "--noprofile", "--norc",
+            cwd=str(self.initial_cwd),
+            env=self.env,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,
+        )
+        # A trapped (rather than ignored) SIGINT lets an interrupt stop the running command
+        # while the shell itself, and its state, survives
+        self._process.stdin.write(b"trap ':' INT\n")
+        await self._process.stdin.drain()
+        logger.debug(f"Started shell session '{self.name}' (pid {self._process.pid})")
+
+    async def run(self, command: str, timeout: float | None) -> ShellResult:
+        async with self._lock:
+            restarted = False
+            if not self.alive:
+                restarted = self._process is not None
+                await self._start()
+
+            token = uuid.uuid4().hex
+            marker = f"__CODE_BUDDY_{token}__".encode()
+            pattern = re.compile(re.escape(marker) + rb" (\d+) ([^\n]*)\n")
+            encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+            # eval keeps cd/export/source in this shell; decoding from base64 means an unbalanced
+            # quote is a syntax error instead of a shell left waiting for more input
+            script = (
+                f"eval \"$(printf %s '{encoded}' | base64 -d)\" < /dev/null\n"
+                f"printf '%s %d %s\\n' '{marker.decode()}' \"$?\" \"$PWD\"\n"
+            )
+
+            output_id = output_store.new_id()
+            sink = HeadTailBuffer(OUTPUT_HEAD_BYTES, OUTPUT_TAIL_BYTES, output_id, "stdout")
+            start = time.monotonic()
+            self._process.stdin.write(script.encode("utf-8"))
+            await self._process.stdin.drain()
+
+            reader = asyncio.create_task(self._read_until(pattern, len(marker), sink))
+            timed_out = False
+            try:
+                match = await asyncio.wait_for(asyncio.shield(reader), timeout=timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                match = await self._interrupt(reader)
+            except asyncio.CancelledError:
+                await self._interrupt(reader)
+                raise
+            finally:
+                sink.close()
+
+            self.commands_run += 1
+            self.last_used = time.time()
+            exit_code = None
+            if match is not None:
+                exit_code = int(match.group(1))
+                self.cwd = match.group(2).decode("utf-8", errors="replace")
+
+            return ShellResult(
+                output=sink.text(),
+                exit_code=exit_code,
+                cwd=self.cwd if match is not None else None,
+                wall_time=time.monotonic() - start,
+                timed_out=timed_out,
+                restarted=restarted,
+                output_id=output_id if sink.dropped else None,
+            )
+
+    async def _read_until(self, pattern: re.Pattern, marker_length: int, sink: HeadTailBuffer) -> re.Match | None:
+        pending = b""
+        # Hold back enough bytes that a sentinel split across reads is still recognised
+        keep = marker_length + 4096
+        while True:
+            chunk = await self._process.stdout.read(65536)
+            if not chunk:
+                sink.write(pending)
+                return None
+            pending += chunk
+            match = pattern.search(pending)
+            if match is not None:
+                sink.write(pending[:match.start()])
+                return match
+            if len(pending) > keep:
+                sink.write(pending[:-keep])
+                pending = pending[-keep:]
+
+    async def _interrupt(self, reader: asyncio.Task) -> re.Match | None:
+        kill_process_group(self._process, signal.SIGINT)
+        try:
+            return await asyncio.wait_for(asyncio.shield(reader), timeout=INTERRUPT_GRACE_PERIOD)
+        except asyncio.TimeoutError:
+            # The command ignored the interrupt; the session is lost and restarts on next use
+            await terminate(self._process)
+            try:
+                await asyncio.wait_for(reader, timeout=KILL_GRACE_PERIOD)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                reader.cancel()
+            return None
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self.alive:
+                await terminate(self._process)
+            self._process = None
+
+    def info(self) -> dict:
+        return {
+            "session": self.name,
+            "alive": self.alive,
+            "pid": self._process.pid if self.alive else None,
+            "cwd": self.cwd,
+            "commands_run": self.commands_run,
+            "idle_seconds": round(time.time() - self.last_used, 1),
+        }
+
+
+class ShellSessionManager:
+
+    def __init__(self, max_sessions: int = MAX_SHELL_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions: dict[str, ShellSession] = {}
+
+    async def get(self, name: str, cwd: Path) -> ShellSession:
+        session = self._sessions.get(name)
+        if session is not None:
+            return session
+        if len(self._sessions) >= self.max_sessions:
+            # Evict the least recently used session
+            oldest = min(self._sessions.values(), key=lambda s: s.last_used)
+            await self.close(oldest.name)
+        session = ShellSession(name, cwd)
+        self._sessions[name] = session
+        return session
+
+    async def close(self, name: str) -> bool:
+        session = self._sessions.pop(name, None)
+        if session is None:
+            return False
+        await session.close()
+        return True
+
+    def list(self) -> list[dict]:
+        return [session.info() for session in self._sessions.values()]
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "commands_run": sum(session.commands_run for session in self._sessions.values()),
+        }
+
+
+shell_sessions = ShellSessionManager()
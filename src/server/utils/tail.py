@@ -0,0 +1,88 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from src.shared import FileAccessError
+
+
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+@dataclass
+class TailCursor:
+    inode: int
+    offset: int
+
+    def __str__(self) -> str:
+        return f"{self.inode}:{self.offset}"
+
+    @classmethod
+    def parse(cls, value: str) -> "TailCursor":
+        try:
+            inode, offset = value.split(":")
+            return cls(inode=int(inode), offset=int(offset))
+        except ValueError:
+            raise FileAccessError(f"Invalid cursor '{value}', expected '<inode>:<offset>'")
+
+
+@dataclass
+class TailChunk:
+    text: str
+    cursor: TailCursor
+    rotated: bool = False
+    truncated: bool = False
+    remaining: int = 0
+
+
+def _open(filepath: Path):
+    if not filepath.is_file():
+        raise FileAccessError(f"File '{filepath}' does not exist or is not a file.")
+    return open(filepath, "rb")
+
+
+def tail_lines(filepath: Path, count: int, block_size: int = TAIL_BLOCK_SIZE) -> TailChunk:
+    with _open(filepath) as f:
+        stat = os.fstat(f.fileno())
+        end = stat.st_size
+        pos = end
+        data = b""
+
+        # Read backwards until we have count + 1 newlines (or hit the start of the file)
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+            if data.count(b"\n", 0, len(data) - 1) >= count:
+                break
+
+    lines = data.splitlines()
+    text = b"\n".join(lines[-count:]).decode("utf-8", errors="replace") if count > 0 else ""
+    return TailChunk(text=text, cursor=TailCursor(inode=stat.st_ino, offset=end))
+
+
+def read_since(filepath: Path, cursor: TailCursor, max_bytes: int) -> TailChunk:
+    with _open(filepath) as f:
+        stat = os.fstat(f.fileno())
+        rotated = stat.st_ino != cursor.inode
+        truncated = not rotated and stat.st_size < cursor.offset
+        start = 0 if rotated or truncated else cursor.offset
+
+        f.seek(start)
+        # read(0) would return nothing forever and read(-1) the whole file
+        data = f.read(max(1, max_bytes))
+
+    end = start + len(data)
+    if end < stat.st_size:
+        # Don't hand back half a line; the rest is picked up by the next call
+        last_nl = data.rfind(b"\n")
+        if last_nl != -1:
+            data = data[:last_nl + 1]
+            end = start + len(data)
+
+    return TailChunk(
+        text=data.decode("utf-8", errors="replace"),
+        cursor=TailCursor(inode=stat.st_ino, offset=end),
+        rotated=rotated,
+        truncated=truncated,
+        remaining=stat.st_size - end,
+    )
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import heapq
+import json
+import os
+import re
+import statistics
+import time
+from pathlib import Path
+from src.shared import CACHE_DIR, CommandExecutionError
+from .output_capture import output_store
+from .process import run_process
+from .python_pool import PythonPool
+
+
+DURATIONS_DIR = CACHE_DIR / "test-durations"
+
+RUNNER_SOURCE = (Path(__file__).parent / "pytest_runner.py").read_text(encoding="utf-8")
+
+RUNNER_FILENAME = "<code-buddy-pytest>"
+
+TEST_FILE = re.compile(r"^(test_.*|.*_test)\.py$")
+
+TRACEBACK_MAX_LINES = 30
+
+FAILED_OUTCOMES = ("failed", "error")
+
+# Imports pytest, conftest files and every test module once, in the fork server
+PYTEST_WARMUP = (
+    "import pytest\n"
+    "pytest.main(['--collect-only', '-q', '-p', 'no:cacheprovider'])\n"
+)
+
+
+def is_test_file(path: str) -> bool:
+    return bool(TEST_FILE.match(os.path.basename(path)))
+
+
+# Test modules are leaves, so a changed one is simply re-imported in the next run's child;
+# any other change (conftest, project code) restarts the warm worker
+pytest_pool = PythonPool(preload=["pytest"], warmup=PYTEST_WARMUP, volatile=is_test_file)
+
+
+def trim_traceback(longrepr: str, max_lines: int = TRACEBACK_MAX_LINES) -> str:
+    lines = longrepr.rstrip().splitlines()
+    if len(lines) <= max_lines:
+        return "\n".join(lines)
+    # The failing assertion and its E lines are at the end
+    return f"... ({len(lines) - max_lines} lines trimmed)\n" + "\n".join(lines[-max_lines:])
+
+
+async def run_pytest(project_root: Path, args: list[str], timeout: float | None, list_items: bool = False) -> dict:
+    output = output_store.directory / f"{output_store.new_id()}.pytest.json"
+    spec = {"args": args, "output": str(output), "list_items": list_items}
+    code = f"SPEC = {spec!r}\nexec(compile({RUNNER_SOURCE!r}, {RUNNER_FILENAME!r}, 'exec'))"
+
+    if hasattr(os, "fork"):
+        result = await pytest_pool.run(project_root, code=code, timeout=timeout)
+    else:
+        result = await run_process(["python", "-c", code], cwd=project_root, timeout=timeout, spill=True)
+
+    try:
+        if not output.exists():
+            if result.timed_out:
+                raise CommandExecutionError(f"Tests timed out after {timeout}s\n\n{result.output[-4000:]}".rstrip())
+            raise CommandExecutionError(
+                f"pytest did not produce results (exit code: {result.returncode})\n\n{result.output[-4000:]}".rstrip()
+            )
+        report = json.loads(output.read_text(encoding="utf-8"))
+    finally:
+        output.unlink(missing_ok=True)
+
+    report["timed_out"] = result.timed_out
+    report["wall_time"] = result.wall_time
+    return report
+
+
+def durations_path(project_root: Path) -> Path:
+    digest = hashlib.sha1(str(project_root.resolve()).encode("utf-8")).hexdigest()[:16]
+    return DURATIONS_DIR / f"{digest}.json"
+
+
+def load_durations(project_root: Path) -> dict[str, float]:
+    try:
+        return json.loads(durations_path(project_root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_durations(project_root: Path, tests: list[dict]) -> None:
+    if not tests:
+        return
+    durations = load_durations(project_root)
+    durations.update((test["nodeid"], round(test["duration"], 6)) for test in tests)
+    path = durations_path(project_root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_suffix(f".{os.getpid()}.tmp")
+    temp.write_text(json.dumps(durations, sort_keys=True), encoding="utf-8")
+    os.replace(temp, path)
+
+
+def last_failed_path(cache_dir: Path) -> Path:
+    return cache_dir / "v" / "cache" / "lastfailed"
+
+
+def read_last_failed(cache_dir: Path) -> set[str]:
+    try:
+        return set(json.loads(last_failed_path(cache_dir).read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        return set()
+
+
+def update_last_failed(cache_dir: Path, tests: list[dict]) -> None:
+    # Shards run without pytest's cache plugin (each would overwrite the others' entries),
+    # so the merged outcome is written back the way the plugin would
+    path = last_failed_path(cache_dir)
+    try:
+        last_failed = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        last_failed = {}
+    for test in tests:
+        if test["outcome"] in FAILED_OUTCOMES:
+            last_failed[test["nodeid"]] = True
+        else:
+            last_failed.pop(test["nodeid"], None)
+    if not cache_dir.exists():
+        cache_dir.mkdir(parents=True)
+        (cache_dir / ".gitignore").write_text("# Created by pytest automatically.\n*\n", encoding="utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(last_failed, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def shard_tests(
+    nodeids: list[str],
+    durations: dict[str, float],
+    workers: int,
+    first: set[str] | None = None,
+) -> list[tuple[list[str], float]]:
+    # Longest-processing-time first: hand the slowest remaining test to the least loaded shard.
+    # Tests without history are assumed to take the median recorded duration.
+    known = [durations[nodeid] for nodeid in nodeids if nodeid in durations]
+    default = statistics.median(known) if known else 1.0
+    loads = [(0.0, index) for index in range(workers)]
+    shards = [[] for _ in range(workers)]
+    for nodeid in sorted(nodeids, key=lambda nodeid: durations.get(nodeid, default), reverse=True):
+        load, index = heapq.heappop(loads)
+        shards[index].append(nodeid)
+        heapq.heappush(loads, (load + durations.get(nodeid, default), index))
+
+    # Within a shard keep collection order so module and class fixtures are set up once,
+    # except that previous failures go first
+    order = {nodeid: position for position, nodeid in enumerate(nodeids)}
+    first = first or set()
+    predicted = {index: load for load, index in loads}
+    return [
+        (sorted(shard, key=lambda nodeid: (nodeid not in first, order[nodeid])), predicted[index])
+        for index, shard in enumerate(shards) if shard
+    ]
+
+
+async def run_sharded_pytest(
+    project_root: Path,
+    selection: list[str],
+    options: list[str],
+    workers: int,
+    timeout: float,
+    failed_first: bool = True,
+) -> dict:
+    started = time.perf_counter()
+    collection = await run_pytest(project_root, [*selection, *options, "--collect-only"], timeout, list_items=True)
+    if collection["collect_errors"] or not collection["items"]:
+        return {**collection, "tests": [], "shards": []}
+
+    # The collect-only pass runs with the cache plugin, so it reports pytest's own cache location
+    cache_dir = Path(collection["cache_dir"] or project_root / ".pytest_cache")
+    shards = shard_tests(
+        collection["items"],
+        load_durations(project_root),
+        min(workers, len(collection["items"])),
+        read_last_failed(cache_dir) if failed_first else None,
+    )
+    remaining = max(1.0, timeout - (time.perf_counter() - started))
+    reports = await asyncio.gather(
+        *(run_pytest(project_root, [*nodeids, *options, "-p", "no:cacheprovider"], remaining) for nodeids, _ in shards),
+        return_exceptions=True,
+    )
+
+    tests = []
+    errors = []
+    shard_stats = []
+    exit_codes = []
+    timed_out = False
+    for index, ((nodeids, predicted), report) in enumerate(zip(shards, reports), 1):
+        if isinstance(report, BaseException):
+            errors.append({"nodeid": f"<shard {index}>", "longrepr": str(report)})
+            timed_out = timed_out or "timed out" in str(report)
+            exit_codes.append(1)
+            shard_stats.append({"tests": len(nodeids), "predicted": predicted, "duration": None})
+            continue
+        tests.extend(report["tests"])
+        errors.extend(report["collect_errors"])
+        timed_out = timed_out or report["timed_out"]
+        exit_codes.append(report["exit_code"])
+        shard_stats.append({"tests": len(nodeids), "predicted": predicted, "duration": report["duration"]})
+
+    update_last_failed(cache_dir, tests)
+    return {
+        "exit_code": next((code for code in exit_codes if code not in (0, 5)), 0),
+        "duration": time.perf_counter() - started,
+        "collect_duration": collection["collect_duration"],
+        "collected": collection["collected"],
+        "tests": tests,
+        "collect_errors": errors,
+        "timed_out": timed_out,
+        "wall_time": time.perf_counter() - started,
+        "shards": shard_stats,
+    }
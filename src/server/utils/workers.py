@@ -0,0 +1,27 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn keeps workers independent of the server's event loop and threads
+            _executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def batched(items: list, workers: int | None = None) -> list[list]:
+    workers = workers or os.cpu_count() or 1
+    # A few batches per worker keeps IPC overhead low while still balancing load
+    size = max(1, len(items) // (workers * 4))
+    return [items[i:i + size] for i in range(0, len(items), size)]
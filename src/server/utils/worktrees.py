@@ -0,0 +1,45 @@
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from src.shared import CommandExecutionError
+from .process import run_process
+
+
+WORKTREE_TIMEOUT = 300
+
+
+async def git(repo: Path, *args: str, timeout: float = WORKTREE_TIMEOUT) -> str:
+    result = await run_process(["git", *args], cwd=repo, timeout=timeout, max_output=None)
+    if not result.ok:
+        raise CommandExecutionError(result.stderr.strip() or f"git {args[0]} exited with code {result.returncode}")
+    return result.stdout
+
+
+async def resolve_rev(repo: Path, rev: str) -> str:
+    try:
+        return (await git(repo, "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}")).strip()
+    except CommandExecutionError:
+        raise CommandExecutionError(f"Unknown revision: {rev}")
+
+
+@asynccontextmanager
+async def git_worktree(repo: Path, rev: str):
+    # A detached, throwaway checkout of rev that leaves the user's working tree alone. Yields the
+    # directory matching repo's place in the repository, which is the top level only if repo is
+    commit = await resolve_rev(repo, rev)
+    prefix = (await git(repo, "rev-parse", "--show-prefix")).strip()
+    parent = Path(tempfile.mkdtemp(prefix="code-buddy-worktree-"))
+    path = parent / commit[:12]
+    try:
+        await git(repo, "worktree", "add", "--detach", "--force", str(path), commit)
+        if not (path / prefix).is_dir():
+            raise CommandExecutionError(f"'{prefix.rstrip('/')}' does not exist at {rev}")
+        yield path / prefix
+    finally:
+        try:
+            await git(repo, "worktree", "remove", "--force", str(path))
+        except CommandExecutionError:
+            # Also covers an add that failed half way
+            await git(repo, "worktree", "prune")
+        shutil.rmtree(parent, ignore_errors=True)
@@ -1,9 +1,59 @@
+import os
 from pathlib import Path
 
 DEFAULT_PROJECT_ROOT = Path.cwd()
 
 MAX_FILE_SIZE = 1024 * 1024
 
+CACHE_DIR = Path(os.getenv("CODE_BUDDY_CACHE_DIR", Path.home() / ".cache" / "code-buddy")).expanduser()
+
+LINE_INDEX_CHECKPOINT = 1000
+
+MAX_LINE_LENGTH = 2000
+
+AST_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+OUTLINE_INLINE_THRESHOLD = 8
+
+PROCESS_CONCURRENCY = max(4, os.cpu_count() or 1)
+
+PROCESS_DEFAULT_TIMEOUT = 300
+
+PROCESS_MAX_OUTPUT = 512 * 1024
+
+OUTPUT_HEAD_BYTES = 16 * 1024
+
+OUTPUT_TAIL_BYTES = 48 * 1024
+
+MAX_SPILLED_OUTPUTS = 50
+
+# Background jobs get their own cap so long builds never starve short commands
+JOB_CONCURRENCY = max(2, (os.cpu_count() or 1) // 2)
+
+MAX_FINISHED_JOBS = 100
+
+MAX_SHELL_SESSIONS = 8
+
+# Modules imported once by the run_python fork server, e.g. "numpy,mypackage"
+PYTHON_PRELOAD_MODULES = [m.strip() for m in os.getenv("CODE_BUDDY_PYTHON_PRELOAD", "").split(",") if m.strip()]
+
+PYTHON_POOL_START_TIMEOUT = 60
+
+# Objects are immutable, so this only bounds memory; nothing is ever stale
+GIT_OBJECT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Upper bound on how stale git status can be after edits made outside the server
+GIT_STATUS_CACHE_TTL = 5
+
+# Diffs larger than this come back as a per-file summary unless a single file is requested
+GIT_DIFF_INLINE_BYTES = 32 * 1024
+
+# A single file's diff is paged by hunks, but only this much of it is ever read
+GIT_DIFF_FILE_MAX_BYTES = 2 * 1024 * 1024
+
+# read_file_at_rev returns at most this much text; larger blobs are read in line ranges
+GIT_BLOB_INLINE_BYTES = 256 * 1024
+
 INCLUDE_PATTERN = [
     "*.py", "*.js", "*.ts","*.jsx", ".tsx",
     "*.html", ".css"
@@ -0,0 +1,62 @@
+import importlib
+
+
+def load_line_index(tmp_path, monkeypatch):
+    # INDEX_DIR is derived from the cache dir at import time
+    monkeypatch.setenv("CODE_BUDDY_CACHE_DIR", str(tmp_path / "cache"))
+    import src.shared.constants
+    import src.server.utils.line_index as line_index
+    importlib.reload(src.shared.constants)
+    importlib.reload(line_index)
+    return line_index
+
+
+def view(line_index, path, start, end):
+    with line_index.FileViewer(path, 2000) as viewer:
+        return viewer.index.total_lines, viewer.lines(start, end)
+
+
+def test_append_extends_index(tmp_path, monkeypatch):
+    line_index = load_line_index(tmp_path, monkeypatch)
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 5001)))
+    view(line_index, path, 1, 1)
+
+    with open(path, "a") as f:
+        f.write("".join(f"line {i}\n" for i in range(5001, 5101)))
+
+    total, lines = view(line_index, path, 5050, 5050)
+    assert total == 5100
+    assert lines == [(5050, "line 5050")]
+
+
+def test_in_place_rewrite_rebuilds_index(tmp_path, monkeypatch):
+    line_index = load_line_index(tmp_path, monkeypatch)
+    path = tmp_path / "data.txt"
+    body = "".join(f"line {i}\n" for i in range(1, 5001))
+    path.write_text(body)
+    view(line_index, path, 2500, 2500)
+    inode = path.stat().st_ino
+
+    # Same inode, larger file, but every checkpoint has moved
+    with open(path, "w") as f:
+        f.write("".join(f"# prepended header line number {i}\n" for i in range(1, 51)) + body)
+    assert path.stat().st_ino == inode
+
+    total, lines = view(line_index, path, 2500, 2500)
+    assert total == 5050
+    assert lines == [(2500, "line 2450")]
+
+    # The persisted index must not resurrect the stale checkpoints either
+    line_index._indexes.clear()
+    assert view(line_index, path, 2500, 2500) == (5050, [(2500, "line 2450")])
+
+
+def test_grep_respects_max_results(tmp_path, monkeypatch):
+    import re
+    line_index = load_line_index(tmp_path, monkeypatch)
+    path = tmp_path / "data.txt"
+    path.write_text("match\n" * 10)
+    with line_index.FileViewer(path, 2000) as viewer:
+        assert viewer.grep(re.compile("match"), 1, 10, 0) == []
+        assert len(viewer.grep(re.compile("match"), 1, 10, 3)) == 3